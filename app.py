@@ -1,18 +1,73 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
-from flask_socketio import SocketIO, emit, join_room, leave_room
 import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Processes started with multiprocessing's spawn method (inference workers under
+# python app.py, password hashing workers where fork is unavailable) re-run the
+# main script as __mp_main__. They need nothing from this module, so every
+# startup side effect below is skipped for them.
+SPAWNED_CHILD = __name__ == '__mp_main__'
+
+# With SERVER_ASYNC_MODE=eventlet or gevent every connection is a green thread,
+# so the standard library is patched here, before anything else imports it
+import concurrency
+from concurrency import offload
+SERVER_ASYNC_MODE = 'threading' if SPAWNED_CHILD else concurrency.setup(
+    os.getenv('SERVER_ASYNC_MODE', 'threading'),
+    offload_threads=int(os.getenv('OFFLOAD_THREADS', '20'))
+)
+
+# Password hashing runs in its own worker processes. They are forked here,
+# before logs.setup() starts the log writer thread, before the model loads and
+# before any server threads exist, so no thread's locks are copied into them.
+import password_hashing
+password_hashing.configure(
+    rounds=int(os.getenv('PASSWORD_HASH_ROUNDS', '100000')),
+    max_workers=int(os.getenv('PASSWORD_HASH_WORKERS', '2')),
+    max_pending=int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32')),
+    admission_timeout=float(os.getenv('PASSWORD_HASH_ADMISSION_TIMEOUT', '2.0')),
+    executor=os.getenv('PASSWORD_HASH_EXECUTOR', 'process')
+)
+if not SPAWNED_CHILD:
+    password_hashing.password_hasher.start()
+
+# Log records go through a bounded queue to a background writer, as JSON lines by default
+import logging
+import logs
+if not SPAWNED_CHILD:
+    logs.setup(
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+        fmt=os.getenv('LOG_FORMAT', 'json'),
+        queue_size=int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    )
+logger = logging.getLogger(__name__)
+
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, Response, stream_with_context, g
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import sqlite3
 import uuid
 import json
-from database import init_db, add_user, verify_user, get_user, add_meeting, get_meeting, meeting_exists
-from gesture_recognition import GestureRecognizer
-import redis
+import time
+import functools
+import itertools
+import database
+from database import (init_db, add_user, verify_user, get_user, add_meeting, get_meeting, iter_messages,
+                      add_participant, is_participant)
+from password_hashing import HashingBusyError
+from presence import create_presence_store
+from stream_relay import VideoRelay
+from message_batcher import MessageBatcher
+from transcript_writer import TranscriptWriter
+from model_loader import BackgroundLoader
+from gesture_channel import GestureChannel
+from rate_limit import InferenceAdmission, RateLimitedError
+from profiler import SamplingProfiler
+from cache import TTLCache, MISSING
+import metrics
 from datetime import datetime, timedelta
 from agora_token_builder import RtcTokenBuilder
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 # Agora credentials
 AGORA_APP_ID = os.getenv('AGORA_APP_ID')
@@ -21,20 +76,217 @@ AGORA_APP_CERTIFICATE = os.getenv('AGORA_APP_CERTIFICATE')
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
-
-# Initialize database
-init_db()
-
-# Initialize gesture recognizer
-gesture_recognizer = GestureRecognizer()
-
-# Active participants (stored in memory but keyed by meeting ID)
-active_participants = {}
+# With a message queue (e.g. redis://...) emits fan out across every worker process
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=SERVER_ASYNC_MODE,
+                    message_queue=None if SPAWNED_CHILD else os.getenv('SOCKETIO_MESSAGE_QUEUE') or None)
+
+# Initialize database; connections come from a pool shared by all request threads
+database.configure_pool(size=int(os.getenv('DB_POOL_SIZE', '16')))
+if not SPAWNED_CHILD:
+    init_db()
+
+# Meeting lookups and Agora tokens on the join path are cached; CACHE_ENABLED=0 turns both off
+CACHE_ENABLED = os.getenv('CACHE_ENABLED', '1') == '1'
+database.configure_meeting_cache(
+    maxsize=int(os.getenv('MEETING_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('MEETING_CACHE_TTL', '300')),
+    enabled=CACHE_ENABLED
+)
+
+# One bar for a prediction to count as a recognized sentence, on the HTTP and the streaming path
+GESTURE_CONFIDENCE_THRESHOLD = float(os.getenv('GESTURE_CONFIDENCE_THRESHOLD', '0.5'))
+
+def build_gesture_recognizer():
+    """Load and warm up the gesture recognizer; TensorFlow is only imported here"""
+    from gesture_recognition import GestureRecognizer
+    from inference_backends import DEFAULT_MODEL_PATH
+    
+    recognizer = GestureRecognizer(
+        model_path=os.getenv('GESTURE_MODEL_PATH', DEFAULT_MODEL_PATH),
+        label_path=os.getenv('GESTURE_LABEL_PATH', 'models/signify_label_encoder_optimized_01.pkl'),
+        session_ttl=int(os.getenv('GESTURE_SESSION_TTL', '300')),
+        max_session_bytes=int(os.getenv('GESTURE_SESSION_MAX_MB', '512')) * 1024 * 1024,
+        batch_window_ms=float(os.getenv('GESTURE_BATCH_WINDOW_MS', '10')),
+        max_batch_size=int(os.getenv('GESTURE_MAX_BATCH_SIZE', '16')),
+        streaming=os.getenv('GESTURE_STREAMING', '0') == '1',
+        confidence_threshold=GESTURE_CONFIDENCE_THRESHOLD,
+        backend=os.getenv('GESTURE_BACKEND', 'keras'),
+        backend_model_path=os.getenv('GESTURE_BACKEND_MODEL') or None,
+        quantization=os.getenv('GESTURE_QUANTIZATION') or None,
+        inference_workers=int(os.getenv('GESTURE_INFERENCE_WORKERS', '0')),
+        worker_cores=os.getenv('GESTURE_WORKER_CORES') or None,
+        worker_max_restarts=int(os.getenv('GESTURE_WORKER_MAX_RESTARTS', '5')),
+        worker_restart_backoff=float(os.getenv('GESTURE_WORKER_RESTART_BACKOFF', '1.0')),
+        motion_threshold=float(os.getenv('GESTURE_MOTION_THRESHOLD', '0')),
+        min_inference_interval=float(os.getenv('GESTURE_MIN_INFERENCE_INTERVAL', '0')),
+        compiled=os.getenv('GESTURE_COMPILED', '0') == '1',
+        jit_compile=os.getenv('GESTURE_JIT_COMPILE', '0') == '1',
+        intra_op_threads=int(os.getenv('TF_INTRA_OP_THREADS', '0')),
+        inter_op_threads=int(os.getenv('TF_INTER_OP_THREADS', '0')),
+        decoder=os.getenv('GESTURE_DECODER', '0') == '1',
+        decoder_alpha=float(os.getenv('GESTURE_DECODER_ALPHA', '0.5')),
+        decoder_threshold=float(os.getenv('GESTURE_DECODER_THRESHOLD', '0.6')),
+        decoder_stable_steps=int(os.getenv('GESTURE_DECODER_STABLE_STEPS', '3')),
+        decoder_refractory=float(os.getenv('GESTURE_DECODER_REFRACTORY', '2.0')),
+        log_interval=float(os.getenv('GESTURE_LOG_INTERVAL', '1.0'))
+    )
+    if os.getenv('GESTURE_WARMUP', '1') == '1':
+        recognizer.warm_up()
+    return recognizer
+
+# Initialize gesture recognizer with per-session frame buffers, either before
+# serving or (GESTURE_BACKGROUND_LOAD=1) in a background thread while the
+# other routes already serve. Spawned children must not build another
+# recognizer (and inference worker pool).
+gesture_loader = BackgroundLoader(build_gesture_recognizer, name='gesture-model-loader')
+if not SPAWNED_CHILD:
+    gesture_loader.start(background=os.getenv('GESTURE_BACKGROUND_LOAD', '0') == '1')
+
+# Active participants keyed by meeting ID: in memory by default, or in Redis
+# (PRESENCE_BACKEND=redis) so several workers and hosts share them
+presence = create_presence_store(
+    backend=os.getenv('PRESENCE_BACKEND', 'memory'),
+    redis_url=os.getenv('REDIS_URL'),
+    ttl=int(os.getenv('PRESENCE_TTL', '60'))
+)
+
+# Bounded, latest-wins relay for video_stream frames; with a message queue frames also reach other workers
+video_relay = VideoRelay(
+    socketio,
+    max_fps=float(os.getenv('VIDEO_RELAY_MAX_FPS', '15')),
+    max_queue=int(os.getenv('VIDEO_RELAY_MAX_QUEUE', '8')),
+    max_backlog=int(os.getenv('VIDEO_RELAY_MAX_BACKLOG', '4')),
+    message_queue=bool(os.getenv('SOCKETIO_MESSAGE_QUEUE'))
+)
+
+# Chat and gesture messages go out to each room in batches, with a short history for late joiners
+message_batcher = MessageBatcher(
+    socketio,
+    flush_interval=float(os.getenv('MESSAGE_FLUSH_INTERVAL_MS', '50')) / 1000.0,
+    coalesce_window=float(os.getenv('MESSAGE_COALESCE_WINDOW', '2.0')),
+    history_size=int(os.getenv('MESSAGE_HISTORY_SIZE', '200'))
+)
+
+# Messages are stored for meeting transcripts by a background writer, never on the handler thread;
+# transcripts are read back TRANSCRIPT_PAGE_SIZE rows per query
+TRANSCRIPT_PAGE_SIZE = int(os.getenv('TRANSCRIPT_PAGE_SIZE', '500'))
+transcript_writer = TranscriptWriter(
+    batch_size=int(os.getenv('TRANSCRIPT_BATCH_SIZE', '200')),
+    flush_interval=float(os.getenv('TRANSCRIPT_FLUSH_INTERVAL', '0.5')),
+    max_queue=int(os.getenv('TRANSCRIPT_MAX_QUEUE', '10000'))
+)
+
+def publish_message(meeting_id, user_id, username, message, message_type):
+    """Send a chat or gesture message to the room and store it in the meeting transcript"""
+    if message_batcher.publish(meeting_id, {
+        'user_id': user_id,
+        'username': username,
+        'message': message,
+        'type': message_type
+    }):
+        transcript_writer.record(meeting_id, user_id, username, message_type, message)
+
+# Per-(user, meeting) token buckets and a global cap on concurrent predictions;
+# the host and active signers keep a reserved share of the cap under overload
+inference_admission = InferenceAdmission(
+    rate=float(os.getenv('GESTURE_RATE_LIMIT', '5')),
+    burst=int(os.getenv('GESTURE_RATE_BURST', '10')),
+    max_inflight=int(os.getenv('GESTURE_MAX_INFLIGHT', '32')),
+    priority_reserve=float(os.getenv('GESTURE_PRIORITY_RESERVE', '0.25')),
+    active_window=float(os.getenv('GESTURE_ACTIVE_WINDOW', '10'))
+)
+
+def on_gesture_recognized(meeting_id, user_id, username, sentence):
+    inference_admission.mark_active(meeting_id, user_id)
+    publish_message(meeting_id, user_id, username, sentence, 'gesture')
+
+# Frames streamed over Socket.IO; recognized sentences go straight to the room
+gesture_channel = GestureChannel(
+    on_recognized=on_gesture_recognized,
+    confidence_threshold=GESTURE_CONFIDENCE_THRESHOLD,
+    capacity=int(os.getenv('GESTURE_STREAM_CAPACITY', os.getenv('GESTURE_MAX_BATCH_SIZE', '16'))),
+    min_interval_ms=int(os.getenv('GESTURE_STREAM_MIN_INTERVAL_MS', '200')),
+    max_interval_ms=int(os.getenv('GESTURE_STREAM_MAX_INTERVAL_MS', '1000')),
+    admission=inference_admission,
+    offload=offload
+)
+
+# Live state read at scrape time by /metrics
+def gesture_sessions():
+    gesture_recognizer = gesture_loader.get()
+    return gesture_recognizer.sessions.stats()['sessions'] if gesture_recognizer is not None else None
+
+metrics.gauge('signify_meetings_active', 'Meetings with at least one participant',
+              lambda: presence.stats()['meetings'])
+metrics.gauge('signify_participants_active', 'Participants in all meetings',
+              lambda: presence.stats().get('participants'))
+metrics.gauge('signify_gesture_model_ready', 'Whether the gesture model is loaded and warmed up',
+              lambda: int(gesture_loader.ready))
+metrics.gauge('signify_gesture_sessions', 'Callers holding a gesture frame buffer', gesture_sessions)
+metrics.gauge('signify_gesture_streams', 'Connections streaming gesture frames over Socket.IO',
+              lambda: gesture_channel.stats()['streams'])
+metrics.gauge('signify_gesture_inflight', 'Gesture predictions running right now', lambda: inference_admission.inflight)
+metrics.callback_counter('signify_gesture_rejections_total', 'Gesture frames rejected by admission control',
+                         lambda: {('rate_limited',): inference_admission.rate_limited,
+                                  ('over_capacity',): inference_admission.over_capacity},
+                         ('reason',))
+metrics.callback_counter('signify_messages_coalesced_total', 'Repeated gesture sentences dropped before fan-out',
+                         lambda: message_batcher.coalesced)
+metrics.gauge('signify_transcript_queue_depth', 'Messages waiting to be written to transcripts',
+              lambda: transcript_writer.stats()['queued'])
+metrics.callback_counter('signify_password_hash_rejections_total', 'Logins and sign-ups rejected as too busy',
+                         lambda: password_hashing.password_hasher.rejected)
+
+SOCKETIO_EVENTS_TOTAL = metrics.counter('signify_socketio_events_total', 'Socket.IO events received', ('event',))
+SOCKETIO_EVENT_SECONDS = metrics.histogram('signify_socketio_event_seconds', 'Socket.IO event handler latency',
+                                           ('event',))
+HTTP_REQUEST_SECONDS = metrics.histogram('signify_http_request_seconds', 'HTTP request latency',
+                                         ('endpoint', 'status'))
+
+def log_fields(meeting_id=None):
+    """Log context of the current request: Socket.IO session, user and meeting, where known"""
+    fields = {'sid': getattr(request, 'sid', None), 'user_id': session.get('user_id'), 'meeting_id': meeting_id}
+    return {key: value for key, value in fields.items() if value is not None}
+
+def socket_event(event):
+    """socketio.on() that also counts the event, times its handler and binds its log context"""
+    counter = SOCKETIO_EVENTS_TOTAL.labels(event)
+    latency = SOCKETIO_EVENT_SECONDS.labels(event)
+    
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args):
+            counter.inc()
+            data = args[0] if args and isinstance(args[0], dict) else {}
+            with logs.context(event=event, **log_fields(data.get('meeting_id'))), latency.time():
+                return handler(*args)
+        return socketio.on(event)(wrapper)
+    return decorator
+
+# Opt-in (PROFILER_ENABLED=1) sampling profiler behind /debug/profile, for the users whose
+# emails are listed in PROFILER_ADMINS, or without that list only for direct local requests
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', '0') == '1'
+PROFILER_ADMINS = {email.strip().lower() for email in os.getenv('PROFILER_ADMINS', '').split(',') if email.strip()}
+PROFILER_MAX_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', '60'))
+profiler = SamplingProfiler(interval=float(os.getenv('PROFILER_INTERVAL_MS', '5')) / 1000.0)
+
+# Agora tokens are reused per (channel, uid) until they get within the refresh margin of expiry
+AGORA_TOKEN_TTL = int(os.getenv('AGORA_TOKEN_TTL', '3600'))
+AGORA_TOKEN_REFRESH_MARGIN = int(os.getenv('AGORA_TOKEN_REFRESH_MARGIN', '600'))
+agora_token_cache = TTLCache(
+    'agora_tokens',
+    maxsize=int(os.getenv('AGORA_TOKEN_CACHE_SIZE', '10000')),
+    ttl=max(0, AGORA_TOKEN_TTL - AGORA_TOKEN_REFRESH_MARGIN),
+    enabled=CACHE_ENABLED
+)
 
 # Generate Agora token
 def generate_agora_token(channel_name, uid):
-    expiration_time = 3600  # Token expires in 1 hour
+    token = agora_token_cache.get((channel_name, uid))
+    if token is not MISSING:
+        return token
+    
+    expiration_time = AGORA_TOKEN_TTL  # Token expires in 1 hour by default
     current_timestamp = int(datetime.now().timestamp())
     privilege_expired_ts = current_timestamp + expiration_time
 
@@ -46,8 +298,29 @@ def generate_agora_token(channel_name, uid):
         1,  # Role: 1 for host, 2 for guest
         privilege_expired_ts
     )
+    agora_token_cache.set((channel_name, uid), token)
     return token
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    meeting_id = (request.view_args or {}).get('meeting_id') or request.args.get('meeting_id')
+    g.log_token = logs.bind(**log_fields(meeting_id))
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        HTTP_REQUEST_SECONDS.labels(request.endpoint or 'unknown', response.status_code).observe(
+            time.perf_counter() - start)
+    return response
+
+@app.teardown_request
+def reset_log_context(error=None):
+    token = g.pop('log_token', None)
+    if token is not None:
+        logs.reset(token)
+
 @app.route('/')
 def home():
     return render_template('home.html')
@@ -58,8 +331,13 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
         
-        if verify_user(email, password):
-            user = get_user(email)
+        try:
+            verified = offload(verify_user, email, password)
+        except HashingBusyError:
+            return render_template('login.html', error="Too many login attempts right now, please try again in a moment")
+        
+        if verified:
+            user = offload(get_user, email)
             session['user_id'] = user['id']
             session['user_name'] = user['name']
             session['user_email'] = user['email']
@@ -76,7 +354,11 @@ def signup():
         email = request.form.get('email')
         password = request.form.get('password')
         
-        user_added = add_user(name, email, password)
+        try:
+            user_added = offload(add_user, name, email, password)
+        except HashingBusyError:
+            return render_template('login.html', signup=True, error="Too many sign-ups right now, please try again in a moment")
+        
         if user_added:
             return redirect(url_for('login'))
         else:
@@ -110,7 +392,7 @@ def create_meeting():
         },
         'agora_channel': meeting_id
     }
-    add_meeting(meeting_id, session['user_id'])
+    offload(add_meeting, meeting_id, session['user_id'])
     
     return redirect(url_for('meeting', meeting_id=meeting_id, token=agora_token))
 
@@ -120,7 +402,7 @@ def join_meeting():
         return redirect(url_for('login'))
 
     meeting_id = request.form.get('meeting_id')
-    meeting_data = get_meeting(meeting_id)
+    meeting_data = offload(get_meeting, meeting_id)
     
     if meeting_data:
         # Generate Agora token for the participant
@@ -135,7 +417,7 @@ def meeting(meeting_id):
         return redirect(url_for('login'))
         
     token = request.args.get('token')
-    meeting_data = get_meeting(meeting_id)
+    meeting_data = offload(get_meeting, meeting_id)
     
     if not meeting_data:
         return "Meeting not found", 404
@@ -164,20 +446,166 @@ def process_gesture():
         frame_data = request.json.get('frame')
         meeting_id = request.json.get('meeting_id')
         
-        # Process the frame with the gesture recognizer
-        gesture, confidence = gesture_recognizer.predict(frame_data)
+        return jsonify(run_gesture_prediction(frame_data, meeting_id, session['user_id']))
+    except RateLimitedError as e:
+        return rate_limited_response(e)
+    except GestureModelUnavailable as e:
+        return model_unavailable_response(e)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/process_gesture_binary', methods=['POST'])
+def process_gesture_binary():
+    """Binary frame ingestion: raw JPEG/WebP bytes or 64x64 RGB pixels as application/octet-stream"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    try:
+        meeting_id = request.args.get('meeting_id')
+        frame_format = request.headers.get('X-Frame-Format') or request.args.get('format')
+        frame_data = request.get_data(cache=False)
         
-        # Return the result
-        return jsonify({
-            'success': True,
-            'gesture': gesture,
-            'confidence': confidence
-        })
+        return jsonify(run_gesture_prediction(frame_data, meeting_id, session['user_id'], frame_format))
+    except RateLimitedError as e:
+        return rate_limited_response(e)
+    except GestureModelUnavailable as e:
+        return model_unavailable_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def rate_limited_response(error):
+    """Fast 429 rejection with a Retry-After hint"""
+    response = jsonify({'success': False, 'error': str(error), 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = error.retry_after_header
+    return response, 429
+
+class GestureModelUnavailable(RuntimeError):
+    """The gesture model is still loading (state 'loading') or cannot serve at all (state 'failed')"""
+    
+    def __init__(self, message, state):
+        super().__init__(message)
+        self.state = state
+
+def loaded_gesture_recognizer():
+    """The gesture recognizer, or GestureModelUnavailable saying why there is none"""
+    gesture_recognizer = gesture_loader.get()
+    if gesture_recognizer is not None and gesture_recognizer.error is None:
+        return gesture_recognizer
+    error = gesture_loader.error or (gesture_recognizer.error if gesture_recognizer is not None else None)
+    if error is not None:
+        raise GestureModelUnavailable(f"Gesture model failed to load: {error}", 'failed')
+    raise GestureModelUnavailable('Gesture model is still loading', 'loading')
+
+def model_unavailable_response(error):
+    return jsonify({'success': False, 'error': str(error), 'state': error.state}), 503
+
+def run_gesture_prediction(frame_data, meeting_id, user_id, frame_format=None):
+    """Process one frame in the caller's own frame buffer and build the response payload"""
+    if not frame_data:
+        return {'success': False, 'error': 'No frame data'}
+    
+    gesture_recognizer = loaded_gesture_recognizer()
+    
+    # Raises RateLimitedError when this caller or the model is over its limit
+    with inference_admission.admit(user_id, meeting_id):
+        result = offload(gesture_recognizer.predict_detailed, frame_data, meeting_id, user_id, frame_format)
+    # Inference priority follows the model's own recognitions, never what a client claims
+    if gesture_channel.recognized_sentence(result) is not None:
+        inference_admission.mark_active(meeting_id, user_id)
+    result['success'] = True
+    return result
+
+@app.route('/meeting/<meeting_id>/transcript')
+def meeting_transcript(meeting_id):
+    """Streams the meeting's messages as NDJSON; resume with after_ts/after_id from the last line
+    
+    Only the host and users who joined the meeting may read it.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = session['user_id']
+    meeting_data = offload(get_meeting, meeting_id)
+    if not meeting_data:
+        return jsonify({'success': False, 'error': 'Meeting not found'}), 404
+    if meeting_data['host_id'] != user_id and not offload(is_participant, meeting_id, user_id):
+        return jsonify({'success': False, 'error': 'Not a participant of this meeting'}), 403
+    
+    rows = iter_messages(meeting_id, after_ts=request.args.get('after_ts', type=float),
+                         after_id=request.args.get('after_id', type=int),
+                         limit=request.args.get('limit', type=int), page_size=TRANSCRIPT_PAGE_SIZE)
+    
+    def generate():
+        # Pull one page at a time off the event loop; iter_messages runs one query per page
+        while True:
+            page = offload(lambda: list(itertools.islice(rows, TRANSCRIPT_PAGE_SIZE)))
+            for row in page:
+                yield json.dumps(row) + '\n'
+            if len(page) < TRANSCRIPT_PAGE_SIZE:
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once the gesture model is loaded and warmed up, 503 until then"""
+    gesture_recognizer = gesture_loader.get()
+    is_ready = gesture_recognizer is not None and gesture_recognizer.is_ready()
+    status = gesture_loader.status()
+    status['warmup_seconds'] = gesture_recognizer.warmup_seconds if gesture_recognizer is not None else None
+    if gesture_recognizer is not None and gesture_recognizer.error is not None:
+        status.update(state='failed', error=gesture_recognizer.error)
+    return jsonify({'ready': is_ready, 'gesture_model': status}), 200 if is_ready else 503
+
+@app.route('/stats')
+def stats():
+    gesture_recognizer = gesture_loader.get()
+    return jsonify({
+        'gesture': gesture_recognizer.stats() if gesture_recognizer is not None else gesture_loader.status(),
+        'password_hashing': password_hashing.password_hasher.stats(),
+        'presence': presence.stats(),
+        'video_relay': video_relay.stats(),
+        'messages': message_batcher.stats(),
+        'transcripts': transcript_writer.stats(),
+        'gesture_stream': gesture_channel.stats(),
+        'admission': inference_admission.stats(),
+        'server': concurrency.stats(),
+        'database_pool': database.pool_stats(),
+        'logging': logs.stats(),
+        'caches': {
+            'meetings': database.meeting_cache.stats(),
+            'agora_tokens': agora_token_cache.stats()
+        }
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint: counters, latency histograms and live gauges of this process"""
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+def profiler_allowed():
+    """A logged-in PROFILER_ADMINS user, or with no admins configured a local request not relayed by a proxy"""
+    if PROFILER_ADMINS:
+        return session.get('user_email', '').lower() in PROFILER_ADMINS
+    return request.remote_addr in ('127.0.0.1', '::1') and 'X-Forwarded-For' not in request.headers
+
+@app.route('/debug/profile')
+def debug_profile():
+    """Sample every thread for ?seconds=N (default 10) and return folded stacks for a flame graph"""
+    if not PROFILER_ENABLED:
+        return "Not found", 404
+    if not profiler_allowed():
+        return jsonify({'success': False, 'error': 'Profiling is restricted to administrators'}), 403
+    
+    seconds = min(max(request.args.get('seconds', 10.0, type=float), 0.1), PROFILER_MAX_SECONDS)
+    try:
+        folded = profiler.capture(seconds)
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    return Response(folded, mimetype='text/plain')
+
 # WebSocket event handlers
-@socketio.on('join')
+@socket_event('join')
 def on_join(data):
     meeting_id = data['meeting_id']
     user_id = session.get('user_id')
@@ -187,26 +615,37 @@ def on_join(data):
         return
     
     join_room(meeting_id)
+    video_relay.add(meeting_id, request.sid)
+    gesture_channel.open(request.sid, meeting_id, user_id, username)
     
-    # Add participant to meeting's active participants
-    if meeting_id not in active_participants:
-        active_participants[meeting_id] = {}
+    # The host gets inference priority under overload; joining grants transcript access
+    meeting_data = offload(get_meeting, meeting_id)
+    if meeting_data:
+        inference_admission.set_host(meeting_id, meeting_data['host_id'])
+        offload(add_participant, meeting_id, user_id)
     
-    active_participants[meeting_id][user_id] = {
+    # Add participant to meeting's active participants
+    presence.join(meeting_id, user_id, {
         'name': username,
         'id': user_id
-    }
+    })
+    participants = presence.participants(meeting_id)
 
-    print(f"User {username} joined {meeting_id}, Participants: {active_participants}")
+    logger.info("User %s joined %s, participants: %d", username, meeting_id, len(participants))
     
     # Notify other participants
     emit('user_joined', {
         'user_id': user_id,
         'username': username,
-        'participants': list(active_participants[meeting_id].values())
+        'participants': participants
     }, to=meeting_id)
+    
+    # Catch the new participant up on the conversation so far
+    history = message_batcher.history(meeting_id)
+    if history:
+        emit('message_history', history)
 
-@socketio.on('leave')
+@socket_event('leave')
 def on_leave(data):
     meeting_id = data['meeting_id']
     user_id = session.get('user_id')
@@ -216,14 +655,19 @@ def on_leave(data):
         return
     
     leave_room(meeting_id)
+    video_relay.remove(request.sid)
+    gesture_channel.close(request.sid)
     
-    # Remove participant from meeting
-    if meeting_id in active_participants and user_id in active_participants[meeting_id]:
-        del active_participants[meeting_id][user_id]
+    # Release the participant's gesture frame buffer
+    gesture_recognizer = gesture_loader.get()
+    if gesture_recognizer is not None:
+        gesture_recognizer.end_session(meeting_id, user_id)
     
-    # If no participants left, clean up (but don't delete from database)
-    if meeting_id in active_participants and not active_participants[meeting_id]:
-        del active_participants[meeting_id]
+    # Remove participant from meeting
+    presence.leave(meeting_id, user_id)
+    if not presence.participants(meeting_id):
+        message_batcher.drop(meeting_id)
+        inference_admission.drop_meeting(meeting_id)
     
     # Notify other participants
     emit('user_left', {
@@ -231,7 +675,17 @@ def on_leave(data):
         'username': username
     }, to=meeting_id)
 
-@socketio.on('gesture_message')
+@socket_event('presence_heartbeat')
+def handle_presence_heartbeat(data):
+    """Keeps the participant's presence entry alive while the meeting page is open"""
+    user_id = session.get('user_id')
+    
+    if not user_id:
+        return
+    
+    presence.heartbeat(data['meeting_id'], user_id)
+
+@socket_event('gesture_message')
 def handle_gesture_message(data):
     meeting_id = data['meeting_id']
     user_id = session.get('user_id')
@@ -241,36 +695,61 @@ def handle_gesture_message(data):
     if not user_id or not username:
         return
     
-    # Broadcast the message to all participants in the meeting
-    emit('new_message', {
-        'user_id': user_id,
-        'username': username,
-        'message': message,
-        'type': 'gesture'
-    }, to=meeting_id)
+    # Broadcast the message to all participants in the meeting. The text comes from
+    # the client, so it does not earn inference priority; run_gesture_prediction()
+    # grants that when the model itself recognizes a sentence.
+    publish_message(meeting_id, user_id, username, message, 'gesture')
 
-@socketio.on('chat_message')
+@socket_event('chat_message')
 def handle_chat_message(data):
     meeting_id = data['meeting_id']
     user_id = session.get('user_id')
     username = session.get('user_name')
     message = data['message']
 
-    print(f"Received chat message from {username}: {message}")
-
+    logger.debug("Received chat message from %s: %s", username, message)
     
     if not user_id or not username:
         return
     
     # Broadcast the message to all participants in the meeting
-    emit('new_message', {
-        'user_id': user_id,
-        'username': username,
-        'message': message,
-        'type': 'chat'
-    }, to=meeting_id)
+    publish_message(meeting_id, user_id, username, message, 'chat')
+
+@socket_event('gesture_frame_binary')
+def handle_gesture_frame_binary(data):
+    """Binary Socket.IO variant of /process_gesture_binary; the result is returned as the ack"""
+    user_id = session.get('user_id')
+    
+    if not user_id:
+        return {'success': False, 'error': 'Not authenticated'}
+    
+    try:
+        return run_gesture_prediction(data.get('frame'), data.get('meeting_id'), user_id, data.get('format'))
+    except RateLimitedError as e:
+        return {'success': False, 'error': str(e), 'retry_after': e.retry_after}
+    except GestureModelUnavailable as e:
+        return {'success': False, 'error': str(e), 'state': e.state}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
 
-@socketio.on('video_stream')
+@socket_event('gesture_frame')
+def handle_gesture_frame(data):
+    """Streaming gesture channel: recognized sentences are pushed to the room, the ack carries load hints"""
+    try:
+        gesture_recognizer = loaded_gesture_recognizer()
+    except GestureModelUnavailable as e:
+        return {'success': False, 'error': str(e), 'state': e.state, **gesture_channel.load_info()}
+    
+    try:
+        return gesture_channel.handle_frame(request.sid, gesture_recognizer, data.get('frame'), data.get('format'))
+    except RateLimitedError as e:
+        # Back the client off for at least the retry-after period
+        interval_ms = max(gesture_channel.load_info()['interval_ms'], int(e.retry_after * 1000))
+        return {'success': False, 'error': str(e), 'retry_after': e.retry_after, 'interval_ms': interval_ms}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+@socket_event('video_stream')
 def handle_video_stream(data):
     meeting_id = data['meeting_id']
     user_id = session.get('user_id')
@@ -279,15 +758,18 @@ def handle_video_stream(data):
     if not user_id:
         return
     
-    # Broadcast the video stream to all participants in the meeting except the sender
-    emit('video_stream', {
-        'user_id': user_id,
-        'stream': stream_data
-    }, to=meeting_id, skip_sid=request.sid)
+    # Relay the video stream to all participants in the meeting except the sender,
+    # dropping stale frames instead of queueing them without bound
+    video_relay.publish(meeting_id, user_id, stream_data, request.sid)
+
+@socket_event('disconnect')
+def handle_disconnect():
+    video_relay.remove(request.sid)
+    gesture_channel.close(request.sid)
 
 # Add these new socket event handlers to your app.py file
 
-@socketio.on('offer')
+@socket_event('offer')
 def handle_offer(data):
     meeting_id = data['meeting_id']
     to_user_id = data['to_user_id']
@@ -305,7 +787,7 @@ def handle_offer(data):
         'username': username
     }, room=to_user_id)
 
-@socketio.on('answer')
+@socket_event('answer')
 def handle_answer(data):
     meeting_id = data['meeting_id']
     to_user_id = data['to_user_id']
@@ -321,7 +803,7 @@ def handle_answer(data):
         'user_id': user_id
     }, room=to_user_id)
 
-@socketio.on('ice_candidate')
+@socket_event('ice_candidate')
 def handle_ice_candidate(data):
     meeting_id = data['meeting_id']
     to_user_id = data['to_user_id']
@@ -337,15 +819,13 @@ def handle_ice_candidate(data):
         'user_id': user_id
     }, room=to_user_id)
 
-@socketio.on('get_user_info')
+@socket_event('get_user_info')
 def handle_get_user_info(data):
     meeting_id = data['meeting_id']
     requested_user_id = data['user_id']
     
     # Get the user information from the database or active participants
-    user_info = None
-    if meeting_id in active_participants and requested_user_id in active_participants[meeting_id]:
-        user_info = active_participants[meeting_id][requested_user_id]
+    user_info = presence.get(meeting_id, requested_user_id)
     
     if user_info:
         emit('user_info', {
@@ -0,0 +1,129 @@
+"""Concurrent login and meeting-lookup throughput: connect-per-call vs pooled WAL connections
+
+Logins are measured without the PBKDF2 hash (see bench_login_storm.py), so the
+numbers isolate the database access layer. The pooled_wal_thread_per_request
+run starts a new thread for every operation, as the threading server does for
+every request, to show the pool is reused across short-lived threads.
+
+Usage:
+    python -m benchmarks.bench_database [--threads 16] [--ops 2000] [--output report.json]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import database
+from benchmarks.common import report, summarize
+
+
+def legacy_get_user(email):
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
+    cursor.fetchone()
+    cursor.execute('SELECT id, name, email FROM users WHERE email = ?', (email,))
+    user = cursor.fetchone()
+    conn.close()
+    return dict(user) if user else None
+
+
+def legacy_get_meeting(meeting_id):
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM meetings WHERE id = ?', (meeting_id,))
+    meeting = cursor.fetchone()
+    conn.close()
+    return dict(meeting) if meeting else None
+
+
+def pooled_get_user(email):
+    with database.connection() as conn:
+        conn.execute('SELECT password FROM users WHERE email = ?', (email,)).fetchone()
+    return database.get_user(email)
+
+
+def on_new_thread(fn):
+    """fn run on a fresh thread per call, like a request on the threading server"""
+    def call(arg):
+        thread = threading.Thread(target=fn, args=(arg,))
+        thread.start()
+        thread.join()
+    return call
+
+
+def run(name, login_fn, meeting_fn, threads, ops, users, meetings):
+    latencies = {'login': [], 'meeting': []}
+    lock = threading.Lock()
+
+    def worker(offset):
+        local = {'login': [], 'meeting': []}
+        for i in range(ops):
+            kind = 'login' if i % 2 == 0 else 'meeting'
+            start = time.perf_counter()
+            if kind == 'login':
+                login_fn(users[(offset + i) % len(users)])
+            else:
+                meeting_fn(meetings[(offset + i) % len(meetings)])
+            local[kind].append(time.perf_counter() - start)
+        with lock:
+            for kind in local:
+                latencies[kind].extend(local[kind])
+
+    workers = [threading.Thread(target=worker, args=(n * 7,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'mode': name,
+        'ops_per_second': threads * ops / elapsed,
+        'pool': database.pool_stats(),
+        'login': summarize(latencies['login']),
+        'meeting_lookup': summarize(latencies['meeting'])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--ops', type=int, default=2000, help='Operations per thread')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'bench.db')
+        database.init_db()
+        # Measure SQLite, not the meeting cache in front of it
+        database.configure_meeting_cache(enabled=False)
+
+        # Seed directly: hashing every password would dominate the setup time
+        with database.connection() as conn, conn:
+            conn.executemany('INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
+                             [(f'user{i}', f'user{i}@example.com', 'x:y') for i in range(args.users)])
+            conn.executemany('INSERT INTO meetings (id, host_id) VALUES (?, ?)',
+                             [(f'm{i:07d}', i % args.users + 1) for i in range(args.users)])
+        users = [f'user{i}@example.com' for i in range(args.users)]
+        meetings = [f'm{i:07d}' for i in range(args.users)]
+
+        results = [
+            run('connect_per_call', legacy_get_user, legacy_get_meeting, args.threads, args.ops, users, meetings),
+            run('pooled_wal', pooled_get_user, database.get_meeting, args.threads, args.ops, users, meetings),
+            run('pooled_wal_thread_per_request', on_new_thread(pooled_get_user), on_new_thread(database.get_meeting),
+                args.threads, args.ops, users, meetings)
+        ]
+        database.close_db_connection()
+
+    report('database', {'threads': args.threads, 'ops_per_thread': args.ops, 'runs': results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Latency-to-commit of the smoothing decoder vs the threshold-and-clear rule
+
+The baseline is the live path without the decoder: a window counts once its
+top class reaches GESTURE_CONFIDENCE_THRESHOLD (0.5), and the recognizer
+then clears the buffer, so nothing more can be recognized until
+sequence_length new frames have arrived.
+
+By default the window predictions come from a synthetic recording: a
+sequence of different signs separated by pauses, where a window's
+probability for a sign grows with how much of the sign it covers, plus
+noise. With --video they come from running the model over a recorded video
+(one window per frame), and commit times are reported since there is no
+ground truth.
+
+Usage:
+    python -m benchmarks.bench_decoder [--signs 20] [--sign-frames 30] [--gap-frames 10] [--fps 10]
+        [--alpha 0.5] [--threshold 0.6] [--stable-steps 3] [--refractory 2.0] [--output report.json]
+    python -m benchmarks.bench_decoder --video recording.mp4 [--sample-fps 10]
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.common import report
+from gesture_decoder import DecoderState, GestureDecoder
+
+SEQUENCE_LENGTH = 30
+NUM_CLASSES = 4
+
+
+def synthetic_recording(signs, sign_frames, gap_frames, noise, seed=0):
+    """Per-step window probabilities and the (onset step, class) of every sign"""
+    rng = np.random.default_rng(seed)
+    total = gap_frames + signs * (sign_frames + gap_frames)
+    labels = np.full(total, -1)
+    onsets = []
+    for i in range(signs):
+        start = gap_frames + i * (sign_frames + gap_frames)
+        # Consecutive signs differ; identical back-to-back sentences are coalesced downstream anyway
+        previous = onsets[-1][1] if onsets else -1
+        cls = int(rng.choice([c for c in range(NUM_CLASSES) if c != previous]))
+        labels[start:start + sign_frames] = cls
+        onsets.append((start, cls))
+
+    probabilities = np.empty((total, NUM_CLASSES), dtype=np.float32)
+    for step in range(total):
+        # The window ending at this step covers the last SEQUENCE_LENGTH frames
+        window = labels[max(0, step - SEQUENCE_LENGTH + 1):step + 1]
+        logits = rng.normal(0.0, noise, NUM_CLASSES)
+        for cls in range(NUM_CLASSES):
+            logits[cls] += 4.0 * np.count_nonzero(window == cls) / SEQUENCE_LENGTH
+        exp = np.exp(logits - logits.max())
+        probabilities[step] = exp / exp.sum()
+    return probabilities, onsets
+
+
+def baseline_commits(probabilities, threshold=0.5):
+    """(step, class) commits of the threshold-and-clear rule"""
+    commits = []
+    filled = 0
+    for step, window in enumerate(probabilities):
+        filled += 1
+        if filled < SEQUENCE_LENGTH:
+            continue
+        cls = int(np.argmax(window))
+        if window[cls] >= threshold:
+            commits.append((step, cls))
+            filled = 0  # clear_buffer()
+    return commits
+
+
+def decoder_commits(probabilities, decoder, fps):
+    """(step, class) commits of the smoothing decoder, fed one window per step"""
+    state = DecoderState()
+    commits = []
+    for step, window in enumerate(probabilities):
+        if step < SEQUENCE_LENGTH - 1:
+            continue  # Still collecting frames
+        cls, _ = decoder.update(state, window, now=step / fps)
+        if cls is not None:
+            commits.append((step, cls))
+    return commits
+
+
+def score(commits, onsets, sign_frames, gap_frames, fps):
+    """Match each sign to the first correct commit before the next sign starts"""
+    latencies = []
+    matched = set()
+    for onset, cls in onsets:
+        deadline = onset + sign_frames + gap_frames
+        for index, (step, committed) in enumerate(commits):
+            if index not in matched and onset <= step < deadline and committed == cls:
+                matched.add(index)
+                latencies.append((step - onset) / fps)
+                break
+    missed = len(onsets) - len(latencies)
+    latencies = np.asarray(latencies) * 1000.0
+    return {
+        'signs': len(onsets),
+        'recognized': int(latencies.size),
+        'missed': missed,
+        'spurious_or_duplicate': len(commits) - len(matched),
+        'latency_from_onset_ms': {
+            'mean': float(latencies.mean()) if latencies.size else None,
+            'p50': float(np.percentile(latencies, 50)) if latencies.size else None,
+            'p95': float(np.percentile(latencies, 95)) if latencies.size else None
+        }
+    }
+
+
+def video_probabilities(path, model_path, sample_fps):
+    from inference_backends import load_backend
+    from transcribe import read_frames, sliding_windows
+
+    backend = load_backend('keras', model_path, compiled=True)
+    frames = list(read_frames(path, sample_fps))
+    fps = sample_fps or (len(frames) / frames[-1][1] if frames[-1][1] else 30.0)
+    outputs = [backend.predict(batch) for batch, _ in sliding_windows(iter(frames), SEQUENCE_LENGTH, 1, 32)]
+    # Pad the collecting phase so step numbers line up with frame numbers
+    padding = np.zeros((SEQUENCE_LENGTH - 1, outputs[0].shape[1]), dtype=np.float32)
+    return np.concatenate([padding] + outputs), fps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signs', type=int, default=20)
+    parser.add_argument('--sign-frames', type=int, default=30)
+    parser.add_argument('--gap-frames', type=int, default=10)
+    parser.add_argument('--noise', type=float, default=0.5)
+    parser.add_argument('--fps', type=float, default=10.0, help='Frames (decoder steps) per second')
+    parser.add_argument('--alpha', type=float, default=0.5)
+    parser.add_argument('--threshold', type=float, default=0.6)
+    parser.add_argument('--stable-steps', type=int, default=3)
+    parser.add_argument('--refractory', type=float, default=2.0)
+    parser.add_argument('--video', help='Recorded video to run the model over instead of synthetic data')
+    parser.add_argument('--model', default='models/signify_model_optimized_01.h5')
+    parser.add_argument('--sample-fps', type=float)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    decoder = GestureDecoder(args.alpha, args.threshold, args.stable_steps, args.refractory)
+    results = {'decoder_config': {key: value for key, value in decoder.stats().items()
+                           if key in ('alpha', 'commit_threshold', 'stable_steps', 'refractory')}}
+
+    if args.video:
+        probabilities, fps = video_probabilities(args.video, args.model, args.sample_fps)
+        results['video'] = args.video
+        results['fps'] = fps
+        for name, commits in (('baseline', baseline_commits(probabilities)),
+                              ('decoder', decoder_commits(probabilities, decoder, fps))):
+            results[name] = {
+                'commits': len(commits),
+                'first_commit_s': commits[0][0] / fps if commits else None,
+                'commit_times_s': [round(step / fps, 3) for step, _ in commits]
+            }
+    else:
+        probabilities, onsets = synthetic_recording(args.signs, args.sign_frames, args.gap_frames, args.noise)
+        results['recording'] = {
+            'signs': args.signs,
+            'sign_frames': args.sign_frames,
+            'gap_frames': args.gap_frames,
+            'noise': args.noise,
+            'fps': args.fps
+        }
+        results['baseline'] = score(baseline_commits(probabilities), onsets, args.sign_frames, args.gap_frames,
+                                    args.fps)
+        results['decoder'] = score(decoder_commits(probabilities, decoder, args.fps), onsets, args.sign_frames,
+                                   args.gap_frames, args.fps)
+    report('decoder', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Forward-pass latency of model.predict(), model(x, training=False) and the compiled tf.function
+
+Usage:
+    python -m benchmarks.bench_inference_paths [--model models/signify_model_optimized_01.h5]
+        [--batch-sizes 1,2,4,8,16,32] [--iterations 20] [--jit] [--intra-op-threads 0]
+        [--inter-op-threads 0] [--output report.json]
+"""
+import argparse
+import time
+
+from benchmarks.common import report, summarize
+from inference_backends import DEFAULT_MODEL_PATH, compile_model, configure_threading, load_keras_model, sample_sequences
+
+
+def as_numpy(forward):
+    return lambda x: forward(x).numpy()
+
+
+def measure(fn, sequences, iterations):
+    # The first call traces or builds the predict function; keep it out of the steady state
+    start = time.perf_counter()
+    fn(sequences)
+    first_call = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(sequences)
+        latencies.append(time.perf_counter() - start)
+    result = summarize(latencies)
+    result['first_call_ms'] = first_call * 1000.0
+    result['sequences_per_second'] = len(sequences) * iterations / sum(latencies)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--batch-sizes', default='1,2,4,8,16,32')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--jit', action='store_true', help='Also measure the XLA jit_compile variant')
+    parser.add_argument('--intra-op-threads', type=int, default=0)
+    parser.add_argument('--inter-op-threads', type=int, default=0)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    configure_threading(args.intra_op_threads, args.inter_op_threads)
+    model = load_keras_model(args.model)
+    paths = {
+        'predict': lambda x: model.predict(x, verbose=0),
+        'call': lambda x: model(x, training=False).numpy(),
+        'tf_function': as_numpy(compile_model(model))
+    }
+    if args.jit:
+        paths['tf_function_jit'] = as_numpy(compile_model(model, jit_compile=True))
+
+    results = {
+        'intra_op_threads': args.intra_op_threads,
+        'inter_op_threads': args.inter_op_threads,
+        'batch_sizes': {}
+    }
+    for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+        sequences = sample_sequences(model.input_shape[1:], batch_size)
+        results['batch_sizes'][batch_size] = {
+            name: measure(fn, sequences, args.iterations) for name, fn in paths.items()
+        }
+    report('inference_paths', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
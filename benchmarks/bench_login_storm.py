@@ -0,0 +1,120 @@
+"""Gesture-path latency during a login storm: inline PBKDF2 vs the bounded hashing executor
+
+A probe thread sends a JPEG frame through GestureRecognizer.predict_detailed()
+every --interval ms, the same call /process_gesture makes (decode, buffer and
+a model forward pass on a full window; the random-weights stub model unless
+--model/--labels are given), while --logins threads verify passwords as fast
+as they can. The probe latency percentiles show how much the hashing steals
+from the gesture path in each mode.
+
+Usage:
+    python -m benchmarks.bench_login_storm [--logins 32] [--duration 5] [--output report.json]
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import password_hashing
+from benchmarks.common import report, summarize
+from benchmarks.stub_model import write_stub_files
+
+
+def inline_verify(stored, password):
+    rounds, salt, key = password_hashing.parse_hash(stored)
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, rounds) == key
+
+
+def probe(recognizer, frame, interval, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        recognizer.predict_detailed(frame, 'bench', 'probe', 'jpeg')
+        latencies.append(time.perf_counter() - start)
+        time.sleep(interval)
+
+
+def run(mode, verify, recognizer, frame, args):
+    stop = threading.Event()
+    latencies = []
+    logins = [0]
+    rejected = [0]
+    lock = threading.Lock()
+
+    def login_worker():
+        while not stop.is_set():
+            try:
+                verify()
+                with lock:
+                    logins[0] += 1
+            except password_hashing.HashingBusyError:
+                with lock:
+                    rejected[0] += 1
+
+    probe_thread = threading.Thread(target=probe, args=(recognizer, frame, args.interval / 1000, stop, latencies))
+    workers = [threading.Thread(target=login_worker) for _ in range(args.logins if verify else 0)]
+    probe_thread.start()
+    for worker in workers:
+        worker.start()
+    time.sleep(args.duration)
+    stop.set()
+    probe_thread.join()
+    for worker in workers:
+        worker.join()
+
+    return {
+        'mode': mode,
+        'gesture_probe': summarize(latencies),
+        'logins_per_second': logins[0] / args.duration,
+        'logins_rejected': rejected[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=32, help='Concurrent login threads')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per mode')
+    parser.add_argument('--interval', type=float, default=20.0, help='Probe interval in ms')
+    parser.add_argument('--rounds', type=int, default=password_hashing.LEGACY_ROUNDS)
+    parser.add_argument('--workers', type=int, default=2, help='Hashing executor processes')
+    parser.add_argument('--model', help='Keras model (defaults to the random-weights stub)')
+    parser.add_argument('--labels', help='Label encoder matching --model')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    hasher = password_hashing.PasswordHasher(rounds=args.rounds, max_workers=args.workers,
+                                             max_pending=args.workers * 4, admission_timeout=0.5)
+    hasher.start()
+    stored = hasher.hash('correct horse')
+
+    # Forked hashing workers above start before TensorFlow is imported here
+    from gesture_recognition import GestureRecognizer
+
+    if args.model:
+        model_path, label_path = args.model, args.labels
+    else:
+        model_path, label_path = write_stub_files(os.path.join(tempfile.mkdtemp(prefix='signify-bench-'), 'models'))
+    recognizer = GestureRecognizer(model_path=model_path, label_path=label_path)
+    recognizer.warm_up()
+
+    image = np.random.default_rng(0).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    frame = cv2.imencode('.jpg', image)[1].tobytes()
+    # Fill the probe's frame window so every probe call runs the model
+    for _ in range(recognizer.sequence_length):
+        recognizer.predict_detailed(frame, 'bench', 'probe', 'jpeg')
+
+    results = [
+        run('idle', None, recognizer, frame, args),
+        run('inline_pbkdf2', lambda: inline_verify(stored, 'correct horse'), recognizer, frame, args),
+        run('hashing_executor', lambda: hasher.verify(stored, 'correct horse'), recognizer, frame, args)
+    ]
+    report('login_storm', {'cpus': os.cpu_count(), 'login_threads': args.logins,
+                          'model': 'stub' if not args.model else model_path, 'runs': results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
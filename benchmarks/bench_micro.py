@@ -0,0 +1,170 @@
+"""Microbenchmarks of preprocess_frame, predict, the database.py functions and logging
+
+Runs against the random-weights stub model unless --model/--labels point at
+the real files, and against a scratch SQLite database.
+
+Usage:
+    python -m benchmarks.bench_micro [--iterations 200] [--model path.h5 --labels encoder.pkl]
+        [--only preprocess,predict,database,logging] [--output report.json]
+"""
+import argparse
+import base64
+import logging
+import os
+import tempfile
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+import database
+import logs
+import password_hashing
+from benchmarks.common import report, summarize
+from benchmarks.stub_model import write_stub_files
+
+
+def bench(fn, iterations, warmup=5):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    result = summarize(latencies)
+    result['ops_per_second'] = iterations / sum(latencies)
+    return result
+
+
+def sample_frames(count, width=320, height=240):
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+    jpegs = [cv2.imencode('.jpg', image)[1].tobytes() for image in images]
+    return {
+        'data_url': ['data:image/jpeg;base64,' + base64.b64encode(jpeg).decode() for jpeg in jpegs],
+        'jpeg': jpegs,
+        'rgb': [cv2.resize(image, (64, 64))[:, :, ::-1].tobytes() for image in images]
+    }
+
+
+def preprocess_benchmarks(recognizer, frames, iterations):
+    results = {}
+    for frame_format, samples in frames.items():
+        cycle = iter(range(10 ** 9))
+        results[frame_format] = bench(
+            lambda: recognizer.preprocess_frame(samples[next(cycle) % len(samples)],
+                                                None if frame_format == 'data_url' else frame_format),
+            iterations
+        )
+    return results
+
+
+def predict_benchmarks(recognizer, frames, iterations):
+    samples = frames['rgb']
+    cycle = iter(range(10 ** 9))
+    results = {
+        # Full request path once the window is full: preprocess, buffer, gate, forward pass, decode
+        'predict_detailed': bench(
+            lambda: recognizer.predict_detailed(samples[next(cycle) % len(samples)], 'bench', 1, 'rgb'),
+            iterations, warmup=recognizer.sequence_length
+        )
+    }
+    sequence = np.random.default_rng(0).random((1, recognizer.sequence_length, 64, 64, 3), dtype=np.float32)
+    results['forward_pass_batch_1'] = bench(lambda: recognizer._predict_batch(sequence), iterations)
+    return results
+
+
+def database_benchmarks(iterations):
+    email = f'bench-{uuid.uuid4().hex}@example.com'
+    database.add_user('Bench', email, 'password')
+    user = database.get_user(email)
+    meeting_id = uuid.uuid4().hex[:8]
+    database.add_meeting(meeting_id, user['id'])
+    counter = iter(range(10 ** 9))
+    rows = [(meeting_id, user['id'], 'Bench', 'chat', 'hello', time.time() + i) for i in range(100)]
+    # The meeting cache is measured separately; the plain names are SQLite queries
+    database.configure_meeting_cache(enabled=False)
+    results = {
+        'get_user': bench(lambda: database.get_user(email), iterations),
+        'get_meeting': bench(lambda: database.get_meeting(meeting_id), iterations),
+        'meeting_exists': bench(lambda: database.meeting_exists(meeting_id), iterations),
+        'add_meeting': bench(lambda: database.add_meeting(f'm{next(counter)}', user['id']), iterations),
+        'add_messages_100_rows': bench(lambda: database.add_messages(rows), max(1, iterations // 10)),
+        'iter_messages_page': bench(lambda: list(database.iter_messages(meeting_id, limit=100)),
+                                    max(1, iterations // 10)),
+        'verify_user': bench(lambda: database.verify_user(email, 'password'), max(1, iterations // 10))
+    }
+    database.configure_meeting_cache()
+    results['get_meeting_cached'] = bench(lambda: database.get_meeting(meeting_id), iterations)
+    results['meeting_exists_cached'] = bench(lambda: database.meeting_exists(meeting_id), iterations)
+    return results
+
+
+def logging_benchmarks(iterations):
+    """Caller-side cost of a per-frame log line: print() vs the queued, lazily formatted logger"""
+    sink = open(os.devnull, 'w')
+    logs.setup(level='INFO', stream=sink)
+    logger = logging.getLogger('benchmarks.logging')
+    throttle = logs.Throttle(interval=1.0)
+    probabilities = np.random.default_rng(0).random(4, dtype=np.float32)
+
+    def throttled_info():
+        if logger.isEnabledFor(logging.INFO) and throttle.allow('bench') is not None:
+            logger.info("All probabilities %s", probabilities)
+
+    results = {
+        'print_f_string': bench(lambda: print(f"All probabilities: {probabilities}", file=sink), iterations),
+        'debug_disabled': bench(lambda: logger.debug("All probabilities %s", probabilities), iterations),
+        'info_enqueued': bench(lambda: logger.info("All probabilities %s", probabilities), iterations),
+        'info_throttled': bench(throttled_info, iterations)
+    }
+    logs.shutdown()
+    sink.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--model', help='Keras model (defaults to the random-weights stub)')
+    parser.add_argument('--labels', help='Label encoder matching --model')
+    parser.add_argument('--only', default='preprocess,predict,database,logging')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    parts = set(args.only.split(','))
+
+    workdir = tempfile.mkdtemp(prefix='signify-bench-')
+    results = {'iterations': args.iterations}
+
+    if parts & {'preprocess', 'predict'}:
+        from gesture_recognition import GestureRecognizer
+
+        if args.model:
+            model_path, label_path = args.model, args.labels
+        else:
+            model_path, label_path = write_stub_files(os.path.join(workdir, 'models'))
+        results['model'] = 'stub' if not args.model else model_path
+        recognizer = GestureRecognizer(model_path=model_path, label_path=label_path)
+        recognizer.warm_up()
+        frames = sample_frames(32)
+        if 'preprocess' in parts:
+            results['preprocess_frame'] = preprocess_benchmarks(recognizer, frames, args.iterations)
+        if 'predict' in parts:
+            results['predict'] = predict_benchmarks(recognizer, frames, args.iterations)
+
+    if 'database' in parts:
+        database.DB_PATH = os.path.join(workdir, 'bench.db')
+        database.init_db()
+        password_hashing.configure(executor='thread')
+        results['database'] = database_benchmarks(args.iterations)
+
+    if 'logging' in parts:
+        results['logging'] = logging_benchmarks(args.iterations)
+
+    report('micro', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
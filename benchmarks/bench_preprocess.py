@@ -0,0 +1,105 @@
+"""Per-frame allocation and time of frame preprocessing, before and after the float32 ring buffer
+
+Usage:
+    python -m benchmarks.bench_preprocess [--frames 300] [--width 320 --height 240] [--output report.json]
+"""
+import argparse
+import base64
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from benchmarks.common import report, summarize
+from frame_preprocessing import decode_frame, resize_normalize
+from session_store import FrameRingBuffer
+
+IMG_SIZE = (64, 64)
+SEQUENCE_LENGTH = 30
+
+
+def legacy_step(frame_data, frames_buffer):
+    """The original path: float64 normalization, list buffer and a fresh model input array"""
+    img_bytes = base64.b64decode(frame_data.split(',')[1])
+    frame = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+    frame = cv2.resize(frame, IMG_SIZE)
+    frame = frame / 255.0
+    frames_buffer.append(frame)
+    if len(frames_buffer) > SEQUENCE_LENGTH:
+        frames_buffer.pop(0)
+    if len(frames_buffer) < SEQUENCE_LENGTH:
+        return None
+    return np.expand_dims(np.array(frames_buffer), axis=0)
+
+
+def ring_step(frame_data, buffer):
+    """The current path: decode, then resize/normalize straight into the ring slot"""
+    frame = decode_frame(frame_data, IMG_SIZE)
+    resize_normalize(frame, IMG_SIZE, out=buffer.next_slot())
+    buffer.commit()
+    if not buffer.is_full():
+        return None
+    return buffer.sequence()[np.newaxis]
+
+
+def run(step, state, frames):
+    # Fill the window first so every measured step assembles a full model input
+    for frame_data in frames[:SEQUENCE_LENGTH]:
+        step(frame_data, state)
+
+    latencies = []
+    for frame_data in frames[SEQUENCE_LENGTH:]:
+        start = time.perf_counter()
+        step(frame_data, state)
+        latencies.append(time.perf_counter() - start)
+
+    # NumPy reports its buffers to tracemalloc, so the per-step peak covers every temporary array
+    allocated = []
+    tracemalloc.start()
+    for frame_data in frames[SEQUENCE_LENGTH:]:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        step(frame_data, state)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated.append(peak - before)
+    tracemalloc.stop()
+
+    return {
+        'latency': summarize(latencies),
+        'peak_alloc_bytes_per_frame': {
+            'mean': float(np.mean(allocated)),
+            'max': int(np.max(allocated))
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=320)
+    parser.add_argument('--height', type=int, default=240)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(args.frames + SEQUENCE_LENGTH):
+        image = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+        encoded = base64.b64encode(cv2.imencode('.jpg', image)[1]).decode()
+        frames.append('data:image/jpeg;base64,' + encoded)
+
+    results = {
+        'source_size': [args.width, args.height],
+        'legacy': run(legacy_step, [], frames),
+        'ring_buffer': run(ring_step, FrameRingBuffer(SEQUENCE_LENGTH, IMG_SIZE + (3,)), frames)
+    }
+
+    # Bytes allocated just to build the model input on each step
+    results['legacy']['model_input_bytes_per_frame'] = SEQUENCE_LENGTH * IMG_SIZE[0] * IMG_SIZE[1] * 3 * 8
+    results['ring_buffer']['model_input_bytes_per_frame'] = 0
+    report('preprocess', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
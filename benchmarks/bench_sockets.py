@@ -0,0 +1,383 @@
+"""Concurrent Socket.IO connections each server async mode sustains, idle and active
+
+For every mode the app runs in its own server process (random-weights stub
+model, scratch database). This process then opens WebSocket connections to
+it on gevent greenlets, speaking Engine.IO v4 / Socket.IO directly, in
+steps of idle sockets. Each idle socket joins a small meeting and only
+answers pings. At every step a fixed set of active sockets sends chat
+messages and video frames for --duration seconds. The report gives, per
+mode and step, how many sockets connected and stayed up, connect latency,
+chat round-trip latency (send to receipt of the batched new_message), and
+the server's memory and thread count.
+
+Usage:
+    python -m benchmarks.bench_sockets [--modes threading,eventlet,gevent] [--idle 250,500,1000]
+        [--active 20] [--duration 15] [--message-interval 1.0] [--video-fps 5] [--room-size 5]
+        [--output report.json]
+"""
+import sys
+
+if '--serve' not in sys.argv:
+    # The client side holds thousands of sockets, one greenlet each
+    from gevent import monkey
+    monkey.patch_all()
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from benchmarks.common import report, summarize
+
+RESULT_PREFIX = 'BENCH_READY '
+
+
+def serve(mode, port):
+    """Run the app in this process with the given async mode until killed"""
+    from benchmarks.stub_model import write_stub_files
+
+    workdir = tempfile.mkdtemp(prefix=f'signify-sockets-{mode}-')
+    model_path, label_path = write_stub_files(os.path.join(workdir, 'models'))
+    os.environ.update({
+        'SERVER_ASYNC_MODE': mode,
+        'GESTURE_MODEL_PATH': model_path,
+        'GESTURE_LABEL_PATH': label_path,
+        'GESTURE_BACKGROUND_LOAD': '1',
+        'PASSWORD_HASH_ROUNDS': '1000'
+    })
+    sys.path.insert(0, os.getcwd())
+    os.chdir(workdir)
+    import app
+
+    print(RESULT_PREFIX + json.dumps({'pid': os.getpid()}), flush=True)
+    app.socketio.run(app.app, host='127.0.0.1', port=port, debug=False, use_reloader=False,
+                     log_output=False, allow_unsafe_werkzeug=True)
+
+
+def process_usage(pid):
+    """Resident memory (MB) and OS thread count of a process, from /proc"""
+    usage = {}
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    usage['rss_mb'] = int(line.split()[1]) / 1024.0
+                elif line.startswith('Threads:'):
+                    usage['threads'] = int(line.split()[1])
+    except OSError:
+        pass
+    return usage
+
+
+class SocketClient:
+    """One Socket.IO connection over a raw Engine.IO v4 WebSocket
+
+    Speaks WebSocket through wsproto on the (gevent) socket directly, so each
+    connection costs one greenlet and frames are read by whoever is waiting.
+    """
+
+    def __init__(self, base_url, cookie, on_event=None):
+        self.base_url = base_url
+        self.cookie = cookie
+        self.on_event = on_event
+        self.sock = None
+        self.ws = None
+        self.messages = []
+        self.text = []
+        self.send_lock = threading.Lock()
+        self.alive = False
+        self.error = None
+
+    def connect(self, timeout=10.0):
+        from urllib.parse import urlparse
+
+        from wsproto import ConnectionType, WSConnection
+        from wsproto.events import AcceptConnection, RejectConnection, Request
+
+        url = urlparse(self.base_url)
+        self.sock = socket.create_connection((url.hostname, url.port), timeout=timeout)
+        self.ws = WSConnection(ConnectionType.CLIENT)
+        self._write(Request(host=url.netloc, target='/socket.io/?EIO=4&transport=websocket',
+                            extra_headers=[(b'cookie', self.cookie.encode())]))
+        while True:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("Connection closed during the WebSocket handshake")
+            self.ws.receive_data(data)
+            for event in self.ws.events():
+                if isinstance(event, RejectConnection):
+                    raise ConnectionError(f"WebSocket upgrade rejected with status {event.status_code}")
+                if isinstance(event, AcceptConnection):
+                    break
+                self._handle(event)
+            else:
+                continue
+            break
+        # Frames that arrived with the handshake response are still queued in wsproto
+        opened = self.receive(timeout)
+        if not opened or not opened.startswith('0'):
+            raise RuntimeError(f"Unexpected Engine.IO open packet {opened!r}")
+        self.send('40')
+        connected = self.receive(timeout)
+        if not connected or not connected.startswith('40'):
+            raise RuntimeError(f"Socket.IO connect refused: {connected!r}")
+        self.sock.settimeout(None)
+        self.alive = True
+
+    def _write(self, event):
+        with self.send_lock:
+            self.sock.sendall(self.ws.send(event))
+
+    def _handle(self, event):
+        from wsproto.events import CloseConnection, Ping, TextMessage
+
+        if isinstance(event, TextMessage):
+            self.text.append(event.data)
+            if event.message_finished:
+                self.messages.append(''.join(self.text))
+                self.text = []
+        elif isinstance(event, Ping):
+            self._write(event.response())
+        elif isinstance(event, CloseConnection):
+            self.messages.append(None)
+
+    def receive(self, timeout=None):
+        """Next Engine.IO packet, or None once the connection is closed"""
+        while not self.messages:
+            for event in self.ws.events():
+                self._handle(event)
+            if self.messages:
+                break
+            self.sock.settimeout(timeout)
+            data = self.sock.recv(65536)
+            if not data:
+                return None
+            self.ws.receive_data(data)
+        return self.messages.pop(0)
+
+    def send(self, packet):
+        from wsproto.events import Message
+
+        self._write(Message(data=packet))
+
+    def emit(self, event, data):
+        self.send('42' + json.dumps([event, data]))
+
+    def run(self):
+        """Answer pings and dispatch events until the connection drops"""
+        try:
+            while True:
+                packet = self.receive()
+                if packet is None:
+                    break
+                if packet == '2':
+                    self.send('3')
+                elif packet.startswith('42') and self.on_event is not None:
+                    event, *args = json.loads(packet[2:])
+                    self.on_event(event, args[0] if args else None)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.alive = False
+
+    def close(self):
+        if self.sock is None:
+            return
+        try:
+            self.sock.close()
+        except Exception:
+            pass
+
+
+def login_cookie(base_url):
+    import requests
+
+    session = requests.Session()
+    session.post(base_url + '/signup', data={'name': 'Bench', 'email': 'bench@example.com', 'password': 'password'})
+    response = session.post(base_url + '/login', data={'email': 'bench@example.com', 'password': 'password'},
+                            allow_redirects=False)
+    if response.status_code != 302:
+        raise RuntimeError(f"Login failed with status {response.status_code}")
+    return '; '.join(f'{name}={value}' for name, value in session.cookies.items())
+
+
+def open_sockets(base_url, cookie, count, room_prefix, room_size, first_index, on_event=None, concurrency=50):
+    """Connect and join count sockets, at most concurrency handshakes at a time"""
+    import gevent
+    from gevent.pool import Pool
+
+    clients, latencies, failures = [], [], []
+
+    def open_one(index):
+        client = SocketClient(base_url, cookie, on_event(index) if on_event else None)
+        start = time.perf_counter()
+        try:
+            client.connect()
+            client.emit('join', {'meeting_id': f'{room_prefix}{index // room_size}'})
+        except Exception as e:
+            failures.append(f'{type(e).__name__}: {e}')
+            client.close()
+            return
+        latencies.append(time.perf_counter() - start)
+        clients.append(client)
+        gevent.spawn(client.run)
+
+    pool = Pool(concurrency)
+    for index in range(first_index, first_index + count):
+        pool.spawn(open_one, index)
+    pool.join()
+    return clients, latencies, failures
+
+
+def run_active(active, duration, message_interval, video_fps, room_size, pending, echoes):
+    """Drive the active sockets for duration seconds; returns messages sent"""
+    import gevent
+
+    sent = {'chat': 0, 'video': 0}
+    deadline = time.perf_counter() + duration
+
+    def drive(index, client):
+        next_chat = time.perf_counter() + message_interval * (index % 10) / 10.0
+        next_video = time.perf_counter()
+        meeting_id = f'active{index // room_size}'
+        while client.alive and time.perf_counter() < deadline:
+            now = time.perf_counter()
+            if message_interval > 0 and now >= next_chat:
+                next_chat += message_interval
+                token = f'{index}:{now}'
+                pending[token] = now
+                client.emit('chat_message', {'meeting_id': meeting_id, 'message': token})
+                sent['chat'] += 1
+            if video_fps > 0 and now >= next_video:
+                next_video += 1.0 / video_fps
+                client.emit('video_stream', {'meeting_id': meeting_id, 'stream': 'x' * 2000})
+                sent['video'] += 1
+            wake = min(next_chat if message_interval > 0 else deadline, next_video if video_fps > 0 else deadline)
+            gevent.sleep(max(0.0, min(wake, deadline) - time.perf_counter()))
+
+    gevent.joinall([gevent.spawn(drive, index, client) for index, client in enumerate(active)])
+    # Let the last batched messages arrive
+    gevent.sleep(0.5)
+    return sent
+
+
+def bench_mode(mode, args, port):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.bench_sockets', '--serve', mode, '--port', str(port)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        pid = None
+        for line in server.stdout:
+            if line.startswith(RESULT_PREFIX):
+                pid = json.loads(line[len(RESULT_PREFIX):])['pid']
+                break
+        if pid is None:
+            raise RuntimeError(f"{mode} server exited before starting")
+        base_url = f'http://127.0.0.1:{port}'
+        import requests
+        # Start once the model has loaded and warmed up, so its CPU burst is not measured
+        deadline = time.monotonic() + 300
+        while True:
+            try:
+                if requests.get(base_url + '/ready', timeout=1).status_code == 200:
+                    break
+            except requests.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{mode} server did not become ready")
+            time.sleep(0.5)
+        cookie = login_cookie(base_url)
+        baseline = process_usage(pid)
+
+        pending, echoes = {}, []
+
+        def on_event(index):
+            def handle(event, data):
+                if event != 'new_message':
+                    return
+                for message in data:
+                    sent_at = pending.pop(message.get('message'), None)
+                    if sent_at is not None:
+                        echoes.append(time.perf_counter() - sent_at)
+            return handle
+
+        active, _, active_failures = open_sockets(base_url, cookie, args.active, 'active', args.room_size, 0,
+                                                  on_event=on_event)
+        idle, steps = [], []
+        failures_seen = list(active_failures)
+        for target in args.idle:
+            opened, connect_latencies, failures = open_sockets(
+                base_url, cookie, max(0, target - len(idle)), 'idle', args.room_size, len(idle)
+            )
+            idle.extend(opened)
+            failures_seen.extend(failures)
+            pending.clear()
+            echoes.clear()
+            sent = run_active(active, args.duration, args.message_interval, args.video_fps, args.room_size,
+                              pending, echoes)
+            steps.append({
+                'idle_target': target,
+                'idle_connected': len(idle),
+                'idle_alive': sum(client.alive for client in idle),
+                'connect_failures': len(failures),
+                'connect': summarize(connect_latencies),
+                'active_alive': sum(client.alive for client in active),
+                'chat_sent': sent['chat'],
+                'video_sent': sent['video'],
+                'chat_round_trip': summarize(echoes),
+                'chat_lost': len(pending),
+                'server': process_usage(pid)
+            })
+            if failures and len(opened) == 0:
+                break
+        for client in idle + active:
+            client.close()
+        return {
+            'active_sockets': args.active,
+            'active_connect_failures': len(active_failures),
+            'failure_reasons': dict(Counter(failures_seen).most_common(5)),
+            'server_baseline': baseline,
+            'steps': steps
+        }
+    finally:
+        server.kill()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default='threading,eventlet,gevent')
+    parser.add_argument('--idle', default='250,500,1000', help='Cumulative idle socket counts to step through')
+    parser.add_argument('--active', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds of active traffic per step')
+    parser.add_argument('--message-interval', type=float, default=1.0, help='Seconds between chat messages')
+    parser.add_argument('--video-fps', type=float, default=5.0)
+    parser.add_argument('--room-size', type=int, default=5)
+    parser.add_argument('--port', type=int, default=5090)
+    parser.add_argument('--output')
+    parser.add_argument('--serve', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    args.idle = [int(count) for count in args.idle.split(',')]
+    results = {
+        'idle_steps': args.idle,
+        'duration_s': args.duration,
+        'modes': {}
+    }
+    for offset, mode in enumerate(args.modes.split(',')):
+        results['modes'][mode] = bench_mode(mode, args, args.port + offset)
+    report('sockets', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Cold-start time and first-prediction latency of the gesture recognizer, with and without warm-up
+
+Each configuration runs in a fresh interpreter so TensorFlow import, model
+load and graph tracing are all measured cold. Runs against the random-weights
+stub model unless --model/--labels point at the real files.
+
+Usage:
+    python -m benchmarks.bench_startup [--predictions 20] [--batch-window-ms 0]
+        [--model path.h5 --labels encoder.pkl] [--output report.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import report, summarize
+from benchmarks.stub_model import write_stub_files
+
+RESULT_PREFIX = 'BENCH_RESULT '
+
+
+def child(warmup, predictions, batch_window_ms, model_path, label_path):
+    """Measure one cold start in this process and print the result on a tagged line"""
+    start = time.perf_counter()
+    import tensorflow  # noqa: F401
+    import_seconds = time.perf_counter() - start
+
+    from gesture_recognition import GestureRecognizer
+    recognizer = GestureRecognizer(model_path=model_path, label_path=label_path,
+                                   batch_window_ms=batch_window_ms)
+    load_seconds = time.perf_counter() - start - import_seconds
+
+    warmup_seconds = recognizer.warm_up() if warmup else 0.0
+    ready_seconds = time.perf_counter() - start
+
+    # Raw 64x64 RGB frames skip JPEG decoding so only the model path is timed
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (64, 64, 3), dtype=np.uint8).tobytes()
+              for _ in range(recognizer.sequence_length + predictions)]
+    for frame in frames[:recognizer.sequence_length - 1]:
+        recognizer.predict_detailed(frame, 'bench', 1, 'rgb')
+
+    latencies = []
+    for frame in frames[recognizer.sequence_length - 1:]:
+        started = time.perf_counter()
+        recognizer.predict_detailed(frame, 'bench', 1, 'rgb')
+        latencies.append(time.perf_counter() - started)
+
+    print(RESULT_PREFIX + json.dumps({
+        'tensorflow_import_s': import_seconds,
+        'model_load_s': load_seconds,
+        'warmup_s': warmup_seconds,
+        'ready_s': ready_seconds,
+        'first_prediction_ms': latencies[0] * 1000.0,
+        'steady_state': summarize(latencies[1:])
+    }), flush=True)
+
+
+def run_cold(warmup, predictions, batch_window_ms, model_path, label_path):
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_startup', '--child',
+         '--warmup', '1' if warmup else '0',
+         '--predictions', str(predictions), '--batch-window-ms', str(batch_window_ms),
+         '--model', model_path, '--labels', label_path],
+        capture_output=True, text=True, check=True
+    ).stdout
+    for line in output.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError("Benchmark child produced no result")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--predictions', type=int, default=20)
+    parser.add_argument('--batch-window-ms', type=float, default=0)
+    parser.add_argument('--model', help='Keras model (defaults to the random-weights stub)')
+    parser.add_argument('--labels', help='Label encoder matching --model')
+    parser.add_argument('--output')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--warmup', default='1', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.warmup == '1', args.predictions, args.batch_window_ms, args.model, args.labels)
+        return
+
+    # The stub is written once up front so its build is not part of any measured start
+    if args.model:
+        model_path, label_path = args.model, args.labels
+    else:
+        model_path, label_path = write_stub_files(os.path.join(tempfile.mkdtemp(prefix='signify-bench-'), 'models'))
+    results = {
+        'batch_window_ms': args.batch_window_ms,
+        'model': 'stub' if not args.model else model_path,
+        'cold': run_cold(False, args.predictions, args.batch_window_ms, model_path, label_path),
+        'warmed_up': run_cold(True, args.predictions, args.batch_window_ms, model_path, label_path)
+    }
+    report('startup', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
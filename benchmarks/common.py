@@ -0,0 +1,46 @@
+"""Shared helpers for the benchmark scripts: timing summaries and JSON reports"""
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+
+def summarize(latencies):
+    """Throughput-independent latency summary (milliseconds) of a list of seconds"""
+    if not latencies:
+        return {'count': 0}
+    ms = np.asarray(latencies, dtype=np.float64) * 1000.0
+    return {
+        'count': int(ms.size),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max())
+    }
+
+
+def timed(fn, *args, **kwargs):
+    """Call fn and return (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def report(name, results, output=None):
+    """Print a benchmark report as JSON and optionally write it to a file for later comparison"""
+    payload = {
+        'benchmark': name,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results
+    }
+    text = json.dumps(payload, indent=2)
+    print(text)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    return payload
@@ -0,0 +1,204 @@
+"""End-to-end load test: N meetings x M participants against an in-process server
+
+Every participant signs up, logs in through the Flask test client, opens a
+Socket.IO test client, joins its meeting and then, for the duration of the
+run, sends chat messages, video_stream frames and gesture frames at the
+configured rates. Handlers run in the participants' threads exactly as they
+would behind the threading server, with the random-weights stub model
+standing in for the real one, so the numbers cover the app's own code path.
+
+Usage:
+    python -m benchmarks.load_test [--meetings 4] [--participants 4] [--duration 20]
+        [--gesture-fps 2] [--chat-interval 5] [--video-fps 5]
+        [--gesture-endpoint binary|json|socket] [--output report.json]
+"""
+import argparse
+import base64
+import importlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from benchmarks.common import report, summarize
+from benchmarks.stub_model import write_stub_files
+
+
+class Recorder:
+    """Thread-safe per-operation latency and outcome log"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+
+    def record(self, operation, seconds, outcome='ok'):
+        with self._lock:
+            if outcome == 'ok':
+                self.latencies[operation].append(seconds)
+            self.outcomes[operation][outcome] += 1
+
+    def results(self, elapsed):
+        results = {}
+        for operation in sorted(self.outcomes):
+            latencies = self.latencies[operation]
+            result = summarize(latencies)
+            result['outcomes'] = dict(self.outcomes[operation])
+            result['throughput_per_second'] = len(latencies) / elapsed if elapsed else 0.0
+            results[operation] = result
+        return results
+
+
+def load_app(workdir, args):
+    """Import app.py against a scratch database and the stub model"""
+    model_path, label_path = write_stub_files(os.path.join(workdir, 'models'))
+    os.environ.setdefault('GESTURE_MODEL_PATH', model_path)
+    os.environ.setdefault('GESTURE_LABEL_PATH', label_path)
+    # Cheap hashes keep sign-up from dominating the run; login cost has its own benchmark
+    os.environ.setdefault('PASSWORD_HASH_ROUNDS', str(args.hash_rounds))
+    os.chdir(workdir)
+    return importlib.import_module('app')
+
+
+def participant(app_module, meeting_id, index, frames, args, recorder, stop, started):
+    app, socketio = app_module.app, app_module.socketio
+    http = app.test_client()
+    email = f'{meeting_id}-{index}@example.com'
+    http.post('/signup', data={'name': f'User {index}', 'email': email, 'password': 'password'})
+    http.post('/login', data={'email': email, 'password': 'password'})
+
+    socket = socketio.test_client(app, flask_test_client=http)
+    start = time.perf_counter()
+    socket.emit('join', {'meeting_id': meeting_id})
+    recorder.record('join', time.perf_counter() - start)
+    started.wait()
+
+    rng = random.Random(index)
+    now = time.perf_counter()
+    next_gesture = now + rng.random() / max(args.gesture_fps, 1e-9)
+    next_chat = now + rng.random() * args.chat_interval
+    next_video = now + rng.random() / max(args.video_fps, 1e-9)
+    frame_index = 0
+
+    while not stop.is_set():
+        now = time.perf_counter()
+        if args.gesture_fps > 0 and now >= next_gesture:
+            next_gesture += 1.0 / args.gesture_fps
+            frame = frames[frame_index % len(frames)]
+            frame_index += 1
+            start = time.perf_counter()
+            if args.gesture_endpoint == 'socket':
+                ack = socket.emit('gesture_frame', {'frame': frame, 'format': 'jpeg'}, callback=True)
+                outcome = 'ok' if ack and ack.get('success') else (
+                    'rate_limited' if ack and 'retry_after' in ack else 'dropped' if ack and ack.get('dropped')
+                    else 'error')
+            else:
+                if args.gesture_endpoint == 'json':
+                    response = http.post('/process_gesture', json={
+                        'frame': 'data:image/jpeg;base64,' + base64.b64encode(frame).decode(),
+                        'meeting_id': meeting_id
+                    })
+                else:
+                    response = http.post(f'/process_gesture_binary?meeting_id={meeting_id}', data=frame,
+                                         headers={'X-Frame-Format': 'jpeg'})
+                outcome = 'rate_limited' if response.status_code == 429 else (
+                    'ok' if response.get_json().get('success') else 'error')
+            recorder.record('gesture_frame', time.perf_counter() - start, outcome)
+
+        if args.chat_interval > 0 and now >= next_chat:
+            next_chat += args.chat_interval
+            start = time.perf_counter()
+            socket.emit('chat_message', {'meeting_id': meeting_id, 'message': f'hello from {index}'})
+            recorder.record('chat_message', time.perf_counter() - start)
+
+        if args.video_fps > 0 and now >= next_video:
+            next_video += 1.0 / args.video_fps
+            start = time.perf_counter()
+            socket.emit('video_stream', {'meeting_id': meeting_id, 'stream': 'x' * args.video_bytes})
+            recorder.record('video_stream', time.perf_counter() - start)
+
+        # Drain what the server pushed so the test client's queue stays small
+        socket.get_received()
+        wake = min(next_gesture if args.gesture_fps > 0 else float('inf'),
+                   next_chat if args.chat_interval > 0 else float('inf'),
+                   next_video if args.video_fps > 0 else float('inf'))
+        stop.wait(max(0.0, min(wake - time.perf_counter(), 0.05)))
+
+    socket.emit('leave', {'meeting_id': meeting_id})
+    socket.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--meetings', type=int, default=4)
+    parser.add_argument('--participants', type=int, default=4, help='Participants per meeting')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of steady traffic')
+    parser.add_argument('--gesture-fps', type=float, default=2.0, help='Gesture frames per participant per second')
+    parser.add_argument('--gesture-endpoint', choices=['binary', 'json', 'socket'], default='binary')
+    parser.add_argument('--chat-interval', type=float, default=5.0, help='Seconds between chat messages')
+    parser.add_argument('--video-fps', type=float, default=5.0)
+    parser.add_argument('--video-bytes', type=int, default=2000)
+    parser.add_argument('--hash-rounds', type=int, default=1000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+
+    sys.path.insert(0, os.getcwd())
+    workdir = tempfile.mkdtemp(prefix='signify-load-')
+    app_module = load_app(workdir, args)
+    if app_module.gesture_loader.get(timeout=300) is None:
+        raise RuntimeError(f"Gesture model failed to load: {app_module.gesture_loader.error}")
+
+    rng = np.random.default_rng(0)
+    frames = [cv2.imencode('.jpg', rng.integers(0, 256, (240, 320, 3), dtype=np.uint8))[1].tobytes()
+              for _ in range(16)]
+
+    recorder = Recorder()
+    stop = threading.Event()
+    started = threading.Event()
+    for meeting in range(args.meetings):
+        app_module.add_meeting(f'load{meeting}', 1)
+    threads = [
+        threading.Thread(target=participant, daemon=True,
+                         args=(app_module, f'load{meeting}', meeting * args.participants + index, frames, args,
+                               recorder, stop, started))
+        for meeting in range(args.meetings) for index in range(args.participants)
+    ]
+    for thread in threads:
+        thread.start()
+    # Give every participant time to sign up and join before the clock starts
+    while sum(recorder.outcomes['join'].values()) < len(threads) and any(t.is_alive() for t in threads):
+        time.sleep(0.05)
+
+    start = time.perf_counter()
+    started.set()
+    time.sleep(args.duration)
+    stop.set()
+    elapsed = time.perf_counter() - start
+    for thread in threads:
+        thread.join(timeout=30)
+
+    results = {
+        'meetings': args.meetings,
+        'participants_per_meeting': args.participants,
+        'duration_s': elapsed,
+        'gesture_endpoint': args.gesture_endpoint,
+        'operations': recorder.results(elapsed),
+        'server': {
+            'gesture': app_module.gesture_loader.get().stats(),
+            'admission': app_module.inference_admission.stats(),
+            'video_relay': app_module.video_relay.stats(),
+            'messages': app_module.message_batcher.stats()
+        }
+    }
+    report('load_test', results, output)
+
+
+if __name__ == '__main__':
+    main()
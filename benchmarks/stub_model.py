@@ -0,0 +1,65 @@
+"""Random-weights stand-in for the gesture model, so benchmarks run without the real .h5
+
+The stub has the same (30, 64, 64, 3) input and 4-class softmax output as the
+real model and the same TimeDistributed-then-recurrent layout, so every
+inference path (streaming split, TFLite/ONNX conversion, tf.function) works
+on it. Its predictions are meaningless; only the cost of computing them is.
+
+Usage:
+    python -m benchmarks.stub_model --output-dir /tmp/stub_models
+"""
+import argparse
+import os
+import pickle
+
+SEQUENCE_LENGTH = 30
+IMG_SIZE = (64, 64)
+MODEL_FILENAME = 'stub_gesture_model.h5'
+LABEL_FILENAME = 'stub_label_encoder.pkl'
+
+
+def build_stub_model(seed=0, filters=16, units=64):
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(seed)
+    layers = tf.keras.layers
+    model = tf.keras.Sequential([
+        layers.InputLayer(input_shape=(SEQUENCE_LENGTH,) + IMG_SIZE + (3,)),
+        layers.TimeDistributed(layers.Conv2D(filters, 3, strides=2, activation='relu')),
+        layers.TimeDistributed(layers.MaxPooling2D(2)),
+        layers.TimeDistributed(layers.Conv2D(filters * 2, 3, activation='relu')),
+        layers.TimeDistributed(layers.GlobalAveragePooling2D()),
+        layers.LSTM(units),
+        layers.Dense(4, activation='softmax')
+    ])
+    return model
+
+
+def write_stub_files(directory, seed=0):
+    """Write the stub model and a matching label encoder; returns (model_path, label_path)"""
+    from sklearn.preprocessing import LabelEncoder
+
+    from gesture_recognition import SENTENCES
+
+    os.makedirs(directory, exist_ok=True)
+    model_path = os.path.join(directory, MODEL_FILENAME)
+    label_path = os.path.join(directory, LABEL_FILENAME)
+    if not os.path.exists(model_path):
+        build_stub_model(seed).save(model_path)
+    if not os.path.exists(label_path):
+        with open(label_path, 'wb') as f:
+            pickle.dump(LabelEncoder().fit(SENTENCES), f)
+    return model_path, label_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output-dir', default='benchmark_models')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    model_path, label_path = write_stub_files(args.output_dir, args.seed)
+    print(f"Wrote {model_path} and {label_path}")
+
+
+if __name__ == '__main__':
+    main()
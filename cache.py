@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+REQUESTS_TOTAL = metrics.counter('signify_cache_requests_total', 'Cache lookups by cache and result',
+                                 ('cache', 'result'))
+
+# Returned by TTLCache.get() when the key is absent or expired
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after ttl seconds
+
+    Holds at most maxsize entries; inserting into a full cache evicts the
+    least recently used one. Each entry can carry its own ttl. With
+    enabled=False every lookup misses and nothing is stored, which keeps
+    callers on the uncached path without changing their code.
+    """
+
+    def __init__(self, name, maxsize=10000, ttl=300, enabled=True):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._hit_counter = REQUESTS_TOTAL.labels(name, 'hit')
+        self._miss_counter = REQUESTS_TOTAL.labels(name, 'miss')
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, now=None):
+        """The cached value, or MISSING"""
+        if not self.enabled:
+            return MISSING
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[0]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                value = MISSING
+        (self._miss_counter if value is MISSING else self._hit_counter).inc()
+        return value
+
+    def set(self, key, value, ttl=None, now=None):
+        if not self.enabled:
+            return
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._entries[key] = (value, now + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,86 @@
+import contextvars
+import threading
+
+# Server concurrency models: one OS thread per connection, or green threads on one event loop
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+# Monkey-patching used for the green modes. Sockets, select and time.sleep
+# become cooperative, but threading, queue, os and subprocess are left alone:
+# the batch scheduler, transcript writer, model loader and executors keep
+# running on real OS threads (where green waitpid/read calls would fail), and
+# offload() hands blocking calls over to them.
+EVENTLET_PATCH = {'thread': False, 'os': False, 'subprocess': False}
+GEVENT_PATCH = {'thread': False, 'queue': False, 'Event': False, 'os': False, 'subprocess': False,
+                'signal': False}
+
+
+def _call(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+_mode = 'threading'
+_hub_thread = None
+_offload = _call
+_offload_threads = 0
+
+
+def setup(mode='threading', offload_threads=20):
+    """Patch the standard library for mode and size the offload thread pool
+
+    Must run before anything else imports socket or time, i.e. first thing in
+    the entry point. Patching is skipped when it has already been done (e.g.
+    by a gunicorn worker).
+    """
+    global _mode, _hub_thread, _offload, _offload_threads
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"Unknown server async mode {mode!r}, expected one of {', '.join(ASYNC_MODES)}")
+
+    if mode == 'eventlet':
+        import eventlet
+        from eventlet import tpool
+
+        if not eventlet.patcher.is_monkey_patched('socket'):
+            eventlet.monkey_patch(**EVENTLET_PATCH)
+        tpool.set_num_threads(offload_threads)
+        _offload = tpool.execute
+    elif mode == 'gevent':
+        import gevent
+        from gevent import monkey
+
+        if not monkey.is_module_patched('socket'):
+            monkey.patch_all(**GEVENT_PATCH)
+        threadpool = gevent.get_hub().threadpool
+        threadpool.maxsize = offload_threads
+        _offload = lambda fn, *args, **kwargs: threadpool.apply(fn, args, kwargs)
+    else:
+        _offload = _call
+        offload_threads = 0
+
+    _mode = mode
+    _offload_threads = offload_threads
+    _hub_thread = threading.get_ident()
+    return mode
+
+
+def offload(fn, *args, **kwargs):
+    """Run a blocking call (model inference, PBKDF2, SQLite) without stalling the event loop
+
+    In the green modes the call runs on a real OS thread from the hub's pool
+    and only the calling green thread waits for it. In threading mode, or
+    when already off the event loop thread, it is called directly. The
+    caller's context variables (e.g. the log context) go along.
+    """
+    if _offload is _call or threading.get_ident() != _hub_thread:
+        return fn(*args, **kwargs)
+    return _offload(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def mode():
+    return _mode
+
+
+def stats():
+    return {
+        'async_mode': _mode,
+        'offload_threads': _offload_threads
+    }
@@ -0,0 +1,77 @@
+"""Convert the Keras gesture model for the TFLite or ONNX inference backends
+
+Usage:
+    python convert_model.py --backend tflite --quantization float16
+    python convert_model.py --backend tflite --quantization dynamic --check
+    python convert_model.py --backend onnx --check
+"""
+import argparse
+import json
+
+import tensorflow as tf
+
+from inference_backends import (DEFAULT_MODEL_PATH, KerasBackend, check_parity, converted_model_path,
+                                load_backend, load_keras_model)
+
+
+def convert_tflite(model, output_path, quantization='float16'):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    # 'dynamic' keeps the default optimization: int8 weights, float activations
+    try:
+        tflite_model = converter.convert()
+    except Exception as e:
+        # Recurrent layers sometimes need TF ops the builtin set does not cover
+        print(f"Builtin-only conversion failed ({str(e)}), retrying with select TF ops")
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+            tf.lite.OpsSet.SELECT_TF_OPS
+        ]
+        converter._experimental_lower_tensor_list_ops = False
+        tflite_model = converter.convert()
+
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+
+def convert_onnx(model, output_path, opset=13):
+    try:
+        import tf2onnx
+    except ImportError:
+        raise ImportError("ONNX conversion needs tf2onnx: pip install -r requirements-onnx.txt") from None
+
+    signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name='frames')]
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=opset, output_path=output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='Path of the Keras .h5 model')
+    parser.add_argument('--backend', choices=['tflite', 'onnx'], required=True)
+    parser.add_argument('--quantization', choices=['float16', 'dynamic'], default='float16',
+                        help='TFLite weight quantization')
+    parser.add_argument('--output', help='Output path (defaults to next to the Keras model)')
+    parser.add_argument('--check', action='store_true', help='Compare outputs against the Keras model')
+    parser.add_argument('--samples', type=int, default=16, help='Sample sequences used by --check')
+    args = parser.parse_args()
+
+    quantization = args.quantization if args.backend == 'tflite' else None
+    output_path = args.output or converted_model_path(args.model, args.backend, quantization)
+
+    model = load_keras_model(args.model)
+    if args.backend == 'tflite':
+        convert_tflite(model, output_path, quantization)
+    else:
+        convert_onnx(model, output_path)
+    print(f"Wrote {output_path}")
+
+    if args.check:
+        reference = KerasBackend(args.model)
+        candidate = load_backend(args.backend, args.model, converted_path=output_path)
+        print(json.dumps(check_parity(reference, candidate, count=args.samples), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,133 +1,374 @@
 import sqlite3
-import hashlib
-import os
+import queue
+import threading
+import time
+import functools
+from contextlib import contextmanager
+import password_hashing
+import metrics
+from cache import TTLCache, MISSING
 
 DB_PATH = 'signify.db'
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+# Per-connection tuning: WAL lets readers run alongside the writer
+STATEMENT_CACHE_SIZE = 128
+MMAP_SIZE = 64 * 1024 * 1024
+BUSY_TIMEOUT_MS = 5000
+
+# Connections shared by all threads, at most POOL_SIZE per database path
+POOL_SIZE = 16
+
+# Meetings never change once created, so found rows are cached. Misses are not:
+# another worker may create the meeting at any moment.
+meeting_cache = TTLCache('meetings', maxsize=10000, ttl=300)
+
+def configure_meeting_cache(**kwargs):
+    """Replace the meeting cache, e.g. with a different size or ttl, or enabled=False"""
+    global meeting_cache
+    meeting_cache = TTLCache('meetings', **kwargs)
+    return meeting_cache
+
+QUERY_SECONDS = metrics.histogram('signify_db_query_seconds', 'Latency of database.py functions', ('function',))
+
+def timed(fn):
+    """Record each call's latency in QUERY_SECONDS under the function's name"""
+    child = QUERY_SECONDS.labels(fn.__name__)
+    
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            child.observe(time.perf_counter() - start)
+    return wrapper
+
+def query_timer(label):
+    """Time one SQL section under QUERY_SECONDS, for functions that also hash passwords
+
+    Hashing has its own histogram (signify_password_hash_seconds), so it is
+    kept out of the query latency.
+    """
+    return QUERY_SECONDS.labels(label).time()
+
+def _connect(path):
+    # Pooled connections move between threads, but only one uses a connection at a time
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=STATEMENT_CACHE_SIZE,
+                           check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
     return conn
 
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by every thread
+
+    A connection is checked out for one query or transaction and returned
+    right after, so short-lived threads (the threading server starts one per
+    request) reuse already-tuned connections instead of each opening its own.
+    At most size connections are open; a caller beyond that waits up to
+    timeout seconds for one to come back.
+    """
+
+    def __init__(self, path, size=POOL_SIZE, timeout=BUSY_TIMEOUT_MS / 1000):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()  # Most recently used first, so a few stay warm
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.checkouts = 0
+        self.waits = 0
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self.opened < self.size
+                if can_open:
+                    self.opened += 1
+                else:
+                    self.waits += 1
+            if can_open:
+                try:
+                    conn = _connect(self.path)
+                except Exception:
+                    with self._lock:
+                        self.opened -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(
+                        f"No database connection became free within {self.timeout}s") from None
+        with self._lock:
+            self.checkouts += 1
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close the idle connections; checked-out ones are unaffected"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self._lock:
+                self.opened -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self.opened,
+                'idle': self._idle.qsize(),
+                'checkouts': self.checkouts,
+                'waits': self.waits
+            }
+
+_pools = {}  # database path -> ConnectionPool
+_pools_lock = threading.Lock()
+
+def _pool():
+    pool = _pools.get(DB_PATH)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(DB_PATH)
+            if pool is None:
+                pool = _pools[DB_PATH] = ConnectionPool(DB_PATH, POOL_SIZE)
+    return pool
+
+def connection():
+    """Check out a pooled connection for DB_PATH: with connection() as conn: ..."""
+    return _pool().connection()
+
+def configure_pool(size=POOL_SIZE):
+    """Set the pool size; pools opened before are closed and replaced on next use"""
+    global POOL_SIZE
+    POOL_SIZE = size
+    close_db_connection()
+
+def close_db_connection():
+    """Close every pool's idle connections"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+def pool_stats():
+    pool = _pools.get(DB_PATH)
+    return pool.stats() if pool is not None else None
+
 def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with connection() as conn:
+        cursor = conn.cursor()
     
-    # Create users table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL
-    )
-    ''')
+        # Create users table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+        ''')
     
-    # Create meetings table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS meetings (
-        id TEXT PRIMARY KEY,
-        host_id INTEGER NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (host_id) REFERENCES users (id)
-    )
-    ''')
+        # Create meetings table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS meetings (
+            id TEXT PRIMARY KEY,
+            host_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (host_id) REFERENCES users (id)
+        )
+        ''')
     
-    conn.commit()
-    conn.close()
+        # Create messages table (meeting transcripts)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            meeting_id TEXT NOT NULL,
+            user_id INTEGER,
+            username TEXT,
+            type TEXT NOT NULL,
+            message TEXT NOT NULL,
+            ts REAL NOT NULL
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_meeting_ts ON messages (meeting_id, ts)')
+    
+        # Who has joined each meeting, for transcript access
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS meeting_participants (
+            meeting_id TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (meeting_id, user_id)
+        )
+        ''')
+    
+        conn.commit()
 
 def hash_password(password):
-    # Simple password hashing
-    salt = os.urandom(32)
-    key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100000)
-    return salt.hex() + ':' + key.hex()
+    # PBKDF2 on the dedicated hashing executor, never on the request thread
+    return password_hashing.password_hasher.hash(password)
 
 def verify_password(stored_password, provided_password):
-    salt_hex, key_hex = stored_password.split(':')
-    salt = bytes.fromhex(salt_hex)
-    stored_key = bytes.fromhex(key_hex)
-    new_key = hashlib.pbkdf2_hmac('sha256', provided_password.encode('utf-8'), salt, 100000)
-    return new_key == stored_key
+    matches, _ = password_hashing.password_hasher.verify(stored_password, provided_password)
+    return matches
 
 def add_user(name, email, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Check if user already exists
-    cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
-    if cursor.fetchone() is not None:
-        conn.close()
-        return False
+    # A taken email must not cost a hashing slot and a full PBKDF2 run
+    with query_timer('add_user_check'), connection() as conn:
+        if conn.execute('SELECT 1 FROM users WHERE email = ?', (email,)).fetchone() is not None:
+            return False
     
+    # Hash without holding a connection, so the slow part holds none
     hashed_password = hash_password(password)
     
-    # Add user to database
-    cursor.execute('INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
-                  (name, email, hashed_password))
-    
-    conn.commit()
-    conn.close()
-    return True
+    # Add user to database unless the email was taken meanwhile
+    with query_timer('add_user'), connection() as conn, conn:
+        cursor = conn.execute(
+            'INSERT INTO users (name, email, password) VALUES (?, ?, ?) ON CONFLICT(email) DO NOTHING',
+            (name, email, hashed_password)
+        )
+    return cursor.rowcount == 1
 
 def verify_user(email, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
-    user = cursor.fetchone()
-    
+    with query_timer('verify_user'), connection() as conn:
+        user = conn.execute('SELECT id, password FROM users WHERE email = ?', (email,)).fetchone()
     if user is None:
-        conn.close()
         return False
     
-    stored_password = user['password']
-    conn.close()
+    matches, needs_rehash = password_hashing.password_hasher.verify(user['password'], password)
+    
+    # Transparently upgrade hashes stored with an older cost or format. Best effort:
+    # the verify already held a hashing slot, so only take a free one right away,
+    # and leave the upgrade to a later login when hashing is busy.
+    if needs_rehash:
+        try:
+            new_hash = password_hashing.password_hasher.hash(password, timeout=0)
+        except password_hashing.HashingBusyError:
+            return matches
+        with query_timer('verify_user_rehash'), connection() as conn, conn:
+            conn.execute('UPDATE users SET password = ? WHERE id = ?', (new_hash, user['id']))
     
-    return verify_password(stored_password, password)
+    return matches
 
+@timed
 def get_user(email):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT id, name, email FROM users WHERE email = ?', (email,))
-    user = cursor.fetchone()
-    
-    conn.close()
+    with connection() as conn:
+        user = conn.execute('SELECT id, name, email FROM users WHERE email = ?', (email,)).fetchone()
     return dict(user) if user else None
 
+@timed
 def add_meeting(meeting_id, host_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Check if meeting already exists
-    cursor.execute('SELECT * FROM meetings WHERE id = ?', (meeting_id,))
-    if cursor.fetchone() is not None:
-        conn.close()
-        return False
-    
-    cursor.execute('INSERT INTO meetings (id, host_id) VALUES (?, ?)',
-                  (meeting_id, host_id))
-    
-    conn.commit()
-    conn.close()
-    return True
+    with connection() as conn, conn:
+        cursor = conn.execute(
+            'INSERT INTO meetings (id, host_id) VALUES (?, ?) ON CONFLICT(id) DO NOTHING',
+            (meeting_id, host_id)
+        )
+    meeting_cache.invalidate(meeting_id)
+    return cursor.rowcount == 1
 
+@timed
 def get_meeting(meeting_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    meeting = meeting_cache.get(meeting_id)
+    if meeting is not MISSING:
+        return dict(meeting)
     
-    cursor.execute('SELECT * FROM meetings WHERE id = ?', (meeting_id,))
-    meeting = cursor.fetchone()
-    
-    conn.close()
-    return dict(meeting) if meeting else None
+    with connection() as conn:
+        meeting = conn.execute('SELECT * FROM meetings WHERE id = ?', (meeting_id,)).fetchone()
+    if meeting is None:
+        return None
+    meeting = dict(meeting)
+    meeting_cache.set(meeting_id, meeting)
+    return dict(meeting)
 
+@timed
 def meeting_exists(meeting_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT COUNT(*) as count FROM meetings WHERE id = ?', (meeting_id,))
-    result = cursor.fetchone()
+    if meeting_cache.get(meeting_id) is not MISSING:
+        return True
     
-    conn.close()
+    with connection() as conn:
+        result = conn.execute('SELECT COUNT(*) as count FROM meetings WHERE id = ?', (meeting_id,)).fetchone()
     return result['count'] > 0
+
+@timed
+def add_participant(meeting_id, user_id):
+    """Record that user_id joined the meeting; joining again is a no-op"""
+    with connection() as conn, conn:
+        conn.execute('INSERT INTO meeting_participants (meeting_id, user_id) VALUES (?, ?) '
+                     'ON CONFLICT(meeting_id, user_id) DO NOTHING', (meeting_id, user_id))
+
+@timed
+def is_participant(meeting_id, user_id):
+    with connection() as conn:
+        row = conn.execute('SELECT 1 FROM meeting_participants WHERE meeting_id = ? AND user_id = ?',
+                           (meeting_id, user_id)).fetchone()
+    return row is not None
+
+@timed
+def add_messages(messages):
+    """Insert a batch of (meeting_id, user_id, username, type, message, ts) rows in one transaction"""
+    with connection() as conn, conn:
+        conn.executemany(
+            'INSERT INTO messages (meeting_id, user_id, username, type, message, ts) VALUES (?, ?, ?, ?, ?, ?)',
+            messages
+        )
+
+def iter_messages(meeting_id, after_ts=None, after_id=None, limit=None, page_size=500):
+    """Yield a meeting's messages in (ts, id) order, one keyset page at a time
+    
+    Only page_size rows are held at once, and each page is its own short query,
+    so a long transcript never pins a read transaction or the whole meeting in
+    memory. Pass the ts and id of the last row seen to resume after it. A
+    pooled connection is only held while a page is fetched, never while the
+    caller consumes it.
+    """
+    remaining = limit
+    page_seconds = QUERY_SECONDS.labels('iter_messages')
+    
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        start = time.perf_counter()
+        with connection() as conn:
+            if after_ts is None:
+                rows = conn.execute(
+                    'SELECT id, user_id, username, type, message, ts FROM messages '
+                    'WHERE meeting_id = ? ORDER BY ts, id LIMIT ?',
+                    (meeting_id, size)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    'SELECT id, user_id, username, type, message, ts FROM messages '
+                    'WHERE meeting_id = ? AND ts >= ? AND (ts > ? OR id > ?) ORDER BY ts, id LIMIT ?',
+                    (meeting_id, after_ts, after_ts, after_id if after_id is not None else -1, size)
+                ).fetchall()
+        # Timed per page: the generator's own lifetime depends on how fast the client reads
+        page_seconds.observe(time.perf_counter() - start)
+        
+        for row in rows:
+            yield dict(row)
+        if len(rows) < size:
+            return
+        after_ts, after_id = rows[-1]['ts'], rows[-1]['id']
+        if remaining is not None:
+            remaining -= len(rows)
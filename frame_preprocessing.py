@@ -0,0 +1,124 @@
+import base64
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import metrics
+
+# Start-of-frame markers that carry the image dimensions (excludes DHT, JPG and DAC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Reduced-size decode flags, largest reduction first
+REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2)
+]
+
+# Per-thread uint8 resize target, reused across frames
+_scratch = threading.local()
+
+# Time spent in each step of turning a request into a model input
+STAGE_SECONDS = metrics.histogram('signify_gesture_stage_seconds', 'Time per gesture frame processing stage',
+                                  ('stage',))
+BASE64_DECODE_SECONDS = STAGE_SECONDS.labels('base64_decode')
+IMAGE_DECODE_SECONDS = STAGE_SECONDS.labels('image_decode')
+RESIZE_SECONDS = STAGE_SECONDS.labels('resize')
+
+
+def jpeg_size(data):
+    """Read (width, height) from a JPEG header without decoding it, or None if not a JPEG"""
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # Fill byte
+            i += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+
+def is_encoded_image(data):
+    """True if data starts with a JPEG, WebP or PNG signature"""
+    head = bytes(data[:12])
+    return (head[:3] == b'\xff\xd8\xff'
+            or (head[:4] == b'RIFF' and head[8:12] == b'WEBP')
+            or head[:8] == b'\x89PNG\r\n\x1a\n')
+
+
+def decode_frame_bytes(data, img_size, frame_format=None):
+    """Decode a binary frame: JPEG/WebP bytes, or raw RGB pixels already at the model size
+
+    Without an explicit frame_format a body is only taken as raw RGB when it is
+    exactly width * height * 3 bytes and does not start with an image signature,
+    so a compressed frame that happens to have that length still gets decoded.
+    """
+    # Zero-copy view over the request body
+    np_arr = np.frombuffer(data, np.uint8)
+
+    width, height = img_size
+    if frame_format == 'rgb' or (frame_format is None and np_arr.size == width * height * 3
+                                 and not is_encoded_image(data)):
+        # Client-downscaled pixels; flip to BGR like cv2.imdecode output
+        return np_arr.reshape(height, width, 3)[:, :, ::-1]
+
+    # Let libjpeg scale down while decoding when the source is much larger than needed
+    flags = cv2.IMREAD_COLOR
+    size = jpeg_size(data)
+    if size is not None:
+        for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+            if size[0] // factor >= width and size[1] // factor >= height:
+                flags = reduced_flag
+                break
+    return cv2.imdecode(np_arr, flags)
+
+
+def decode_frame(frame_data, img_size, frame_format=None):
+    """Decode a base64 data URL or binary frame into a BGR uint8 image"""
+    if isinstance(frame_data, (bytes, bytearray, memoryview)):
+        with IMAGE_DECODE_SECONDS.time():
+            return decode_frame_bytes(frame_data, img_size, frame_format)
+
+    # Decode base64 string to image
+    with BASE64_DECODE_SECONDS.time():
+        img_bytes = base64.b64decode(frame_data.split(',')[1])
+    np_arr = np.frombuffer(img_bytes, np.uint8)
+    with IMAGE_DECODE_SECONDS.time():
+        return cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+
+
+def _resize_scratch(img_size):
+    width, height = img_size
+    scratch = getattr(_scratch, 'frame', None)
+    if scratch is None or scratch.shape != (height, width, 3):
+        scratch = np.empty((height, width, 3), dtype=np.uint8)
+        _scratch.frame = scratch
+    return scratch
+
+
+def resize_normalize(frame, img_size, out=None):
+    """Resize a BGR uint8 image to img_size and scale it to [0, 1] float32, writing into out"""
+    start = time.perf_counter()
+    width, height = img_size
+    if out is None:
+        out = np.empty((height, width, 3), dtype=np.float32)
+
+    if frame.shape[:2] == (height, width):
+        resized = frame
+    else:
+        resized = cv2.resize(frame, img_size, dst=_resize_scratch(img_size))
+
+    # uint8 -> float32 conversion and normalization in one pass, straight into the destination
+    np.divide(resized, np.float32(255.0), out=out)
+    RESIZE_SECONDS.observe(time.perf_counter() - start)
+    return out
@@ -0,0 +1,127 @@
+import threading
+
+# Placeholder gestures that never count as a recognized sentence
+NON_SENTENCES = {None, "Collecting frames...", "Error", "Error processing frame"}
+
+
+class GestureStream:
+    """Per-connection state of a client streaming frames over Socket.IO"""
+
+    def __init__(self, meeting_id, user_id, username):
+        self.meeting_id = meeting_id
+        self.user_id = user_id
+        self.username = username
+        self.busy = False  # A frame from this connection is being processed
+        self.frames = 0
+        self.dropped = 0
+        self.recognized = 0
+
+
+class GestureChannel:
+    """Runs streamed frames through the recognizer and pushes recognized sentences to the room
+
+    Each connection is bound to its meeting and user once, on join, so a
+    frame is just bytes over the open socket. A connection gets at most one
+    frame in flight; frames arriving while it is busy are dropped rather
+    than queued. Every ack carries the current load and the frame interval
+    the client should use, which grows from min_interval_ms to
+    max_interval_ms as concurrent frames approach capacity. With an
+    admission controller, frames over the caller's rate limit or beyond the
+    inference cap raise RateLimitedError. offload(fn, *args), if given, runs
+    each prediction, e.g. on a real thread under a green-thread server.
+    """
+
+    def __init__(self, on_recognized, confidence_threshold=0.5, capacity=16, min_interval_ms=200,
+                 max_interval_ms=1000, admission=None, offload=None):
+        self.on_recognized = on_recognized
+        self.admission = admission
+        self.offload = offload
+        self.confidence_threshold = confidence_threshold
+        self.capacity = max(1, capacity)
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self._lock = threading.Lock()
+        self._streams = {}  # sid -> GestureStream
+        self.inflight = 0
+        self.frames = 0
+        self.dropped = 0
+        self.recognized = 0
+
+    def open(self, sid, meeting_id, user_id, username):
+        with self._lock:
+            stream = self._streams[sid] = GestureStream(meeting_id, user_id, username)
+        return stream
+
+    def close(self, sid):
+        with self._lock:
+            return self._streams.pop(sid, None)
+
+    def load(self):
+        """Fraction of capacity taken by frames being processed right now"""
+        return min(1.0, self.inflight / self.capacity)
+
+    def load_info(self):
+        load = self.load()
+        interval = self.min_interval_ms + (self.max_interval_ms - self.min_interval_ms) * load
+        return {'load': load, 'interval_ms': int(interval)}
+
+    def recognized_sentence(self, result):
+        """The sentence to push for one prediction, if any"""
+        if 'committed' in result:
+            # The smoothing decoder already thresholds and de-duplicates
+            return result['committed']
+        if result.get('gesture') in NON_SENTENCES or result['confidence'] < self.confidence_threshold:
+            return None
+        return result['gesture']
+
+    def handle_frame(self, sid, recognizer, frame_data, frame_format=None):
+        """Process one streamed frame; returns the ack payload for the client"""
+        with self._lock:
+            stream = self._streams.get(sid)
+            if stream is None:
+                return {'success': False, 'error': 'Join the meeting before streaming frames'}
+            if stream.busy:
+                stream.dropped += 1
+                self.dropped += 1
+                return {'success': False, 'dropped': True, **self.load_info()}
+            stream.busy = True
+            stream.frames += 1
+            self.frames += 1
+            self.inflight += 1
+
+        predict = recognizer.predict_detailed
+        args = (frame_data, stream.meeting_id, stream.user_id, frame_format)
+        try:
+            if self.admission is not None:
+                with self.admission.admit(stream.user_id, stream.meeting_id):
+                    result = self.offload(predict, *args) if self.offload else predict(*args)
+            else:
+                result = self.offload(predict, *args) if self.offload else predict(*args)
+        finally:
+            with self._lock:
+                stream.busy = False
+                self.inflight -= 1
+
+        sentence = self.recognized_sentence(result)
+        if sentence:
+            with self._lock:
+                stream.recognized += 1
+                self.recognized += 1
+            self.on_recognized(stream.meeting_id, stream.user_id, stream.username, sentence)
+
+        result['success'] = True
+        result['recognized'] = sentence
+        result.update(self.load_info())
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'streams': len(self._streams),
+                'inflight': self.inflight,
+                'capacity': self.capacity,
+                'frames': self.frames,
+                'dropped': self.dropped,
+                'recognized': self.recognized,
+                **self.load_info()
+            }
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import numpy as np
+
+
+class DecoderState:
+    """Smoothing state of one signer's stream of window predictions"""
+
+    def __init__(self):
+        self.smoothed = None  # EMA of the class probabilities
+        self.candidate = None  # Class currently above the commit threshold
+        self.stable_steps = 0  # Consecutive steps the candidate has stayed on top
+        self.run_committed = False  # Whether the candidate's current run was already committed
+        self.last_commit = None  # (class index, monotonic time) of the last committed sentence
+
+
+class GestureDecoder:
+    """Commits sentences from overlapping window predictions without waiting for a fresh window
+
+    Each inference step folds the window's class probabilities into an
+    exponential moving average. A sentence is committed as soon as the same
+    class has led the smoothed distribution with at least commit_threshold
+    for stable_steps consecutive steps. A run is committed at most once, and
+    a new run of the same sentence within refractory seconds of its last
+    commit is treated as flicker and suppressed. Unlike the threshold-and-clear
+    rule, the frame buffer is kept, so the next sign is decoded from the
+    windows that overlap it instead of from an empty buffer.
+    """
+
+    def __init__(self, alpha=0.5, commit_threshold=0.6, stable_steps=3, refractory=2.0):
+        self.alpha = alpha
+        self.commit_threshold = commit_threshold
+        self.stable_steps = stable_steps
+        self.refractory = refractory
+        self._lock = threading.Lock()
+        self.steps = 0
+        self.commits = 0
+        self.suppressed = 0
+
+    def update(self, state, probabilities, now=None):
+        """Fold one window's probabilities into state; returns (class index or None, smoothed confidence)"""
+        now = time.monotonic() if now is None else now
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        if state.smoothed is None:
+            state.smoothed = probabilities.copy()
+        else:
+            state.smoothed *= 1.0 - self.alpha
+            state.smoothed += self.alpha * probabilities
+
+        top = int(np.argmax(state.smoothed))
+        confidence = float(state.smoothed[top])
+        if confidence < self.commit_threshold:
+            state.candidate, state.stable_steps, state.run_committed = None, 0, False
+        elif top == state.candidate:
+            state.stable_steps += 1
+        else:
+            state.candidate, state.stable_steps, state.run_committed = top, 1, False
+
+        committed = None
+        suppressed = False
+        if state.stable_steps >= self.stable_steps and not state.run_committed:
+            state.run_committed = True
+            last = state.last_commit
+            if last is not None and last[0] == top and now - last[1] < self.refractory:
+                suppressed = True
+            else:
+                committed = top
+                state.last_commit = (top, now)
+
+        with self._lock:
+            self.steps += 1
+            self.commits += committed is not None
+            self.suppressed += suppressed
+        return committed, confidence
+
+    def stats(self):
+        with self._lock:
+            return {
+                'alpha': self.alpha,
+                'commit_threshold': self.commit_threshold,
+                'stable_steps': self.stable_steps,
+                'refractory': self.refractory,
+                'steps': self.steps,
+                'commits': self.commits,
+                'suppressed': self.suppressed
+            }
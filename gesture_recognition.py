@@ -1,159 +1,356 @@
-import tensorflow as tf
 import numpy as np
 import pickle
-import cv2
-import base64
-import json
-import os
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from tensorflow.keras.layers import InputLayer, Masking
-from tensorflow.keras.mixed_precision import Policy
+import logging
+import time
+from inference_backends import DEFAULT_MODEL_PATH, load_backend, warm_up
+from session_store import SessionStore
+from inference_scheduler import BatchScheduler
+from streaming_inference import split_model, check_equivalence
+from frame_preprocessing import decode_frame, resize_normalize, STAGE_SECONDS
+from inference_service import InferenceWorkerPool
+from motion_gate import MotionGate
+from gesture_decoder import DecoderState, GestureDecoder
+import logs
+import metrics
 
-class CustomInputLayer(InputLayer):
-    def __init__(self, **kwargs):
-        if 'batch_shape' in kwargs:
-            kwargs['input_shape'] = kwargs.pop('batch_shape')[1:]
-        super().__init__(**kwargs)
+logger = logging.getLogger(__name__)
+
+# The possible sentences, in the model's class order
+SENTENCES = [
+    "we all are with you",
+    "you are welcome",
+    "where are you from",
+    "i really appreciate it"
+]
+
+# Minimum confidence for a prediction to count as a recognized gesture
+CONFIDENCE_THRESHOLD = 0.5
+
+FRAMES_TOTAL = metrics.counter('signify_gesture_frames_total', 'Frames received for gesture recognition',
+                               ('format',))
+FRAME_ERRORS_TOTAL = metrics.counter('signify_gesture_frame_errors_total',
+                                     'Frames that could not be decoded or predicted', ('stage',))
+INFERENCES_TOTAL = metrics.counter('signify_gesture_inferences_total', 'Gesture model predictions run')
+INFERENCES_SKIPPED_TOTAL = metrics.counter('signify_gesture_inferences_skipped_total',
+                                           'Full frame windows not sent to the model', ('reason',))
+LOW_CONFIDENCE_TOTAL = metrics.counter('signify_gesture_low_confidence_total',
+                                       'Predictions dropped for confidence below the confidence threshold')
+PREDICT_SECONDS = metrics.histogram('signify_gesture_predict_seconds', 'Latency of one predict_detailed() call')
+BUFFER_SECONDS = STAGE_SECONDS.labels('buffer')
+EMBED_SECONDS = STAGE_SECONDS.labels('embed')
+MOTION_GATE_SECONDS = STAGE_SECONDS.labels('motion_gate')
+INFERENCE_SECONDS = STAGE_SECONDS.labels('inference')
+
+def prediction_result(gesture, confidence, skip_reason=None):
+    """Response of one predict_detailed() call"""
+    return {
+        'gesture': gesture,
+        'confidence': confidence,
+        'inference_skipped': skip_reason is not None,
+        'skip_reason': skip_reason
+    }
 
 class GestureRecognizer:
-    def __init__(self, model_path='models/signify_model_optimized_01.h5', label_path='models/signify_label_encoder_optimized_01.pkl'):
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, label_path='models/signify_label_encoder_optimized_01.pkl',
+                 session_ttl=300, max_session_bytes=512 * 1024 * 1024,
+                 batch_window_ms=0, max_batch_size=16, streaming=False, confidence_threshold=CONFIDENCE_THRESHOLD,
+                 backend='keras', backend_model_path=None, quantization=None,
+                 inference_workers=0, worker_cores=None, worker_max_restarts=5, worker_restart_backoff=1.0,
+                 motion_threshold=0.0, min_inference_interval=0.0,
+                 compiled=False, jit_compile=False, intra_op_threads=0, inter_op_threads=0,
+                 decoder=False, decoder_alpha=0.5, decoder_threshold=0.6, decoder_stable_steps=3,
+                 decoder_refractory=2.0, log_interval=1.0):
         try:
-            # Register DTypePolicy
-            tf.keras.utils.register_keras_serializable(package='keras')(Policy)
-            
-            # Load model with custom objects
-            self.model = tf.keras.models.load_model(
-                model_path,
-                custom_objects={
-                    'InputLayer': CustomInputLayer,
-                    'DTypePolicy': Policy,
-                    'Masking': Masking
-                },
-                compile=False
-            )
-            self.model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+            # Per-frame debug records are let through at most once per caller every log_interval seconds
+            self.frame_log = logs.Throttle(log_interval)
+            
+            # Define sequence length and image dimensions
+            self.sequence_length = 30  # Adjust based on your model's input requirements
+            self.img_size = (64, 64)  # Adjust based on your model's input requirements
+            self.max_batch_size = max_batch_size
+            self.confidence_threshold = confidence_threshold
+            self.warmup_seconds = None
+            
+            self.pool = None
+            if inference_workers > 0:
+                # Models live in the worker processes; this process only preprocesses and enqueues
+                self.pool = InferenceWorkerPool(
+                    num_workers=inference_workers,
+                    input_shape=(self.sequence_length,) + self.img_size + (3,),
+                    backend=backend,
+                    model_path=model_path,
+                    backend_model_path=backend_model_path,
+                    quantization=quantization,
+                    core_spec=worker_cores,
+                    max_batch_size=max_batch_size,
+                    compiled=compiled,
+                    jit_compile=jit_compile,
+                    intra_op_threads=intra_op_threads,
+                    inter_op_threads=inter_op_threads,
+                    max_restarts=worker_max_restarts,
+                    restart_backoff=worker_restart_backoff
+                )
+                self.backend = None
+                backend_description = f"{inference_workers} {backend} inference workers"
+            else:
+                # Load the inference backend (Keras by default, TFLite/ONNX when converted)
+                self.backend = load_backend(backend, model_path, backend_model_path, quantization,
+                                            compiled, jit_compile, intra_op_threads, inter_op_threads)
+                backend_description = f"{self.backend.name} backend"
+            self.model = getattr(self.backend, 'model', None)
             
             # Define the possible sentences
-            self.sentences = [
-                "we all are with you",
-                "you are welcome",
-                "where are you from",
-                "i really appreciate it"
-            ]
+            self.sentences = list(SENTENCES)
             
             # Load label encoder
             with open(label_path, 'rb') as f:
                 self.label_encoder = pickle.load(f)
             
-            # Define sequence length and image dimensions
-            self.sequence_length = 30  # Adjust based on your model's input requirements
-            self.img_size = (64, 64)  # Adjust based on your model's input requirements
+            # Streaming mode caches per-frame embeddings and only runs the temporal head per step
+            self.streaming = None
+            if streaming and self.model is None:
+                logger.warning("Streaming inference needs the in-process Keras backend, not %s", backend_description)
+            elif streaming:
+                self.streaming = split_model(self.model)
+                if self.streaming is not None:
+                    equivalent, max_error = check_equivalence(self.model, self.streaming)
+                    if not equivalent:
+                        logger.warning("Streaming outputs differ from the full model (max error %s), disabling",
+                                       max_error)
+                        self.streaming = None
+                if self.streaming is None:
+                    logger.warning("Streaming inference unavailable, using full-sequence inference")
+            
+            # Per-(meeting_id, user_id) frame (or embedding) buffers for creating sequences
+            if self.streaming is not None:
+                buffer_shape = (self.streaming.embedding_size,)
+            else:
+                buffer_shape = self.img_size + (3,)
+            self.sessions = SessionStore(
+                sequence_length=self.sequence_length,
+                frame_shape=buffer_shape,
+                idle_ttl=session_ttl,
+                max_bytes=max_session_bytes
+            )
             
-            # Buffer for storing frames to create sequences
-            self.frames_buffer = []
+            # Skips inference on static windows and enforces a per-session minimum interval
+            self.motion_gate = MotionGate(motion_threshold, min_inference_interval)
             
-            print("Model loaded successfully with sentences:", self.sentences)
-        except Exception as e:
-            print(f"Exception encountered in init: {str(e)}")
-            raise e
+            # Optional smoothing decoder that commits sentences from overlapping windows
+            self.decoder = None
+            if decoder:
+                self.decoder = GestureDecoder(decoder_alpha, decoder_threshold, decoder_stable_steps,
+                                              decoder_refractory)
+            
+            # Optional cross-user micro-batching of forward passes (workers batch their own queues)
+            self.scheduler = None
+            if batch_window_ms > 0 and self.pool is None:
+                self.scheduler = BatchScheduler(self._predict_batch, max_batch_size, batch_window_ms)
+            
+            logger.info("Model loaded successfully (%s) with sentences: %s", backend_description, self.sentences)
+        except Exception:
+            logger.exception("Exception encountered in init")
+            raise
     
-    def preprocess_frame(self, frame_data):
-        """Convert base64 encoded frame to numpy array and preprocess it"""
+    def warm_up(self, batch_sizes=None):
+        """Run dummy batches through the model so no user request pays for tracing or kernel setup"""
+        if self.pool is not None:
+            # Workers warm up their own backends before reporting ready
+            return 0.0
+        if batch_sizes is None:
+            # The scheduler can form any batch size up to its limit
+            batch_sizes = range(1, self.max_batch_size + 1) if self.scheduler is not None else (1,)
+        
+        start = time.perf_counter()
+        if self.streaming is not None:
+            self.streaming.embed(np.zeros((1,) + self.img_size + (3,), dtype=np.float32))
+        warm_up(self._predict_batch, (self.sequence_length,) + self.sessions.frame_shape, batch_sizes)
+        self.warmup_seconds = time.perf_counter() - start
+        logger.info("Model warmed up for batch sizes %s in %.2fs", list(batch_sizes), self.warmup_seconds)
+        return self.warmup_seconds
+    
+    def is_ready(self):
+        """True once every inference worker (if any) still in service has loaded and warmed up its model"""
+        if self.pool is None:
+            return True
+        in_service = self.pool.num_workers - len(self.pool.failed_workers)
+        return self.pool.error is None and len(self.pool.ready_workers) == in_service
+    
+    @property
+    def error(self):
+        """Why the model cannot serve any more (every inference worker given up on), or None"""
+        return self.pool.error if self.pool is not None else None
+    
+    def preprocess_frame(self, frame_data, frame_format=None, out=None):
+        """Convert a base64 data URL or binary frame to a normalized float32 array, written into out if given"""
         try:
-            # Decode base64 string to image
-            img_bytes = base64.b64decode(frame_data.split(',')[1])
-            np_arr = np.frombuffer(img_bytes, np.uint8)
-            frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+            frame = decode_frame(frame_data, self.img_size, frame_format)
             
             # Preprocess frame (resize, normalize, etc.)
-            frame = cv2.resize(frame, self.img_size)
-            frame = frame / 255.0  # Normalize
-            
-            return frame
+            return resize_normalize(frame, self.img_size, out)
         except Exception as e:
-            print(f"Error in preprocessing frame: {str(e)}")
+            logger.debug("Error in preprocessing frame: %s", e)
             return None
     
-    def predict(self, frame_data):
-        """Process frame and make prediction if enough frames are collected"""
+    def _log_frame(self, level, meeting_id, user_id, message, *args, exc_info=False):
+        """Log a per-frame record, throttled per caller and message; nothing is formatted here"""
+        if not logger.isEnabledFor(level):
+            return
+        suppressed = self.frame_log.allow((meeting_id, user_id, message))
+        if suppressed is not None:
+            logger.log(level, message, *args, exc_info=exc_info,
+                       extra={'meeting_id': meeting_id, 'user_id': user_id, 'suppressed': suppressed})
+    
+    def _predict_batch(self, sequences):
+        """Run one forward pass over a batch of frame (or embedding) sequences"""
+        if self.streaming is not None:
+            return self.streaming.head(sequences)
+        if self.pool is not None:
+            return self.pool.predict(sequences)
+        return self.backend.predict(sequences)
+    
+    def _infer(self, sequence):
+        """Class probabilities for a single sequence, batched with other callers when enabled"""
+        if self.scheduler is not None:
+            return self.scheduler.predict(sequence)
+        if self.pool is not None:
+            return self.pool.submit(sequence).result(timeout=30.0)
+        return self._predict_batch(sequence[np.newaxis])[0]
+    
+    def predict(self, frame_data, meeting_id=None, user_id=None, frame_format=None):
+        """Process frame and make prediction if enough frames are collected for this caller"""
+        result = self.predict_detailed(frame_data, meeting_id, user_id, frame_format)
+        return result['gesture'], result['confidence']
+    
+    def predict_detailed(self, frame_data, meeting_id=None, user_id=None, frame_format=None):
+        """Like predict(), but returns a dict that also says whether inference was skipped and why"""
+        start = time.perf_counter()
+        FRAMES_TOTAL.labels(frame_format or ('data_url' if isinstance(frame_data, str) else 'binary')).inc()
         try:
-            # Preprocess frame
-            frame = self.preprocess_frame(frame_data)
-            if frame is None:
-                print("Error: Frame preprocessing failed")
-                return "Error processing frame", 0.0
-            
-            # Add frame to buffer
-            self.frames_buffer.append(frame)
-            
-            # Keep only the latest frames
-            if len(self.frames_buffer) > self.sequence_length:
-                self.frames_buffer.pop(0)
-            
-            # If we don't have enough frames yet, return no prediction
-            if len(self.frames_buffer) < self.sequence_length:
-                print(f"Collecting frames... {len(self.frames_buffer)}/{self.sequence_length}")
-                return "Collecting frames...", 0.0
-            
-            # Create sequence
-            sequence = np.array(self.frames_buffer)
-            sequence = np.expand_dims(sequence, axis=0)  # Add batch dimension
-            
-            print("Input sequence shape:", sequence.shape)
-            
-            # Make prediction
-            prediction = self.model.predict(sequence, verbose=0)[0]
+            buffer = self.sessions.get(meeting_id, user_id)
+            with buffer.lock:
+                if self.streaming is not None:
+                    # In streaming mode each frame is embedded exactly once, here
+                    frame = self.preprocess_frame(frame_data, frame_format)
+                    if frame is not None:
+                        with EMBED_SECONDS.time():
+                            embedding = self.streaming.embed(frame[np.newaxis])[0]
+                        with BUFFER_SECONDS.time():
+                            buffer.push(embedding)
+                else:
+                    # Preprocess straight into the caller's next ring slot, overwriting the oldest frame
+                    frame = self.preprocess_frame(frame_data, frame_format, out=buffer.next_slot())
+                    if frame is not None:
+                        with BUFFER_SECONDS.time():
+                            buffer.commit()
+                
+                if frame is None:
+                    self._log_frame(logging.WARNING, meeting_id, user_id, "Frame preprocessing failed")
+                    FRAME_ERRORS_TOTAL.labels('preprocess').inc()
+                    return prediction_result("Error processing frame", 0.0)
+                
+                with MOTION_GATE_SECONDS.time():
+                    self.motion_gate.observe(buffer, frame)
+                
+                # If we don't have enough frames yet, return no prediction
+                if not buffer.is_full():
+                    self._log_frame(logging.DEBUG, meeting_id, user_id, "Collecting frames... %d/%d",
+                                    buffer.count, self.sequence_length)
+                    return prediction_result("Collecting frames...", 0.0)
+                
+                # Don't run the model on a static window or too soon after the last inference
+                with MOTION_GATE_SECONDS.time():
+                    skip_reason = self.motion_gate.check(buffer)
+                if skip_reason is not None:
+                    INFERENCES_SKIPPED_TOTAL.labels(skip_reason).inc()
+                    return prediction_result(None, 0.0, skip_reason)
+                
+                # Create sequence (a view of the ring buffer, no copy)
+                sequence = buffer.sequence()
+                
+                # Make prediction
+                with INFERENCE_SECONDS.time():
+                    prediction = self._infer(sequence)
+                INFERENCES_TOTAL.inc()
+                
+                if self.decoder is not None:
+                    if buffer.decoder_state is None:
+                        buffer.decoder_state = DecoderState()
+                    committed, smoothed_confidence = self.decoder.update(buffer.decoder_state, prediction)
             
             # Get the predicted class and confidence
             predicted_class_idx = np.argmax(prediction)
             confidence = float(prediction[predicted_class_idx])
             
-            print(f"Predicted class index: {predicted_class_idx}")
-            print(f"Raw confidence: {confidence}")
-            print(f"All probabilities: {prediction}")
+            self._log_frame(logging.DEBUG, meeting_id, user_id,
+                            "Predicted class index %d, raw confidence %.4f, all probabilities %s",
+                            predicted_class_idx, confidence, prediction)
+            if confidence < self.confidence_threshold:
+                LOW_CONFIDENCE_TOTAL.inc()
             
             # Get the sentence directly from our list
             if 0 <= predicted_class_idx < len(self.sentences):
                 predicted_sentence = self.sentences[predicted_class_idx]
-                print(f"Predicted sentence: {predicted_sentence}")
-                return predicted_sentence, confidence
+                result = prediction_result(predicted_sentence, confidence)
+                if self.decoder is not None:
+                    # The sentence to caption now, if the smoothed predictions just settled on one
+                    result['committed'] = self.sentences[committed] if committed is not None else None
+                    result['smoothed_confidence'] = smoothed_confidence
+                return result
             else:
-                print(f"Invalid class index: {predicted_class_idx}")
-                return "Error", 0.0
+                self._log_frame(logging.WARNING, meeting_id, user_id, "Invalid class index: %d", predicted_class_idx)
+                FRAME_ERRORS_TOTAL.labels('decode_output').inc()
+                return prediction_result("Error", 0.0)
             
-        except Exception as e:
-            print(f"Error in prediction: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return "Error", 0.0
+        except Exception:
+            self._log_frame(logging.ERROR, meeting_id, user_id, "Error in prediction", exc_info=True)
+            FRAME_ERRORS_TOTAL.labels('predict').inc()
+            return prediction_result("Error", 0.0)
+        finally:
+            PREDICT_SECONDS.observe(time.perf_counter() - start)
     
-    def clear_buffer(self):
-        """Clear the frames buffer"""
-        self.frames_buffer = []
+    def clear_buffer(self, meeting_id=None, user_id=None):
+        """Clear the frames buffer of one caller"""
+        self.sessions.get(meeting_id, user_id).clear()
     
-    def recognize_gesture(self, frame_data):
+    def stats(self):
+        """Session and batching statistics for monitoring"""
+        return {
+            'sessions': self.sessions.stats(),
+            'batching': self.scheduler.stats() if self.scheduler is not None else None,
+            'workers': self.pool.stats() if self.pool is not None else None,
+            'gating': self.motion_gate.stats(),
+            'decoder': self.decoder.stats() if self.decoder is not None else None
+        }
+    
+    def end_session(self, meeting_id, user_id):
+        """Release the frames buffer of a caller that left the meeting"""
+        self.sessions.drop(meeting_id, user_id)
+    
+    def recognize_gesture(self, frame_data, meeting_id=None, user_id=None):
         """Recognize gesture from frame data"""
         try:
+            if self.decoder is not None:
+                # The decoder decides when to commit and keeps the buffer for the next sign
+                return self.predict_detailed(frame_data, meeting_id, user_id).get('committed')
+            
             # Process the frame and get prediction
-            gesture, confidence = self.predict(frame_data)
+            gesture, confidence = self.predict(frame_data, meeting_id, user_id)
             
-            print(f"Gesture: {gesture}, Confidence: {confidence}")  # Debug print
+            self._log_frame(logging.DEBUG, meeting_id, user_id, "Gesture: %s, Confidence: %.4f", gesture, confidence)
             
-            # If confidence is too low or still collecting frames, return None
-            if gesture == "Collecting frames..." or gesture == "Error":
+            # If confidence is too low, still collecting frames or inference was skipped, return None
+            if gesture is None or gesture == "Collecting frames..." or gesture == "Error":
                 return None
             
-            if confidence < 0.5:  # 50% confidence threshold
-                print("Confidence too low")  # Debug print
+            if confidence < self.confidence_threshold:
+                self._log_frame(logging.DEBUG, meeting_id, user_id, "Confidence too low")
                 return None
             
             # Clear buffer after successful recognition
-            self.clear_buffer()
+            self.clear_buffer(meeting_id, user_id)
             return gesture
             
-        except Exception as e:
-            print(f"Error in gesture recognition: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            self._log_frame(logging.ERROR, meeting_id, user_id, "Error in gesture recognition", exc_info=True)
             return None
\ No newline at end of file
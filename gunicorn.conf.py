@@ -0,0 +1,37 @@
+# Gunicorn settings, read automatically by `gunicorn wsgi:app` run from this directory.
+#
+# SERVER_ASYNC_MODE picks the worker:
+#   threading  gthread worker, one OS thread per connection (GUNICORN_THREADS of them)
+#   gevent     gevent-websocket worker, every connection a greenlet
+#   eventlet   eventlet worker; gunicorn 20.1's does not import with eventlet >= 0.30.3,
+#              so with the pinned versions run eventlet through `python app.py` instead
+#
+# The green workers come from gunicorn_workers.py and keep OS threads unpatched.
+#
+# Socket.IO needs sticky sessions across workers, so keep GUNICORN_WORKERS=1 unless
+# a load balancer provides them and SOCKETIO_MESSAGE_QUEUE is set.
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SERVER_ASYNC_MODE = os.getenv('SERVER_ASYNC_MODE', 'threading')
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+# Long-polling and WebSocket connections stay open far longer than the default 30 s
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+if SERVER_ASYNC_MODE == 'threading':
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', '100'))
+elif SERVER_ASYNC_MODE == 'gevent':
+    worker_class = 'gunicorn_workers.GeventWorker'
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '10000'))
+elif SERVER_ASYNC_MODE == 'eventlet':
+    worker_class = 'gunicorn_workers.EventletWorker'
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '10000'))
+else:
+    raise ValueError(f"Unknown SERVER_ASYNC_MODE {SERVER_ASYNC_MODE!r}")
@@ -0,0 +1,51 @@
+# Green gunicorn workers that patch the standard library like concurrency.setup() does.
+# The stock workers also patch threading, which would turn the batch scheduler,
+# transcript writer and offload pool into green threads sharing the event loop.
+import functools
+
+import concurrency
+
+
+def _gevent_worker():
+    from gevent import monkey
+    from geventwebsocket.gunicorn.workers import GeventWebSocketWorker
+
+    class GeventWorker(GeventWebSocketWorker):
+        """gevent-websocket worker that leaves OS threads real"""
+
+        def patch(self):
+            patch_all = monkey.patch_all
+            monkey.patch_all = functools.partial(patch_all, **concurrency.GEVENT_PATCH)
+            try:
+                super().patch()
+            finally:
+                monkey.patch_all = patch_all
+
+    return GeventWorker
+
+
+def _eventlet_worker():
+    import eventlet
+    from gunicorn.workers.geventlet import EventletWorker as _EventletWorker
+
+    class EventletWorker(_EventletWorker):
+        """Eventlet worker that leaves OS threads real"""
+
+        def patch(self):
+            monkey_patch = eventlet.monkey_patch
+            eventlet.monkey_patch = functools.partial(monkey_patch, **concurrency.EVENTLET_PATCH)
+            try:
+                super().patch()
+            finally:
+                eventlet.monkey_patch = monkey_patch
+
+    return EventletWorker
+
+
+def __getattr__(name):
+    # Built on first access so importing this module never requires both libraries
+    if name == 'GeventWorker':
+        return _gevent_worker()
+    if name == 'EventletWorker':
+        return _eventlet_worker()
+    raise AttributeError(name)
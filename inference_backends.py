@@ -0,0 +1,186 @@
+import logging
+import os
+import threading
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.layers import InputLayer, Masking
+from tensorflow.keras.mixed_precision import Policy
+
+DEFAULT_MODEL_PATH = 'models/signify_model_optimized_01.h5'
+
+logger = logging.getLogger(__name__)
+
+
+class CustomInputLayer(InputLayer):
+    def __init__(self, **kwargs):
+        if 'batch_shape' in kwargs:
+            kwargs['input_shape'] = kwargs.pop('batch_shape')[1:]
+        super().__init__(**kwargs)
+
+
+def load_keras_model(model_path=DEFAULT_MODEL_PATH):
+    """Load the .h5 model for inference only (no optimizer, no compile)"""
+    # Register DTypePolicy
+    tf.keras.utils.register_keras_serializable(package='keras')(Policy)
+
+    return tf.keras.models.load_model(
+        model_path,
+        custom_objects={
+            'InputLayer': CustomInputLayer,
+            'DTypePolicy': Policy,
+            'Masking': Masking
+        },
+        compile=False
+    )
+
+
+def converted_model_path(model_path, backend, quantization=None):
+    """Where the converted model for a backend lives, next to the Keras model"""
+    base, _ = os.path.splitext(model_path)
+    if backend == 'tflite':
+        return f"{base}_{quantization or 'float16'}.tflite"
+    if backend == 'onnx':
+        return f"{base}.onnx"
+    return model_path
+
+
+def configure_threading(intra_op_threads=0, inter_op_threads=0):
+    """Size TensorFlow's thread pools (0 keeps TF's default); only possible before TF runs any op"""
+    try:
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError as e:
+        logger.warning("TensorFlow thread pools already initialized, keeping them: %s", e)
+
+
+def compile_model(model, jit_compile=False):
+    """The model's forward pass as a tf.function traced once for any batch size"""
+    signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)]
+
+    @tf.function(input_signature=signature, jit_compile=jit_compile)
+    def forward(sequences):
+        return model(sequences, training=False)
+
+    return forward
+
+
+class KerasBackend:
+    """Default backend: the original Keras model
+
+    With compiled=True predictions go through a tf.function with a fixed
+    (None, 30, 64, 64, 3) signature instead of model.predict(), which builds
+    a data adapter and runs the Keras predict loop on every call.
+    """
+
+    name = 'keras'
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, compiled=False, jit_compile=False):
+        self.model = load_keras_model(model_path)
+        self.input_shape = tuple(self.model.input_shape[1:])
+        self._forward = compile_model(self.model, jit_compile) if compiled or jit_compile else None
+
+    def predict(self, sequences):
+        if self._forward is not None:
+            return self._forward(np.asarray(sequences, dtype=np.float32)).numpy()
+        return self.model.predict(sequences, verbose=0)
+
+
+class TFLiteBackend:
+    """TensorFlow Lite interpreter running a float16 or int8 dynamic-range model"""
+
+    name = 'tflite'
+
+    def __init__(self, model_path, num_threads=None):
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(self._input['shape'][1:])
+        self._batch_size = int(self._input['shape'][0])
+        # The interpreter keeps its tensors internally and is not thread-safe
+        self._lock = threading.Lock()
+
+    def predict(self, sequences):
+        sequences = np.asarray(sequences, dtype=self._input['dtype'])
+        with self._lock:
+            if sequences.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input['index'], sequences.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = sequences.shape[0]
+            self.interpreter.set_tensor(self._input['index'], sequences)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output['index']).copy()
+
+
+class ONNXBackend:
+    """ONNX Runtime session on the CPU execution provider"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("The onnx backend needs onnxruntime: pip install -r requirements-onnx.txt") from None
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self._input = self.session.get_inputs()[0]
+        self.input_shape = tuple(self._input.shape[1:])
+
+    def predict(self, sequences):
+        sequences = np.asarray(sequences, dtype=np.float32)
+        return self.session.run(None, {self._input.name: sequences})[0]
+
+
+BACKENDS = {
+    'keras': KerasBackend,
+    'tflite': TFLiteBackend,
+    'onnx': ONNXBackend
+}
+
+
+def load_backend(name='keras', model_path=DEFAULT_MODEL_PATH, converted_path=None, quantization=None,
+                 compiled=False, jit_compile=False, intra_op_threads=0, inter_op_threads=0):
+    """Create the inference backend selected at startup"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}', expected one of {sorted(BACKENDS)}")
+    configure_threading(intra_op_threads, inter_op_threads)
+    if name == 'keras':
+        return KerasBackend(model_path, compiled, jit_compile)
+
+    path = converted_path or converted_model_path(model_path, name, quantization)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Converted model not found at {path}, run convert_model.py --backend {name} first")
+    return BACKENDS[name](path, num_threads=intra_op_threads or None)
+
+
+def warm_up(predict, input_shape, batch_sizes=(1,)):
+    """Run a zero batch of every size so tracing and kernel setup happen before real requests"""
+    for batch_size in batch_sizes:
+        predict(np.zeros((batch_size,) + tuple(input_shape), dtype=np.float32))
+
+
+def sample_sequences(input_shape, count=16, seed=0):
+    """Fixed pseudo-random sequences in the [0, 1] range the model sees after preprocessing"""
+    rng = np.random.default_rng(seed)
+    return rng.random((count,) + tuple(input_shape), dtype=np.float32)
+
+
+def check_parity(reference, candidate, count=16, seed=0, batch_size=4):
+    """Compare a backend's outputs with the reference (Keras) backend on sample sequences"""
+    sequences = sample_sequences(reference.input_shape, count, seed)
+    expected = np.concatenate([reference.predict(sequences[i:i + batch_size])
+                               for i in range(0, count, batch_size)])
+    actual = np.concatenate([candidate.predict(sequences[i:i + batch_size])
+                             for i in range(0, count, batch_size)])
+    return {
+        'samples': count,
+        'max_abs_diff': float(np.max(np.abs(expected - actual))),
+        'top1_agreement': float(np.mean(np.argmax(expected, axis=1) == np.argmax(actual, axis=1)))
+    }
@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchScheduler:
+    """Collects sequences from concurrent callers and runs them as one batched forward pass"""
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=10):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._sequences = 0
+        self._batch_sizes = Counter()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='gesture-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, sequence):
+        """Queue one sequence (without batch dimension) and return a Future for its output"""
+        if not self._running:
+            raise RuntimeError("Batch scheduler is closed")
+        future = Future()
+        self._queue.put((sequence, future))
+        return future
+
+    def predict(self, sequence, timeout=None):
+        """Blocking helper: wait for the batched output row of a single sequence"""
+        return self.submit(sequence).result(timeout=timeout)
+
+    def _collect(self):
+        # Block for the first request, then keep the window open for stragglers
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the sentinel back so the loop stops once this batch is served
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+
+            # Skip waiters that gave up before the batch was formed
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                inputs = np.stack([sequence for sequence, _ in batch])
+                outputs = self.predict_fn(inputs)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+
+            with self._stats_lock:
+                self._batches += 1
+                self._sequences += len(batch)
+                self._batch_sizes[len(batch)] += 1
+
+    def close(self):
+        """Stop the scheduler thread after the pending requests are served"""
+        self._running = False
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'sequences': self._sequences,
+                'avg_batch_size': self._sequences / self._batches if self._batches else 0.0,
+                'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0
+            }
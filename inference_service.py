@@ -0,0 +1,298 @@
+import atexit
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from inference_backends import DEFAULT_MODEL_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def parse_core_sets(spec, num_workers):
+    """CPU sets per worker: explicit '0,1;2,3' groups, or the available cores split evenly"""
+    if spec:
+        groups = [{int(core) for core in group.split(',') if core.strip()} for group in spec.split(';')]
+        return [groups[i % len(groups)] for i in range(num_workers)]
+    if not hasattr(os, 'sched_getaffinity'):
+        return [None] * num_workers
+    cores = sorted(os.sched_getaffinity(0))
+    if len(cores) < num_workers:
+        return [None] * num_workers
+    per_worker = len(cores) // num_workers
+    return [set(cores[i * per_worker:(i + 1) * per_worker]) for i in range(num_workers)]
+
+
+def _worker_main(index, shm_name, slots, input_shape, tasks, results, backend_kwargs, cores, max_batch_size):
+    """Inference process: owns one loaded backend and reads its inputs from shared memory"""
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    inputs = np.ndarray((slots,) + tuple(input_shape), dtype=np.float32, buffer=shm.buf)
+
+    from inference_backends import load_backend, warm_up
+    backend = load_backend(**backend_kwargs)
+    # Only report ready once every batch size this worker can form has been run
+    warm_up(backend.predict, input_shape, range(1, max_batch_size + 1))
+    results.put(('ready', index, None, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        # Everything already queued for this worker goes into the same forward pass
+        batch = [task]
+        while len(batch) < max_batch_size:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                tasks.put(None)
+                break
+            batch.append(task)
+
+        request_ids = [request_id for request_id, _ in batch]
+        try:
+            outputs = backend.predict(inputs[[slot for _, slot in batch]])
+            for request_id, output in zip(request_ids, outputs):
+                results.put(('result', index, request_id, output))
+        except Exception as e:
+            for request_id in request_ids:
+                results.put(('error', index, request_id, str(e)))
+
+    shm.close()
+
+
+class InferenceWorkerPool:
+    """N inference processes fed through shared-memory ring slots
+
+    The web process copies each preprocessed sequence into a free slot of a
+    shared (slots, 30, 64, 64, 3) float32 array and only sends the slot index
+    to a worker; class probabilities come back over a result queue. A monitor
+    thread fails the in-flight requests of a crashed worker and restarts it
+    after an exponential backoff (restart_backoff seconds, doubling up to
+    max_restart_backoff). A worker that crashes max_restarts times in a row
+    without becoming ready is given up on; once every worker is, error says
+    why and submit() raises.
+    """
+
+    def __init__(self, num_workers=2, input_shape=(30, 64, 64, 3), slots=64, backend='keras',
+                 model_path=DEFAULT_MODEL_PATH, backend_model_path=None, quantization=None,
+                 core_spec=None, max_batch_size=16, compiled=False, jit_compile=False,
+                 intra_op_threads=0, inter_op_threads=0, max_restarts=5, restart_backoff=1.0,
+                 max_restart_backoff=60.0):
+        self.num_workers = num_workers
+        self.input_shape = tuple(input_shape)
+        self.slots = slots
+        self.max_batch_size = max_batch_size
+        self.backend_kwargs = {
+            'name': backend,
+            'model_path': model_path,
+            'converted_path': backend_model_path,
+            'quantization': quantization,
+            'compiled': compiled,
+            'jit_compile': jit_compile,
+            'intra_op_threads': intra_op_threads,
+            'inter_op_threads': inter_op_threads
+        }
+        self.core_sets = parse_core_sets(core_spec, num_workers)
+        self.max_restarts = max_restarts
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+
+        # Spawned children never inherit TensorFlow or web-server threads from this process. They
+        # do re-run the parent's main script as __mp_main__, so its startup must be guarded (app.py is)
+        self._ctx = mp.get_context('spawn')
+        nbytes = slots * int(np.prod(self.input_shape)) * np.dtype(np.float32).itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._inputs = np.ndarray((slots,) + self.input_shape, dtype=np.float32, buffer=self._shm.buf)
+
+        self._free_slots = queue.Queue()
+        for slot in range(slots):
+            self._free_slots.put(slot)
+
+        self._results = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._pending = {}  # request_id -> (future, slot, worker index)
+        self._workers = [None] * num_workers
+        self._task_queues = [None] * num_workers
+        self._inflight = [0] * num_workers
+        self.ready_workers = set()
+        self.failed_workers = set()
+        self._crashes = [0] * num_workers  # Crashes since the worker was last ready
+        self._restart_at = [None] * num_workers  # Monotonic time a crashed worker is restarted at
+        self.error = None
+        self.restarts = 0
+        self.completed = 0
+        self.failed = 0
+
+        for index in range(num_workers):
+            self._start_worker(index)
+
+        self._running = True
+        self._monitor = threading.Thread(target=self._monitor_loop, name='inference-monitor', daemon=True)
+        self._monitor.start()
+        atexit.register(self.close)
+
+    def _start_worker(self, index):
+        tasks = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._shm.name, self.slots, self.input_shape, tasks, self._results,
+                  self.backend_kwargs, self.core_sets[index], self.max_batch_size),
+            name=f'inference-worker-{index}',
+            daemon=True
+        )
+        process.start()
+        self._workers[index] = process
+        self._task_queues[index] = tasks
+        self._inflight[index] = 0
+
+    def submit(self, sequence, timeout=5.0):
+        """Copy one sequence into shared memory and queue it; returns a Future for its output row"""
+        try:
+            slot = self._free_slots.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError("Inference service is saturated, no free input slots")
+        self._inputs[slot] = sequence
+
+        future = Future()
+        with self._lock:
+            # Workers waiting out a restart backoff or given up on take no requests
+            usable = [i for i in range(self.num_workers)
+                      if i not in self.failed_workers and self._restart_at[i] is None]
+            if not usable:
+                self._free_slots.put(slot)
+                raise RuntimeError(self.error or "No inference worker is running, restarting")
+            request_id = next(self._request_ids)
+            # Least-loaded worker gets the request
+            index = min(usable, key=lambda i: self._inflight[i])
+            self._inflight[index] += 1
+            self._pending[request_id] = (future, slot, index)
+            self._task_queues[index].put((request_id, slot))
+        return future
+
+    def predict(self, sequences, timeout=30.0):
+        """Blocking batch helper with the same contract as a backend's predict()"""
+        futures = [self.submit(sequence) for sequence in sequences]
+        return np.stack([future.result(timeout=timeout) for future in futures])
+
+    def _finish(self, request_id):
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+            if entry is None:
+                return None
+            future, slot, index = entry
+            self._inflight[index] -= 1
+        self._free_slots.put(slot)
+        return future
+
+    def _monitor_loop(self):
+        while self._running:
+            try:
+                kind, index, request_id, payload = self._results.get(timeout=0.5)
+            except queue.Empty:
+                kind = None
+            except (EOFError, OSError):
+                break
+
+            if kind == 'ready':
+                self.ready_workers.add(index)
+                self._crashes[index] = 0
+            elif kind == 'result':
+                future = self._finish(request_id)
+                if future is not None:
+                    self.completed += 1
+                    future.set_result(payload)
+            elif kind == 'error':
+                future = self._finish(request_id)
+                if future is not None:
+                    self.failed += 1
+                    future.set_exception(RuntimeError(payload))
+
+            self._restart_dead_workers()
+
+    def _restart_dead_workers(self):
+        now = time.monotonic()
+        for index, process in enumerate(self._workers):
+            if not self._running or index in self.failed_workers:
+                continue
+            if self._restart_at[index] is not None:
+                if now >= self._restart_at[index]:
+                    self.restarts += 1
+                    self._start_worker(index)
+                    with self._lock:
+                        self._restart_at[index] = None
+                continue
+            if process.is_alive():
+                continue
+
+            self.ready_workers.discard(index)
+            self._crashes[index] += 1
+            giving_up = self._crashes[index] > self.max_restarts
+            delay = min(self.restart_backoff * 2 ** (self._crashes[index] - 1), self.max_restart_backoff)
+            with self._lock:
+                # Take the worker out of rotation before failing its requests, so none slip in after
+                if giving_up:
+                    self.failed_workers.add(index)
+                    if len(self.failed_workers) == self.num_workers:
+                        self.error = (f"Every inference worker kept crashing and was given up on after "
+                                      f"{self.max_restarts} restarts, last exit code {process.exitcode}")
+                else:
+                    self._restart_at[index] = now + delay
+            self._fail_requests(index, f"Inference worker {index} crashed")
+
+            if giving_up:
+                logger.error("Inference worker %d exited with code %s after %d crashes without becoming ready, "
+                             "giving up on it", index, process.exitcode, self._crashes[index])
+            else:
+                logger.warning("Inference worker %d exited with code %s, restarting in %.1fs",
+                               index, process.exitcode, delay)
+
+    def _fail_requests(self, index, reason):
+        with self._lock:
+            lost = [request_id for request_id, (_, _, worker) in self._pending.items() if worker == index]
+        for request_id in lost:
+            future = self._finish(request_id)
+            if future is not None:
+                self.failed += 1
+                future.set_exception(RuntimeError(reason))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.num_workers,
+                'ready_workers': len(self.ready_workers),
+                'failed_workers': sorted(self.failed_workers),
+                'inflight': list(self._inflight),
+                'free_slots': self._free_slots.qsize(),
+                'completed': self.completed,
+                'failed': self.failed,
+                'restarts': self.restarts,
+                'error': self.error
+            }
+
+    def close(self):
+        """Stop the workers and release the shared memory segment"""
+        if not getattr(self, '_running', False):
+            return
+        self._running = False
+        for tasks in self._task_queues:
+            tasks.put(None)
+        for process in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._shm.close()
+        self._shm.unlink()
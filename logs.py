@@ -0,0 +1,206 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+LOG_FORMATS = ('json', 'text')
+
+DROPPED_TOTAL = metrics.counter('signify_log_records_dropped_total', 'Log records dropped because the log queue was full')
+
+# Fields (sid, user_id, meeting_id, ...) attached to every record logged by the current handler
+_context = contextvars.ContextVar('log_context', default=None)
+
+# LogRecord attributes that are not extra= fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'context'}
+
+
+def bind(**fields):
+    """Add fields to the log context of the current thread (or green thread); returns a reset token"""
+    current = _context.get()
+    return _context.set({**current, **fields} if current else fields)
+
+
+def reset(token):
+    _context.reset(token)
+
+
+@contextmanager
+def context(**fields):
+    token = bind(**fields)
+    try:
+        yield
+    finally:
+        reset(token)
+
+
+def record_fields(record):
+    """Context and extra= fields of a record, in that order"""
+    fields = dict(getattr(record, 'context', None) or ())
+    for key, value in vars(record).items():
+        if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+            fields[key] = value
+    return fields
+
+
+class ContextFilter(logging.Filter):
+    """Stamps each record with the caller's log context
+
+    Runs in the handler on the thread that logged the record, before it is
+    queued, which is the only place the caller's context is still visible.
+    """
+
+    def filter(self, record):
+        record.context = _context.get()
+        return True
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread
+
+    The stock handler formats the message on the caller's thread; this one
+    only renders tracebacks (which hold frame references) and enqueues the
+    record as is, so arguments must not be mutated after they are logged.
+    When the queue is full the record is dropped and counted, never waited on.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            DROPPED_TOTAL.inc()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, then context and extra= fields"""
+
+    def format(self, record):
+        document = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        document.update(record_fields(record))
+        if record.exc_text:
+            document['exc'] = record.exc_text
+        if record.stack_info:
+            document['stack'] = record.stack_info
+        return json.dumps(document, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for development, with the fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        fields = record_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+class Throttle:
+    """Lets at most one record per key through every interval seconds
+
+    For per-frame logs: allow() returns None while the key is throttled,
+    otherwise how many records were suppressed since the last one let through.
+    Callers check the logger's level first so throttled keys cost nothing at INFO.
+    """
+
+    def __init__(self, interval=1.0, max_keys=10000):
+        self.interval = interval
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._keys = {}  # key -> [next allowed monotonic time, suppressed count]
+
+    def allow(self, key=None, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._keys.get(key)
+            if state is not None and now < state[0]:
+                state[1] += 1
+                return None
+            if state is None and len(self._keys) >= self.max_keys:
+                # Forget every key whose interval has passed
+                self._keys = {k: s for k, s in self._keys.items() if now < s[0]}
+            suppressed = state[1] if state is not None else 0
+            self._keys[key] = [now + self.interval, 0]
+            return suppressed
+
+
+_handler = None
+_listener = None
+_format = None
+
+
+def setup(level='INFO', fmt='json', queue_size=10000, stream=None):
+    """Route all logging through a bounded queue to a background writer thread
+
+    Replaces the root logger's handlers, so call it once, early in the entry
+    point (after concurrency.setup(), so the writer is a real OS thread).
+    """
+    global _handler, _listener, _format
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format {fmt!r}, expected one of {', '.join(LOG_FORMATS)}")
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+    _handler = BackgroundQueueHandler(queue.Queue(queue_size))
+    _handler.addFilter(ContextFilter())
+    _listener = logging.handlers.QueueListener(_handler.queue, output)
+    _format = fmt
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    _listener.start()
+    return _listener
+
+
+def shutdown():
+    """Write out every queued record and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown)
+
+metrics.gauge('signify_log_queue_depth', 'Log records waiting for the writer thread',
+              lambda: _handler.queue.qsize() if _handler is not None else None)
+
+
+def stats():
+    return {
+        'level': logging.getLevelName(logging.getLogger().level),
+        'format': _format,
+        'queued': _handler.queue.qsize() if _handler is not None else 0,
+        'dropped': _handler.dropped if _handler is not None else 0
+    }
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+import metrics
+
+EMIT_SECONDS = metrics.EMIT_SECONDS.labels('new_message')
+
+
+class MessageBatcher:
+    """Batches new_message fan-out per room and keeps a short history for late joiners
+
+    Messages published to a room are held for at most flush_interval and then
+    emitted together as one new_message event whose payload is a list. A
+    gesture sentence identical to the same user's previous gesture sentence
+    within coalesce_window seconds is dropped, since a held sign is recognized
+    over and over. Every delivered message is also appended to a bounded
+    per-meeting history.
+    """
+
+    def __init__(self, socketio, flush_interval=0.05, coalesce_window=2.0, history_size=200):
+        self.socketio = socketio
+        self.flush_interval = flush_interval
+        self.coalesce_window = coalesce_window
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._pending = defaultdict(list)  # meeting_id -> messages waiting for the next flush
+        self._history = {}  # meeting_id -> deque of recent messages
+        self._last_gesture = {}  # (meeting_id, user_id) -> (message, monotonic time)
+        self._task = None
+        self._start_lock = threading.Lock()
+        self.published = 0
+        self.coalesced = 0
+        self.flushes = 0
+
+    def start(self):
+        """Start the flush task; called lazily on the first published message"""
+        with self._start_lock:
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._flush_loop)
+
+    def publish(self, meeting_id, message):
+        """Queue a new_message payload for the room; returns False if it was coalesced away"""
+        if self._task is None:
+            self.start()
+        now = time.monotonic()
+        with self._lock:
+            if message.get('type') == 'gesture':
+                key = (meeting_id, message['user_id'])
+                last = self._last_gesture.get(key)
+                if last is not None and last[0] == message['message'] and now - last[1] < self.coalesce_window:
+                    self.coalesced += 1
+                    return False
+                self._last_gesture[key] = (message['message'], now)
+            elif 'user_id' in message:
+                # Any other message from the user ends the run of repeated gesture sentences
+                self._last_gesture.pop((meeting_id, message['user_id']), None)
+
+            message = dict(message, timestamp=time.time())
+            self._pending[meeting_id].append(message)
+            history = self._history.get(meeting_id)
+            if history is None:
+                history = self._history[meeting_id] = deque(maxlen=self.history_size)
+            history.append(message)
+            self.published += 1
+        return True
+
+    def history(self, meeting_id):
+        with self._lock:
+            return list(self._history.get(meeting_id, ()))
+
+    def drop(self, meeting_id):
+        """Forget a meeting's pending messages and history once everyone has left"""
+        with self._lock:
+            self._pending.pop(meeting_id, None)
+            self._history.pop(meeting_id, None)
+            for key in [key for key in self._last_gesture if key[0] == meeting_id]:
+                del self._last_gesture[key]
+
+    def flush(self):
+        """Emit every room's pending messages as one list payload per room"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(list)
+        for meeting_id, messages in pending.items():
+            with EMIT_SECONDS.time():
+                self.socketio.emit('new_message', messages, to=meeting_id)
+        if pending:
+            with self._lock:
+                self.flushes += 1
+        return len(pending)
+
+    def _flush_loop(self):
+        while True:
+            self.socketio.sleep(self.flush_interval)
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'flush_interval': self.flush_interval,
+                'coalesce_window': self.coalesce_window,
+                'published': self.published,
+                'coalesced': self.coalesced,
+                'flushes': self.flushes,
+                'pending': sum(len(messages) for messages in self._pending.values()),
+                'meetings_with_history': len(self._history)
+            }
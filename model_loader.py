@@ -0,0 +1,74 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoader:
+    """Builds an expensive object (the gesture recognizer) once, optionally off the startup path
+
+    With background=True the factory runs in a daemon thread and the server
+    starts serving right away; get() returns None until loading finishes.
+    The factory is expected to do its own warm-up so that, once get() returns
+    the object, no request pays for first-call costs.
+    """
+
+    def __init__(self, factory, name='model-loader'):
+        self.factory = factory
+        self.name = name
+        self._value = None
+        self._loaded = threading.Event()
+        self._thread = None
+        self._started_at = None
+        self.load_seconds = None
+        self.error = None
+
+    def start(self, background=True):
+        if self._started_at is not None:
+            return
+        self._started_at = time.perf_counter()
+        if background:
+            self._thread = threading.Thread(target=self._load, name=self.name, daemon=True)
+            self._thread.start()
+        else:
+            self._load()
+            if self.error is not None:
+                raise RuntimeError(self.error)
+
+    def _load(self):
+        try:
+            self._value = self.factory()
+            self.load_seconds = time.perf_counter() - self._started_at
+            logger.info("%s finished in %.2fs", self.name, self.load_seconds)
+        except Exception as e:
+            self.error = str(e)
+            logger.exception("%s failed", self.name)
+        finally:
+            self._loaded.set()
+
+    @property
+    def ready(self):
+        return self._value is not None
+
+    def get(self, timeout=None):
+        """The loaded object, or None if it is not available yet (waits up to timeout seconds)"""
+        if timeout:
+            self._loaded.wait(timeout)
+        return self._value
+
+    def status(self):
+        if self.ready:
+            state = 'ready'
+        elif self.error is not None:
+            state = 'failed'
+        elif self._started_at is not None:
+            state = 'loading'
+        else:
+            state = 'not_started'
+        return {
+            'state': state,
+            'load_seconds': self.load_seconds,
+            'elapsed_seconds': time.perf_counter() - self._started_at if self._started_at is not None else None,
+            'error': self.error
+        }
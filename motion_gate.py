@@ -0,0 +1,77 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Skips inference while a session's window is static or was inferred too recently
+
+    Motion is the mean absolute difference between consecutive frames after
+    downscaling them to a small grayscale thumbnail, which is cheap and
+    ignores most sensor noise. A window is static when no frame in it moved
+    more than motion_threshold, since a sign anywhere in the window can still
+    change the prediction.
+    """
+
+    def __init__(self, motion_threshold=0.0, min_interval=0.0, thumbnail_size=(16, 16)):
+        self.motion_threshold = motion_threshold
+        self.min_interval = min_interval
+        self.thumbnail_size = thumbnail_size
+        self._lock = threading.Lock()
+        self.inferences = 0
+        self.skipped_static = 0
+        self.skipped_interval = 0
+
+    @property
+    def enabled(self):
+        return self.motion_threshold > 0 or self.min_interval > 0
+
+    def observe(self, buffer, frame):
+        """Record the motion of a frame just committed to buffer (frame is the preprocessed image)"""
+        if self.motion_threshold <= 0:
+            return 0.0
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumbnail = cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        if buffer.thumbnail is None:
+            # The first frame of a session counts as motion so it is never gated on its own
+            energy = float('inf')
+        else:
+            energy = float(np.mean(np.abs(thumbnail - buffer.thumbnail)))
+        buffer.thumbnail = thumbnail
+        buffer.motion[(buffer.head - 1) % buffer.sequence_length] = energy
+        return energy
+
+    def check(self, buffer, now=None):
+        """Return None if inference should run for this window, else the reason it is skipped"""
+        now = time.monotonic() if now is None else now
+        reason = None
+        if self.min_interval > 0 and now - buffer.last_inference < self.min_interval:
+            reason = 'interval'
+        elif self.motion_threshold > 0 and float(np.max(buffer.motion)) < self.motion_threshold:
+            reason = 'static'
+
+        with self._lock:
+            if reason is None:
+                self.inferences += 1
+            elif reason == 'interval':
+                self.skipped_interval += 1
+            else:
+                self.skipped_static += 1
+        if reason is None:
+            buffer.last_inference = now
+        return reason
+
+    def stats(self):
+        with self._lock:
+            skipped = self.skipped_static + self.skipped_interval
+            total = self.inferences + skipped
+            return {
+                'motion_threshold': self.motion_threshold,
+                'min_interval': self.min_interval,
+                'inferences': self.inferences,
+                'skipped_static': self.skipped_static,
+                'skipped_interval': self.skipped_interval,
+                'skipped_ratio': skipped / total if total else 0.0
+            }
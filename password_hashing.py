@@ -0,0 +1,127 @@
+import hashlib
+import hmac
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+
+ALGORITHM = 'pbkdf2_sha256'
+
+# Hashes written before the cost became configurable are 'salt:key' with this cost
+LEGACY_ROUNDS = 100000
+
+
+HASH_SECONDS = metrics.histogram('signify_password_hash_seconds',
+                                 'PBKDF2 time on the hashing executor, after admission')
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when too many password hashes are already queued"""
+
+
+def _pbkdf2(password, salt, rounds):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, rounds)
+
+
+def parse_hash(stored_password):
+    """Split a stored hash into (rounds, salt, key); understands the legacy 'salt:key' format"""
+    if stored_password.startswith(ALGORITHM + '$'):
+        _, rounds, salt_hex, key_hex = stored_password.split('$')
+        return int(rounds), bytes.fromhex(salt_hex), bytes.fromhex(key_hex)
+    salt_hex, key_hex = stored_password.split(':')
+    return LEGACY_ROUNDS, bytes.fromhex(salt_hex), bytes.fromhex(key_hex)
+
+
+class PasswordHasher:
+    """PBKDF2 hashing on a dedicated executor with bounded admission
+
+    Hashes run in worker processes so a login burst cannot starve the web
+    threads. At most max_pending hashes may be queued or running; callers
+    beyond that wait admission_timeout seconds and then get HashingBusyError
+    instead of piling up.
+    """
+
+    def __init__(self, rounds=LEGACY_ROUNDS, max_workers=2, max_pending=32, admission_timeout=2.0,
+                 executor='process'):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.admission_timeout = admission_timeout
+        self.executor_kind = executor
+        self._admission = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.rejected = 0
+
+    def _new_executor(self):
+        if self.executor_kind == 'process':
+            # Forked workers start instantly; start() forks them before any server threads exist
+            context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+            return ProcessPoolExecutor(self.max_workers, mp_context=context)
+        return ThreadPoolExecutor(self.max_workers, thread_name_prefix='password-hash')
+
+    def start(self):
+        """Create the executor and its workers now rather than on the first login"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            executor = self._executor
+        for future in [executor.submit(_pbkdf2, '', b'', 1) for _ in range(self.max_workers)]:
+            future.result()
+
+    def _run(self, password, salt, rounds, timeout=None):
+        if not self._admission.acquire(timeout=self.admission_timeout if timeout is None else timeout):
+            self.rejected += 1
+            raise HashingBusyError("Too many password hashes in progress")
+        try:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = self._new_executor()
+                executor = self._executor
+            with HASH_SECONDS.time():
+                try:
+                    return executor.submit(_pbkdf2, password, salt, rounds).result()
+                except BrokenProcessPool:
+                    # A worker died; replace the pool and retry once
+                    with self._executor_lock:
+                        if self._executor is executor:
+                            self._executor = self._new_executor()
+                        executor = self._executor
+                    return executor.submit(_pbkdf2, password, salt, rounds).result()
+        finally:
+            self._admission.release()
+
+    def hash(self, password, timeout=None):
+        """Hash with the current cost; waits up to timeout seconds (default admission_timeout) for a slot"""
+        salt = os.urandom(32)
+        key = self._run(password, salt, self.rounds, timeout)
+        return f"{ALGORITHM}${self.rounds}${salt.hex()}${key.hex()}"
+
+    def verify(self, stored_password, provided_password):
+        """Return (matches, needs_rehash); needs_rehash is set when the stored cost is outdated"""
+        rounds, salt, stored_key = parse_hash(stored_password)
+        new_key = self._run(provided_password, salt, rounds)
+        matches = hmac.compare_digest(new_key, stored_key)
+        needs_rehash = matches and (rounds != self.rounds or not stored_password.startswith(ALGORITHM + '$'))
+        return matches, needs_rehash
+
+    def stats(self):
+        return {
+            'rounds': self.rounds,
+            'workers': self.max_workers,
+            'executor': self.executor_kind,
+            'rejected': self.rejected
+        }
+
+
+# Module-wide hasher used by database.py; replace it with configure() at startup
+password_hasher = PasswordHasher()
+
+
+def configure(**kwargs):
+    """Replace the module-wide hasher, e.g. with a different cost or worker count"""
+    global password_hasher
+    password_hasher = PasswordHasher(**kwargs)
+    return password_hasher
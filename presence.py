@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+
+
+class InMemoryPresenceStore:
+    """Default presence store: a per-process dict of meeting_id -> {user_id: info}"""
+
+    def __init__(self):
+        self._meetings = {}
+        self._lock = threading.Lock()
+
+    def join(self, meeting_id, user_id, info):
+        with self._lock:
+            self._meetings.setdefault(meeting_id, {})[str(user_id)] = info
+
+    def heartbeat(self, meeting_id, user_id):
+        # Entries only go away on leave; nothing to refresh
+        return None
+
+    def leave(self, meeting_id, user_id):
+        with self._lock:
+            participants = self._meetings.get(meeting_id)
+            if participants is None:
+                return
+            participants.pop(str(user_id), None)
+            # If no participants left, clean up (but don't delete from database)
+            if not participants:
+                del self._meetings[meeting_id]
+
+    def get(self, meeting_id, user_id):
+        with self._lock:
+            return self._meetings.get(meeting_id, {}).get(str(user_id))
+
+    def participants(self, meeting_id):
+        with self._lock:
+            return list(self._meetings.get(meeting_id, {}).values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'meetings': len(self._meetings),
+                'participants': sum(len(p) for p in self._meetings.values())
+            }
+
+
+class RedisPresenceStore:
+    """Presence shared by every worker: one Redis hash per meeting, kept alive by heartbeats
+
+    Each field holds a participant's info plus a last_seen timestamp. Fields
+    older than ttl are ignored and pruned on read, and the whole hash expires
+    once nobody in the meeting has sent a heartbeat for ttl seconds. Two
+    sorted sets, scored by last activity, index the meetings and participants
+    so stats() never has to scan the keyspace.
+    """
+
+    def __init__(self, client, ttl=60, prefix='signify'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._meetings_key = f"{prefix}:presence-index:meetings"
+        self._participants_key = f"{prefix}:presence-index:participants"
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, meeting_id):
+        return f"{self.prefix}:presence:{meeting_id}"
+
+    @staticmethod
+    def _member(meeting_id, user_id):
+        return f"{meeting_id}:{user_id}"
+
+    def _touch(self, pipe, meeting_id, user_id, now):
+        pipe.expire(self._key(meeting_id), self.ttl)
+        pipe.zadd(self._meetings_key, {meeting_id: now})
+        pipe.zadd(self._participants_key, {self._member(meeting_id, user_id): now})
+
+    def join(self, meeting_id, user_id, info):
+        now = time.time()
+        record = dict(info, last_seen=now)
+        pipe = self.client.pipeline()
+        pipe.hset(self._key(meeting_id), str(user_id), json.dumps(record))
+        self._touch(pipe, meeting_id, user_id, now)
+        pipe.execute()
+
+    def heartbeat(self, meeting_id, user_id):
+        key = self._key(meeting_id)
+        raw = self.client.hget(key, str(user_id))
+        if raw is None:
+            return
+        now = time.time()
+        record = json.loads(raw)
+        record['last_seen'] = now
+        pipe = self.client.pipeline()
+        pipe.hset(key, str(user_id), json.dumps(record))
+        self._touch(pipe, meeting_id, user_id, now)
+        pipe.execute()
+
+    def leave(self, meeting_id, user_id):
+        key = self._key(meeting_id)
+        pipe = self.client.pipeline()
+        pipe.hdel(key, str(user_id))
+        pipe.zrem(self._participants_key, self._member(meeting_id, user_id))
+        pipe.hlen(key)
+        remaining = pipe.execute()[-1]
+        if not remaining:
+            self.client.zrem(self._meetings_key, meeting_id)
+
+    def _live(self, meeting_id):
+        key = self._key(meeting_id)
+        cutoff = time.time() - self.ttl
+        live, stale = {}, []
+        for field, raw in self.client.hgetall(key).items():
+            field = field.decode() if isinstance(field, bytes) else field
+            record = json.loads(raw)
+            if record.pop('last_seen', 0) < cutoff:
+                stale.append(field)
+            else:
+                live[field] = record
+        if stale:
+            pipe = self.client.pipeline()
+            pipe.hdel(key, *stale)
+            pipe.zrem(self._participants_key, *[self._member(meeting_id, field) for field in stale])
+            pipe.execute()
+        return live
+
+    def get(self, meeting_id, user_id):
+        return self._live(meeting_id).get(str(user_id))
+
+    def participants(self, meeting_id):
+        return list(self._live(meeting_id).values())
+
+    def stats(self):
+        # Drop index entries that have not been active within ttl, then count what is left
+        cutoff = time.time() - self.ttl
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(self._meetings_key, '-inf', f'({cutoff}')
+        pipe.zremrangebyscore(self._participants_key, '-inf', f'({cutoff}')
+        pipe.zcard(self._meetings_key)
+        pipe.zcard(self._participants_key)
+        _, _, meetings, participants = pipe.execute()
+        return {
+            'backend': 'redis',
+            'meetings': meetings,
+            'participants': participants,
+            'ttl': self.ttl
+        }
+
+
+def create_presence_store(backend='memory', redis_url=None, ttl=60):
+    """Build the presence store selected by configuration"""
+    if backend == 'redis':
+        if not redis_url:
+            raise ValueError("The redis presence backend needs REDIS_URL")
+        return RedisPresenceStore.from_url(redis_url, ttl=ttl)
+    if backend != 'memory':
+        raise ValueError(f"Unknown presence backend '{backend}', expected 'memory' or 'redis'")
+    return InMemoryPresenceStore()
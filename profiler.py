@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler over every Python thread, producing folded stacks
+
+    A background thread snapshots all thread stacks every interval seconds via
+    sys._current_frames(). Each sample is recorded as
+    "thread;module:function;...;module:function", root first, which is the
+    folded format flamegraph.pl, speedscope and inferno read directly.
+    Sampling costs nothing when not running and little while it is, so it can
+    be turned on against live traffic.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._stacks = Counter()
+        self._thread = None
+        self._stop = None
+        self.samples = 0
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        """Start sampling; returns False if a capture is already running"""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = time.monotonic()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name='sampling-profiler',
+                                            daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Stop sampling and return the folded stacks collected so far"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            stop = self._stop
+        if thread is not None:
+            stop.set()
+            thread.join()
+        return self.folded()
+
+    def capture(self, seconds):
+        """Sample for the given number of seconds and return the folded stacks"""
+        if not self.start():
+            raise RuntimeError("A profile capture is already running")
+        time.sleep(seconds)
+        return self.stop()
+
+    def _frame_name(self, frame):
+        code = frame.f_code
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        return f'{module}:{code.co_name}'
+
+    def _sample(self, own_ident):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            names_in_stack = []
+            while frame is not None and len(names_in_stack) < self.max_depth:
+                names_in_stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            names_in_stack.append(names.get(ident, f'thread-{ident}'))
+            stacks.append(';'.join(reversed(names_in_stack)))
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+
+    def _run(self, stop):
+        own_ident = threading.get_ident()
+        while not stop.wait(self.interval):
+            self._sample(own_ident)
+
+    def folded(self):
+        with self._lock:
+            return ''.join(f'{stack} {count}\n' for stack, count in self._stacks.most_common())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'running': self._thread is not None,
+                'interval': self.interval,
+                'samples': self.samples,
+                'stacks': len(self._stacks)
+            }
@@ -0,0 +1,159 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class RateLimitedError(RuntimeError):
+    """Raised when a caller is over its rate limit or inference capacity is exhausted"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self):
+        """Retry-After value in whole seconds, as HTTP expects"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """Classic token bucket: rate tokens per second, holding at most burst"""
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now):
+        """Take one token; returns 0 on success, else seconds until a token is available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class InferenceAdmission:
+    """Admission control for the inference path: per-caller rate limits and a global in-flight cap
+
+    Every (user_id, meeting_id) pair has its own token bucket, so one busy
+    tab cannot take the model away from everyone else. On top of that at most
+    max_inflight predictions run at once. The last priority_reserve share of
+    those slots only admits priority callers (the meeting host and whoever
+    recognized a sentence within active_window seconds), so they keep getting
+    capacity under overload. Rejections are immediate and carry a retry-after
+    hint; nothing is queued. rate=0 turns the per-caller limit off and leaves
+    only the in-flight cap.
+    """
+
+    def __init__(self, rate=5.0, burst=10, max_inflight=32, priority_reserve=0.25, active_window=10.0,
+                 busy_retry_after=0.5, bucket_ttl=300):
+        self.rate = rate
+        self.burst = burst
+        self.max_inflight = max_inflight
+        self.reserved = int(max_inflight * priority_reserve)
+        self.active_window = active_window
+        self.busy_retry_after = busy_retry_after
+        self.bucket_ttl = bucket_ttl
+        self._lock = threading.Lock()
+        self._buckets = {}  # (user_id, meeting_id) -> TokenBucket
+        self._hosts = {}  # meeting_id -> host user_id
+        self._active = {}  # (meeting_id, user_id) -> monotonic time of the last recognized sentence
+        self._admitted_since_prune = 0
+        self.inflight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.over_capacity = 0
+        self.priority_admitted = 0
+
+    def set_host(self, meeting_id, host_id):
+        with self._lock:
+            self._hosts[meeting_id] = host_id
+
+    def mark_active(self, meeting_id, user_id):
+        """Record that user_id is actively signing in the meeting"""
+        with self._lock:
+            self._active[(meeting_id, user_id)] = time.monotonic()
+
+    def drop_meeting(self, meeting_id):
+        with self._lock:
+            self._hosts.pop(meeting_id, None)
+            for key in [key for key in self._active if key[0] == meeting_id]:
+                del self._active[key]
+
+    def _is_priority(self, meeting_id, user_id, now):
+        if self._hosts.get(meeting_id) == user_id:
+            return True
+        last_active = self._active.get((meeting_id, user_id))
+        return last_active is not None and now - last_active < self.active_window
+
+    def _prune(self, now):
+        # Full buckets that have been idle for a while carry no state worth keeping
+        for key in [key for key, bucket in self._buckets.items() if now - bucket.updated > self.bucket_ttl]:
+            del self._buckets[key]
+        for key in [key for key, last in self._active.items() if now - last > self.active_window]:
+            del self._active[key]
+
+    def acquire(self, user_id, meeting_id):
+        """Admit one prediction or raise RateLimitedError; call release() when it is done"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = None
+            if self.rate > 0:
+                key = (user_id, meeting_id)
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+                wait = bucket.take(now)
+                if wait > 0:
+                    self.rate_limited += 1
+                    raise RateLimitedError("Too many frames, slow down", wait)
+
+            priority = self._is_priority(meeting_id, user_id, now)
+            limit = self.max_inflight if priority else self.max_inflight - self.reserved
+            if self.inflight >= limit:
+                # Give the token back; the caller did not get to use it
+                if bucket is not None:
+                    bucket.tokens = min(self.burst, bucket.tokens + 1.0)
+                self.over_capacity += 1
+                raise RateLimitedError("Gesture recognition is at capacity", self.busy_retry_after)
+
+            self.inflight += 1
+            self.admitted += 1
+            self.priority_admitted += priority
+            self._admitted_since_prune += 1
+            if self._admitted_since_prune >= 1000:
+                self._admitted_since_prune = 0
+                self._prune(now)
+            return priority
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
+
+    @contextmanager
+    def admit(self, user_id, meeting_id):
+        priority = self.acquire(user_id, meeting_id)
+        try:
+            yield priority
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'max_inflight': self.max_inflight,
+                'priority_reserve': self.reserved,
+                'inflight': self.inflight,
+                'admitted': self.admitted,
+                'priority_admitted': self.priority_admitted,
+                'rate_limited': self.rate_limited,
+                'over_capacity': self.over_capacity,
+                'buckets': len(self._buckets),
+                'active_signers': len(self._active)
+            }
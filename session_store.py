@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FrameRingBuffer:
+    """Fixed-size, preallocated window of the most recent frames for one signer
+
+    Every frame is stored twice, at slot i and i + sequence_length, so the
+    ordered window is always one contiguous slice of the storage: the model
+    input is a view and never has to be reassembled with a copy.
+    """
+
+    def __init__(self, sequence_length=30, frame_shape=(64, 64, 3), dtype=np.float32):
+        self.sequence_length = sequence_length
+        self.frame_shape = tuple(frame_shape)
+        self.frames = np.zeros((2 * sequence_length,) + self.frame_shape, dtype=dtype)
+        self.head = 0  # Index of the slot the next frame is written to
+        self.count = 0
+        self.last_access = time.monotonic()
+        # Motion gating state: per-slot motion energy, last thumbnail, last inference time
+        self.motion = np.zeros(sequence_length, dtype=np.float32)
+        self.thumbnail = None
+        self.last_inference = 0.0
+        # Smoothing state of the gesture decoder, created on the first inference
+        self.decoder_state = None
+        # Serializes concurrent requests coming from the same user
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes
+
+    def is_full(self):
+        return self.count >= self.sequence_length
+
+    def next_slot(self):
+        """Writable view of the slot the next frame goes to; call commit() once it is filled"""
+        return self.frames[self.head]
+
+    def commit(self):
+        """Mirror the freshly written slot and advance the ring in O(1)"""
+        self.frames[self.head + self.sequence_length] = self.frames[self.head]
+        self.head = (self.head + 1) % self.sequence_length
+        if self.count < self.sequence_length:
+            self.count += 1
+
+    def push(self, frame):
+        """Overwrite the oldest slot with a new frame in O(1)"""
+        self.frames[self.head] = frame
+        self.commit()
+
+    def sequence(self):
+        """View of the buffered frames ordered from oldest to newest"""
+        if self.count < self.sequence_length:
+            return self.frames[:self.count]
+        return self.frames[self.head:self.head + self.sequence_length]
+
+    def clear(self):
+        """Start a new window: frames, motion gating and decoder state all go"""
+        self.head = 0
+        self.count = 0
+        self.motion.fill(0.0)
+        self.thumbnail = None
+        self.last_inference = 0.0
+        self.decoder_state = None
+
+
+class SessionStore:
+    """Per-(meeting_id, user_id) frame buffers with idle-TTL and memory-cap eviction"""
+
+    def __init__(self, sequence_length=30, frame_shape=(64, 64, 3), dtype=np.float32,
+                 idle_ttl=300, max_bytes=512 * 1024 * 1024):
+        self.sequence_length = sequence_length
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = dtype
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        # Ordered from least to most recently used
+        self._buffers = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._buffers)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def get(self, meeting_id, user_id):
+        """Return the caller's buffer, creating it on first use"""
+        key = (meeting_id, user_id)
+        now = time.monotonic()
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = FrameRingBuffer(self.sequence_length, self.frame_shape, self.dtype)
+                self._buffers[key] = buffer
+                self._total_bytes += buffer.nbytes
+            else:
+                self._buffers.move_to_end(key)
+            buffer.last_access = now
+            self._evict_locked(now, keep=key)
+            return buffer
+
+    def drop(self, meeting_id, user_id):
+        """Release the buffer of a user who left the meeting"""
+        with self._lock:
+            buffer = self._buffers.pop((meeting_id, user_id), None)
+            if buffer is not None:
+                self._total_bytes -= buffer.nbytes
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_locked(time.monotonic())
+
+    def _evict_locked(self, now, keep=None):
+        # Least recently used entries sit at the front, so stop at the first live one
+        while self._buffers:
+            key, buffer = next(iter(self._buffers.items()))
+            if key == keep:
+                break
+            idle = now - buffer.last_access > self.idle_ttl
+            over_cap = self._total_bytes > self.max_bytes
+            if not idle and not over_cap:
+                break
+            del self._buffers[key]
+            self._total_bytes -= buffer.nbytes
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._buffers),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions
+            }
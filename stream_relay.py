@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import metrics
+
+EMIT_SECONDS = metrics.EMIT_SECONDS.labels('video_stream')
+
+logger = logging.getLogger(__name__)
+
+
+def payload_size(stream_data):
+    """Approximate wire size of a video_stream payload"""
+    if isinstance(stream_data, (str, bytes, bytearray)):
+        return len(stream_data)
+    return 0
+
+
+class VideoRelay:
+    """Relays video_stream frames to room members through bounded, latest-wins queues
+
+    Every recipient socket has a small queue holding at most one pending frame
+    per sender: a newer frame replaces the older one still waiting, and when
+    the queue is full the oldest pending frame is dropped. Senders are capped
+    at max_fps, and a background task drains the queues. A recipient is only
+    sent more frames while engine.io's own outbound queue for its socket holds
+    fewer than max_backlog packets; until it catches up its frames wait here
+    and keep being replaced, so a slow recipient only ever falls behind by one
+    frame per sender.
+
+    Queues cover the sockets connected to this process. With message_queue=True
+    (a Socket.IO message queue is configured) each accepted frame is also
+    emitted to the room through the queue, skipping this process's sockets, so
+    room members on other workers get it too. Those deliveries are capped by
+    max_fps but not by the per-recipient queues.
+    """
+
+    def __init__(self, socketio, max_fps=15, max_queue=8, max_backlog=4, tick=0.01, message_queue=False):
+        self.socketio = socketio
+        self.min_frame_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.max_queue = max_queue
+        self.max_backlog = max_backlog
+        self.tick = tick
+        self.message_queue = message_queue
+        self._lock = threading.Lock()
+        self._rooms = defaultdict(set)  # meeting_id -> sids
+        self._sid_rooms = {}  # sid -> meeting_id
+        self._queues = {}  # sid -> OrderedDict(sender user_id -> payload)
+        self._last_frame = {}  # (meeting_id, user_id) -> monotonic time of last accepted frame
+        self._counters = defaultdict(lambda: {
+            'frames_in': 0, 'frames_out': 0, 'frames_dropped': 0, 'bytes_in': 0, 'bytes_out': 0
+        })
+        self.drain_errors = 0
+        self._task = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the drain task; called lazily on the first published frame"""
+        with self._start_lock:
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._drain_loop)
+
+    def add(self, meeting_id, sid):
+        with self._lock:
+            self._rooms[meeting_id].add(sid)
+            self._sid_rooms[sid] = meeting_id
+            self._queues[sid] = OrderedDict()
+
+    def remove(self, sid):
+        with self._lock:
+            meeting_id = self._sid_rooms.pop(sid, None)
+            self._queues.pop(sid, None)
+            if meeting_id is not None:
+                self._rooms[meeting_id].discard(sid)
+                if not self._rooms[meeting_id]:
+                    del self._rooms[meeting_id]
+                    self._counters.pop(meeting_id, None)
+                    for key in [key for key in self._last_frame if key[0] == meeting_id]:
+                        del self._last_frame[key]
+
+    def publish(self, meeting_id, user_id, stream_data, sender_sid):
+        """Queue a sender's frame for every other room member; returns False if rate-limited"""
+        if self._task is None:
+            self.start()
+        now = time.monotonic()
+        size = payload_size(stream_data)
+        payload = {'user_id': user_id, 'stream': stream_data}
+        with self._lock:
+            counters = self._counters[meeting_id]
+            counters['frames_in'] += 1
+            counters['bytes_in'] += size
+
+            last = self._last_frame.get((meeting_id, user_id))
+            if last is not None and now - last < self.min_frame_interval:
+                counters['frames_dropped'] += 1
+                return False
+            self._last_frame[(meeting_id, user_id)] = now
+
+            for sid in self._rooms.get(meeting_id, ()):
+                if sid == sender_sid:
+                    continue
+                queue = self._queues[sid]
+                if user_id in queue:
+                    # Latest wins: the pending older frame from this sender is replaced
+                    del queue[user_id]
+                    counters['frames_dropped'] += 1
+                elif len(queue) >= self.max_queue:
+                    queue.popitem(last=False)
+                    counters['frames_dropped'] += 1
+                queue[user_id] = (payload, size)
+            local_sids = list(self._rooms.get(meeting_id, ())) if self.message_queue else None
+
+        if self.message_queue:
+            # Room members on other workers; this process's sockets are served from their queues
+            with EMIT_SECONDS.time():
+                self.socketio.emit('video_stream', payload, to=meeting_id, skip_sid=local_sids or None)
+        return True
+
+    def _backlog(self, sid):
+        """Packets waiting in engine.io's (unbounded) outbound queue of a local socket"""
+        server = self.socketio.server
+        try:
+            socket = server.eio.sockets.get(server.manager.eio_sid_from_sid(sid, '/'))
+        except Exception:
+            return 0
+        return socket.queue.qsize() if socket is not None else 0
+
+    def drain(self):
+        """Send the pending frames of every recipient that is keeping up; returns how many were sent"""
+        with self._lock:
+            batches = []
+            for sid, queue in self._queues.items():
+                if queue and self._backlog(sid) < self.max_backlog:
+                    batches.append((sid, self._sid_rooms.get(sid), list(queue.values())))
+                    queue.clear()
+
+        sent = 0
+        for sid, meeting_id, items in batches:
+            for payload, size in items:
+                with EMIT_SECONDS.time():
+                    self.socketio.emit('video_stream', payload, to=sid)
+            sent += len(items)
+            with self._lock:
+                if meeting_id in self._counters:
+                    counters = self._counters[meeting_id]
+                    counters['frames_out'] += len(items)
+                    counters['bytes_out'] += sum(size for _, size in items)
+        return sent
+
+    def _drain_loop(self):
+        while True:
+            try:
+                sent = self.drain()
+            except Exception:
+                # One bad emit must not stop video for every meeting
+                self.drain_errors += 1
+                logger.exception("Video relay drain failed")
+                sent = 0
+            # Yield between rounds; wait a tick when there was nothing to send
+            self.socketio.sleep(0 if sent else self.tick)
+
+    def stats(self):
+        with self._lock:
+            rooms = {}
+            for meeting_id, sids in self._rooms.items():
+                room = dict(self._counters[meeting_id])
+                room['recipients'] = len(sids)
+                room['queue_depth'] = sum(len(self._queues[sid]) for sid in sids if sid in self._queues)
+                room['backlogged'] = sum(self._backlog(sid) >= self.max_backlog for sid in sids)
+                rooms[meeting_id] = room
+            return {
+                'max_fps': 1.0 / self.min_frame_interval if self.min_frame_interval else None,
+                'max_queue': self.max_queue,
+                'max_backlog': self.max_backlog,
+                'message_queue': self.message_queue,
+                'drain_errors': self.drain_errors,
+                'rooms': rooms
+            }
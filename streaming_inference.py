@@ -0,0 +1,90 @@
+import logging
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.layers import InputLayer, TimeDistributed
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingModel:
+    """A sequence model split into a per-frame feature extractor and a temporal head
+
+    Each frame is embedded once when it arrives and only the head runs on the
+    window of cached embeddings. Layers after the TimeDistributed prefix
+    (Masking, LSTM, Dense, ...) are reused as-is, so their weights are shared
+    with the original model.
+    """
+
+    def __init__(self, frame_model, head_model, embedding_size):
+        self.frame_model = frame_model
+        self.head_model = head_model
+        self.embedding_size = embedding_size
+
+    def embed(self, frames):
+        """Embeddings of a (n, height, width, 3) batch of frames"""
+        return self.frame_model(frames, training=False).numpy()
+
+    def head(self, embeddings):
+        """Class probabilities for a (batch, sequence_length, embedding_size) array"""
+        return self.head_model(embeddings, training=False).numpy()
+
+
+def _is_linear(model, layers):
+    # Sequential models are chains by construction; functional ones must be checked
+    if isinstance(model, tf.keras.Sequential):
+        return True
+    previous = model.inputs[0]
+    for layer in layers:
+        if len(layer._inbound_nodes) != 1 or layer.input is not previous:
+            return False
+        previous = layer.output
+    return True
+
+
+def split_model(model):
+    """Split a TimeDistributed feature extractor + temporal head model, or return None"""
+    try:
+        layers = [layer for layer in model.layers if not isinstance(layer, InputLayer)]
+        if not _is_linear(model, layers):
+            return None
+
+        frame_layers = []
+        for layer in layers:
+            if not isinstance(layer, TimeDistributed):
+                break
+            frame_layers.append(layer.layer)
+        head_layers = layers[len(frame_layers):]
+        if not frame_layers or not head_layers:
+            return None
+
+        sequence_length = model.input_shape[1]
+        frame_input = tf.keras.Input(shape=model.input_shape[2:])
+        x = frame_input
+        for layer in frame_layers:
+            x = layer(x)
+        if len(x.shape) != 2:
+            return None
+        embedding_size = int(x.shape[-1])
+        frame_model = tf.keras.Model(frame_input, x)
+
+        head_input = tf.keras.Input(shape=(sequence_length, embedding_size))
+        y = head_input
+        for layer in head_layers:
+            y = layer(y)
+        head_model = tf.keras.Model(head_input, y)
+
+        return StreamingModel(frame_model, head_model, embedding_size)
+    except Exception as e:
+        logger.warning("Model cannot be split for streaming inference: %s", e)
+        return None
+
+
+def check_equivalence(model, streaming, atol=1e-4, seed=0):
+    """Compare the split model against the full model on a random sequence"""
+    rng = np.random.default_rng(seed)
+    sequence = rng.random((1,) + tuple(model.input_shape[1:]), dtype=np.float32)
+    expected = model(sequence, training=False).numpy()
+    embeddings = streaming.embed(sequence[0])
+    actual = streaming.head(embeddings[None])
+    return np.allclose(expected, actual, atol=atol), float(np.max(np.abs(expected - actual)))
@@ -0,0 +1,50 @@
+import os
+import sys
+
+# The application modules live flat at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """app.py imported once, with a scratch database, cheap password hashing and no gesture model"""
+    workdir = tmp_path_factory.mktemp('app')
+    os.environ.update({
+        'PASSWORD_HASH_EXECUTOR': 'thread',
+        'PASSWORD_HASH_ROUNDS': '1000',
+        'GESTURE_BACKGROUND_LOAD': '1',
+        'GESTURE_MODEL_PATH': str(workdir / 'missing-model.h5'),
+        'GESTURE_LABEL_PATH': str(workdir / 'missing-labels.pkl'),
+        'AGORA_APP_ID': '0' * 32,
+        'AGORA_APP_CERTIFICATE': '0' * 32
+    })
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    app.database.DB_PATH = str(workdir / 'signify.db')
+    app.database.close_db_connection()
+    app.init_db()
+    app.app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture(scope='session')
+def stub_model_files(tmp_path_factory):
+    """(model_path, label_path) of the random-weights stub gesture model"""
+    from benchmarks.stub_model import write_stub_files
+    return write_stub_files(str(tmp_path_factory.mktemp('models')))
+
+
+def signed_in_client(app_module, name):
+    """A Flask test client logged in as a newly signed-up user"""
+    client = app_module.app.test_client()
+    email = f'{name.lower()}@example.com'
+    client.post('/signup', data={'name': name, 'email': email, 'password': 'password'})
+    response = client.post('/login', data={'email': email, 'password': 'password'})
+    assert response.status_code == 302, response.data
+    return client
@@ -0,0 +1,54 @@
+from cache import MISSING, TTLCache
+
+
+def test_entries_expire_after_their_ttl():
+    cache = TTLCache('test-expiry', ttl=10)
+    cache.set('a', 1, now=0.0)
+    cache.set('b', 2, ttl=1, now=0.0)
+    assert cache.get('a', now=9.9) == 1
+    assert cache.get('b', now=1.0) is MISSING
+    assert cache.get('a', now=10.0) is MISSING
+    assert cache.stats()['size'] == 0
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_full_cache_evicts_least_recently_used():
+    cache = TTLCache('test-lru', maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.evictions == 1
+
+    cache.invalidate('a')
+    assert cache.get('a') is MISSING
+
+
+def test_disabled_cache_never_stores():
+    cache = TTLCache('test-disabled', enabled=False)
+    cache.set('a', 1)
+    assert cache.get('a') is MISSING
+    assert cache.stats()['size'] == 0
+
+
+def test_agora_tokens_are_reused_until_the_refresh_margin(app_module, monkeypatch):
+    builds = []
+
+    def build_token(app_id, certificate, channel_name, uid, role, expires):
+        builds.append((channel_name, uid))
+        return f'token-{len(builds)}'
+
+    clock = [1000.0]
+    monkeypatch.setattr('cache.time.monotonic', lambda: clock[0])
+    monkeypatch.setattr(app_module.RtcTokenBuilder, 'buildTokenWithUid', build_token)
+    app_module.agora_token_cache.clear()
+
+    assert app_module.generate_agora_token('room', 1) == 'token-1'
+    assert app_module.generate_agora_token('room', 1) == 'token-1'
+    assert app_module.generate_agora_token('room', 2) == 'token-2'
+
+    clock[0] += app_module.AGORA_TOKEN_TTL - app_module.AGORA_TOKEN_REFRESH_MARGIN
+    assert app_module.generate_agora_token('room', 1) == 'token-3'
+    assert builds == [('room', 1), ('room', 2), ('room', 1)]
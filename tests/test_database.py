@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+import database
+import password_hashing
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    database.init_db()
+    yield database
+    database.close_db_connection()
+
+
+def test_participants_are_recorded_once(db):
+    assert not db.is_participant('m1', 7)
+    db.add_participant('m1', 7)
+    db.add_participant('m1', 7)
+    assert db.is_participant('m1', 7)
+    assert not db.is_participant('m2', 7)
+
+
+def test_meeting_lookups_are_cached_as_copies(db, monkeypatch):
+    monkeypatch.setattr(db, 'meeting_cache', db.TTLCache('test-meetings'))
+    assert db.get_meeting('m1') is None
+    assert db.add_meeting('m1', 7)
+    meeting = db.get_meeting('m1')
+    meeting['host_id'] = 8
+    assert db.get_meeting('m1')['host_id'] == 7
+    assert db.meeting_exists('m1')
+    assert db.meeting_cache.stats()['hits'] == 2
+
+
+def test_iter_messages_pages_and_resumes(db):
+    db.add_messages([('m1', 1, 'Ann', 'chat', f'message {i}', float(i)) for i in range(7)])
+    rows = list(db.iter_messages('m1', page_size=3))
+    assert [row['message'] for row in rows] == [f'message {i}' for i in range(7)]
+    resumed = list(db.iter_messages('m1', after_ts=rows[3]['ts'], after_id=rows[3]['id'], limit=2, page_size=3))
+    assert [row['message'] for row in resumed] == ['message 4', 'message 5']
+
+
+def test_login_succeeds_when_the_rehash_finds_no_free_slot(db, monkeypatch):
+    hasher = password_hashing.PasswordHasher(rounds=1000, max_workers=1, max_pending=1, admission_timeout=5,
+                                             executor='thread')
+    monkeypatch.setattr(password_hashing, 'password_hasher', hasher)
+    legacy = password_hashing.PasswordHasher(rounds=500, executor='thread').hash('secret')
+    with db.connection() as conn, conn:
+        conn.execute("INSERT INTO users (name, email, password) VALUES ('Ann', 'ann@example.com', ?)", (legacy,))
+
+    # Other logins hold every free hashing slot when this one would rehash
+    real_hash = hasher.hash
+    def busy_hash(password, timeout=None):
+        assert timeout == 0
+        raise password_hashing.HashingBusyError("Too many password hashes in progress")
+    monkeypatch.setattr(hasher, 'hash', busy_hash)
+    assert db.verify_user('ann@example.com', 'secret')
+    with db.connection() as conn:
+        assert conn.execute("SELECT password FROM users").fetchone()[0] == legacy
+
+    # With a slot free the hash is upgraded to the current cost
+    monkeypatch.setattr(hasher, 'hash', real_hash)
+    assert db.verify_user('ann@example.com', 'secret')
+    with db.connection() as conn:
+        assert conn.execute("SELECT password FROM users").fetchone()[0].startswith('pbkdf2_sha256$1000$')
+
+
+def test_signup_with_a_taken_email_does_not_hash(db, monkeypatch):
+    monkeypatch.setattr(password_hashing, 'password_hasher',
+                        password_hashing.PasswordHasher(rounds=1000, executor='thread'))
+    assert db.add_user('Ann', 'ann@example.com', 'secret')
+
+    def no_hash(password, timeout=None):
+        raise AssertionError("hashed a password for a taken email")
+    monkeypatch.setattr(password_hashing.password_hasher, 'hash', no_hash)
+    assert not db.add_user('Ann again', 'ann@example.com', 'other')
+
+
+def test_query_latency_leaves_out_password_hashing(db, monkeypatch):
+    hasher = password_hashing.PasswordHasher(rounds=1000, executor='thread')
+    monkeypatch.setattr(password_hashing, 'password_hasher', hasher)
+    assert db.add_user('Ann', 'ann@example.com', 'secret')
+
+    def slow_verify(stored, provided):
+        time.sleep(0.3)
+        return True, False
+    monkeypatch.setattr(hasher, 'verify', slow_verify)
+    query = db.QUERY_SECONDS.labels('verify_user')
+    _, before = query.snapshot()
+    assert db.verify_user('ann@example.com', 'secret')
+    _, after = query.snapshot()
+    assert after - before < 0.1
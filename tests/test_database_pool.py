@@ -0,0 +1,59 @@
+import sqlite3
+import threading
+
+import pytest
+
+import database
+from database import ConnectionPool
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    database.configure_meeting_cache(enabled=False)
+    database.init_db()
+    yield database
+    database.close_db_connection()
+    database.configure_meeting_cache()
+
+
+def test_short_lived_threads_reuse_pooled_connections(db):
+    def lookup():
+        db.meeting_exists('m1')
+
+    for _ in range(20):
+        thread = threading.Thread(target=lookup)
+        thread.start()
+        thread.join()
+    stats = db.pool_stats()
+    assert stats['open'] == 1
+    assert stats['checkouts'] >= 20
+
+
+def test_pool_is_bounded_and_waits_for_a_returned_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert pool.stats()['open'] == 1
+    assert pool.stats()['waits'] == 1
+
+
+def test_release_rolls_back_an_unfinished_transaction(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=1)
+    with pool.connection() as conn:
+        conn.execute('CREATE TABLE t (x INTEGER)')
+    with pool.connection() as conn:
+        conn.execute('INSERT INTO t VALUES (1)')
+        assert conn.in_transaction
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+
+def test_queries_go_through_the_pool(db):
+    db.add_messages([('m1', 1, 'Ann', 'chat', f'message {i}', float(i)) for i in range(5)])
+    assert [row['message'] for row in db.iter_messages('m1', page_size=2)] == [f'message {i}' for i in range(5)]
+    assert db.pool_stats()['idle'] == db.pool_stats()['open']
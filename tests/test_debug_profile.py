@@ -0,0 +1,25 @@
+from conftest import signed_in_client
+
+
+def test_profile_is_local_only_without_admins(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'PROFILER_ENABLED', True)
+    monkeypatch.setattr(app_module, 'PROFILER_ADMINS', set())
+    client = app_module.app.test_client()
+
+    assert client.get('/debug/profile?seconds=0.1').status_code == 200
+    assert client.get('/debug/profile?seconds=0.1', environ_base={'REMOTE_ADDR': '203.0.113.9'}).status_code == 403
+    assert client.get('/debug/profile?seconds=0.1', headers={'X-Forwarded-For': '203.0.113.9'}).status_code == 403
+
+
+def test_profile_requires_an_admin_when_configured(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'PROFILER_ENABLED', True)
+    monkeypatch.setattr(app_module, 'PROFILER_ADMINS', {'ops@example.com'})
+
+    assert app_module.app.test_client().get('/debug/profile?seconds=0.1').status_code == 403
+    assert signed_in_client(app_module, 'Visitor').get('/debug/profile?seconds=0.1').status_code == 403
+    assert signed_in_client(app_module, 'Ops').get('/debug/profile?seconds=0.1').status_code == 200
+
+
+def test_profile_is_hidden_when_disabled(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'PROFILER_ENABLED', False)
+    assert app_module.app.test_client().get('/debug/profile').status_code == 404
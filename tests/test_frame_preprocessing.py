@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+
+from frame_preprocessing import decode_frame_bytes, is_encoded_image
+
+IMG_SIZE = (64, 64)
+RAW_SIZE = 64 * 64 * 3
+
+
+def padded(encoded):
+    """An encoded image grown to exactly the raw RGB frame size with trailing bytes decoders ignore"""
+    data = encoded.tobytes()
+    assert len(data) < RAW_SIZE
+    return data + b'\0' * (RAW_SIZE - len(data))
+
+
+def test_raw_rgb_is_flipped_to_bgr():
+    rgb = np.zeros((64, 64, 3), np.uint8)
+    rgb[..., 0] = 200
+    frame = decode_frame_bytes(rgb.tobytes(), IMG_SIZE)
+    assert frame.shape == (64, 64, 3)
+    assert (frame[..., 2] == 200).all() and (frame[..., 0] == 0).all()
+
+
+def test_jpeg_with_raw_rgb_length_is_decoded():
+    image = np.full((48, 48, 3), 90, np.uint8)
+    _, encoded = cv2.imencode('.jpg', image)
+    data = padded(encoded)
+    assert is_encoded_image(data)
+    frame = decode_frame_bytes(data, IMG_SIZE)
+    assert frame.shape == (48, 48, 3)
+
+
+def test_webp_with_raw_rgb_length_is_decoded():
+    image = np.full((48, 48, 3), 90, np.uint8)
+    _, encoded = cv2.imencode('.webp', image)
+    assert is_encoded_image(encoded.tobytes())
+    frame = decode_frame_bytes(padded(encoded), IMG_SIZE)
+    assert frame.shape == (48, 48, 3)
+
+
+def test_explicit_rgb_format_wins_over_signature():
+    data = b'\xff\xd8\xff' + b'\0' * (RAW_SIZE - 3)
+    assert decode_frame_bytes(data, IMG_SIZE, 'rgb').shape == (64, 64, 3)
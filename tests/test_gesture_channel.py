@@ -0,0 +1,21 @@
+from gesture_channel import GestureChannel
+from gesture_recognition import CONFIDENCE_THRESHOLD, prediction_result
+
+
+def test_streamed_sentences_use_the_recognizer_threshold(app_module):
+    assert app_module.gesture_channel.confidence_threshold == CONFIDENCE_THRESHOLD
+
+    channel = GestureChannel(on_recognized=None)
+    assert channel.recognized_sentence(prediction_result('you are welcome', CONFIDENCE_THRESHOLD)) == 'you are welcome'
+    assert channel.recognized_sentence(prediction_result('you are welcome', CONFIDENCE_THRESHOLD - 0.01)) is None
+    assert channel.recognized_sentence(prediction_result('Collecting frames...', 1.0)) is None
+
+
+def test_decoder_commits_bypass_the_threshold():
+    channel = GestureChannel(on_recognized=None)
+    result = prediction_result('you are welcome', 0.1)
+    result['committed'] = 'you are welcome'
+    assert channel.recognized_sentence(result) == 'you are welcome'
+    result = prediction_result('you are welcome', 0.99)
+    result['committed'] = None
+    assert channel.recognized_sentence(result) is None
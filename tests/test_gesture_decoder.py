@@ -0,0 +1,35 @@
+from gesture_decoder import DecoderState, GestureDecoder
+
+HELLO = [0.9, 0.05, 0.05, 0.0]
+THANKS = [0.05, 0.9, 0.05, 0.0]
+PAUSE = [0.25, 0.25, 0.25, 0.25]
+
+
+def run(decoder, state, windows, start=0.0, step=0.1):
+    return [decoder.update(state, window, now=start + i * step)[0] for i, window in enumerate(windows)]
+
+
+def test_commits_after_stable_steps_and_once_per_run():
+    decoder = GestureDecoder(alpha=1.0, commit_threshold=0.6, stable_steps=3)
+    state = DecoderState()
+    assert run(decoder, state, [HELLO] * 5) == [None, None, 0, None, None]
+    assert run(decoder, state, [THANKS] * 3, start=1.0) == [None, None, 1]
+    assert decoder.stats()['commits'] == 2
+
+
+def test_smoothing_ignores_a_single_spike():
+    decoder = GestureDecoder(alpha=0.5, commit_threshold=0.6, stable_steps=2)
+    state = DecoderState()
+    assert run(decoder, state, [PAUSE, HELLO, PAUSE, PAUSE]) == [None] * 4
+    assert run(decoder, state, [HELLO] * 3, start=1.0) == [None, 0, None]
+
+
+def test_repeat_within_refractory_is_suppressed():
+    decoder = GestureDecoder(alpha=1.0, commit_threshold=0.6, stable_steps=2, refractory=2.0)
+    state = DecoderState()
+    assert run(decoder, state, [HELLO, HELLO, PAUSE]) == [None, 0, None]
+    # The same sentence again right after the pause is flicker
+    assert run(decoder, state, [HELLO, HELLO], start=1.0) == [None, None]
+    assert decoder.stats()['suppressed'] == 1
+    # Once the refractory period is over it is a new sign
+    assert run(decoder, state, [PAUSE, HELLO, HELLO], start=3.0) == [None, None, 0]
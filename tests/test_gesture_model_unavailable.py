@@ -0,0 +1,21 @@
+from conftest import signed_in_client
+
+
+def test_failed_model_load_answers_503(app_module):
+    # The fixture points GESTURE_MODEL_PATH at a file that does not exist
+    app_module.gesture_loader.get(timeout=60)
+    assert app_module.gesture_loader.error is not None
+
+    client = signed_in_client(app_module, 'Unlucky')
+    response = client.post('/process_gesture', json={'frame': 'data:image/jpeg;base64,AAAA', 'meeting_id': 'm'})
+    assert response.status_code == 503
+    body = response.get_json()
+    assert body['state'] == 'failed' and 'failed to load' in body['error']
+
+    response = client.post('/process_gesture_binary?meeting_id=m', data=b'\xff\xd8\xff')
+    assert response.status_code == 503
+
+    socket = app_module.socketio.test_client(app_module.app, flask_test_client=client)
+    ack = socket.emit('gesture_frame', {'frame': b'\xff\xd8\xff', 'format': 'jpeg'}, callback=True)
+    assert ack['state'] == 'failed' and not ack['success']
+    socket.disconnect()
@@ -0,0 +1,41 @@
+from conftest import signed_in_client
+from gesture_recognition import prediction_result
+
+
+class FakeRecognizer:
+    error = None
+
+    def __init__(self, result):
+        self.result = result
+
+    def predict_detailed(self, frame_data, meeting_id=None, user_id=None, frame_format=None):
+        return dict(self.result)
+
+
+def active_signers(app_module):
+    return app_module.inference_admission.stats()['active_signers']
+
+
+def test_client_gesture_messages_do_not_grant_priority(app_module):
+    client = signed_in_client(app_module, 'Signer')
+    socket = app_module.socketio.test_client(app_module.app, flask_test_client=client)
+    before = active_signers(app_module)
+    for _ in range(5):
+        socket.emit('gesture_message', {'meeting_id': 'm-priority', 'message': 'you are welcome'})
+    assert active_signers(app_module) == before
+    socket.disconnect()
+
+
+def test_recognized_sentences_grant_priority(app_module, monkeypatch):
+    client = signed_in_client(app_module, 'Recognized')
+    before = active_signers(app_module)
+
+    # The fixture's real model never loads; the fake stands in for it
+    monkeypatch.setattr(app_module.gesture_loader, 'error', None)
+    monkeypatch.setattr(app_module.gesture_loader, 'get', lambda: FakeRecognizer(prediction_result('you are welcome', 0.2)))
+    assert client.post('/process_gesture', json={'frame': 'x', 'meeting_id': 'm-priority'}).get_json()['success']
+    assert active_signers(app_module) == before
+
+    monkeypatch.setattr(app_module.gesture_loader, 'get', lambda: FakeRecognizer(prediction_result('you are welcome', 0.95)))
+    assert client.post('/process_gesture', json={'frame': 'x', 'meeting_id': 'm-priority'}).get_json()['success']
+    assert active_signers(app_module) == before + 1
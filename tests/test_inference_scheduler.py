@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+import pytest
+
+from inference_scheduler import BatchScheduler
+
+
+def recording_predict(sizes):
+    def predict(inputs):
+        sizes.append(len(inputs))
+        return inputs.sum(axis=1)
+    return predict
+
+
+def test_full_batch_flushes_before_the_window():
+    sizes = []
+    scheduler = BatchScheduler(recording_predict(sizes), max_batch_size=4, max_wait_ms=5000)
+    start = time.monotonic()
+    futures = [scheduler.submit(np.full(3, i, dtype=np.float32)) for i in range(8)]
+    assert [future.result(timeout=2) for future in futures] == [3.0 * i for i in range(8)]
+    assert time.monotonic() - start < 2
+    assert sizes == [4, 4]
+    assert scheduler.stats()['batch_size_histogram'] == {4: 2}
+    scheduler.close()
+
+
+def test_partial_batch_flushes_when_the_window_closes():
+    sizes = []
+    scheduler = BatchScheduler(recording_predict(sizes), max_batch_size=16, max_wait_ms=50)
+    start = time.monotonic()
+    assert scheduler.predict(np.ones(3, dtype=np.float32), timeout=2) == 3.0
+    assert time.monotonic() - start >= 0.04
+    assert sizes == [1]
+    scheduler.close()
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    calls = []
+
+    def predict(inputs):
+        calls.append(len(inputs))
+        if len(calls) == 1:
+            raise ValueError("model failed")
+        return inputs.sum(axis=1)
+
+    scheduler = BatchScheduler(predict, max_batch_size=2, max_wait_ms=1000)
+    futures = [scheduler.submit(np.ones(3, dtype=np.float32)) for _ in range(2)]
+    for future in futures:
+        with pytest.raises(ValueError, match="model failed"):
+            future.result(timeout=2)
+
+    # The scheduler thread survives a failed batch
+    assert scheduler.predict(np.ones(3, dtype=np.float32), timeout=2) == 3.0
+    scheduler.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        scheduler.submit(np.ones(3, dtype=np.float32))
@@ -0,0 +1,25 @@
+import time
+
+import numpy as np
+import pytest
+
+from inference_service import InferenceWorkerPool
+
+
+def test_crashing_worker_is_restarted_with_backoff_then_given_up(tmp_path):
+    # The onnx backend fails at once in the worker when its converted model is missing
+    pool = InferenceWorkerPool(num_workers=1, input_shape=(2, 4, 4, 3), slots=4, backend='onnx',
+                               model_path=str(tmp_path / 'missing.h5'), max_restarts=1, restart_backoff=0.05)
+    try:
+        deadline = time.monotonic() + 60
+        while pool.error is None and time.monotonic() < deadline:
+            time.sleep(0.1)
+        stats = pool.stats()
+        assert stats['restarts'] == 1
+        assert stats['failed_workers'] == [0]
+        assert 'given up on after 1 restarts' in stats['error']
+        with pytest.raises(RuntimeError, match='given up'):
+            pool.submit(np.zeros((2, 4, 4, 3), dtype=np.float32))
+        assert stats['free_slots'] == 4
+    finally:
+        pool.close()
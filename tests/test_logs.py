@@ -0,0 +1,67 @@
+import json
+import logging
+import queue
+
+import logs
+
+
+def make_record(message='hello %s', args=('world',), **extra):
+    record = logging.LogRecord('signify.test', logging.INFO, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_context_filter_stamps_the_callers_context():
+    context_filter = logs.ContextFilter()
+    with logs.context(sid='abc', meeting_id='m1'):
+        token = logs.bind(user_id=7)
+        record = make_record()
+        context_filter.filter(record)
+        logs.reset(token)
+    assert record.context == {'sid': 'abc', 'meeting_id': 'm1', 'user_id': 7}
+
+    # Outside the block nothing is attached
+    record = make_record()
+    context_filter.filter(record)
+    assert record.context is None
+
+
+def test_json_formatter_merges_context_and_extra_fields():
+    record = make_record(context={'sid': 'abc'}, frames=30)
+    record.exc_text = 'Traceback ...'
+    document = json.loads(logs.JsonFormatter().format(record))
+    assert document['level'] == 'INFO' and document['logger'] == 'signify.test'
+    assert document['message'] == 'hello world'
+    assert document['sid'] == 'abc' and document['frames'] == 30
+    assert document['exc'] == 'Traceback ...'
+    assert 'context' not in document and 'args' not in document
+
+
+def test_text_formatter_appends_fields():
+    line = logs.TextFormatter().format(make_record(context={'sid': 'abc'}, frames=30))
+    assert line.endswith('INFO signify.test: hello world sid=abc frames=30')
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = logs.BackgroundQueueHandler(queue.Queue(1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.queue.qsize() == 1 and handler.dropped == 1
+
+
+def test_throttle_counts_suppressed_records_per_key():
+    throttle = logs.Throttle(interval=1.0)
+    assert throttle.allow('a', now=0.0) == 0
+    assert throttle.allow('a', now=0.5) is None
+    assert throttle.allow('a', now=0.9) is None
+    assert throttle.allow('b', now=0.9) == 0
+    assert throttle.allow('a', now=1.0) == 2
+    assert throttle.allow('a', now=1.5) is None
+
+
+def test_throttle_forgets_expired_keys_at_the_cap():
+    throttle = logs.Throttle(interval=1.0, max_keys=2)
+    throttle.allow('a', now=0.0)
+    throttle.allow('b', now=0.5)
+    throttle.allow('c', now=1.2)
+    assert set(throttle._keys) == {'b', 'c'}
@@ -0,0 +1,62 @@
+from flask import Flask
+from flask_socketio import SocketIO, join_room
+
+from message_batcher import MessageBatcher
+
+
+def make_client(batcher_kwargs=None):
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    # A long flush interval keeps the background flush out of the way; tests flush explicitly
+    batcher = MessageBatcher(socketio, flush_interval=60, **(batcher_kwargs or {}))
+
+    @socketio.on('join')
+    def on_join(data):
+        join_room(data['meeting_id'])
+
+    client = socketio.test_client(app)
+    client.emit('join', {'meeting_id': 'm1'})
+    return batcher, client
+
+
+def new_message_payloads(client):
+    return [event['args'] for event in client.get_received() if event['name'] == 'new_message']
+
+
+def test_new_message_payload_is_one_list_of_messages():
+    batcher, client = make_client()
+    batcher.publish('m1', {'user_id': 1, 'username': 'Ann', 'message': 'hi', 'type': 'chat'})
+    batcher.publish('m1', {'user_id': 2, 'username': 'Bob', 'message': 'you are welcome', 'type': 'gesture'})
+    batcher.flush()
+
+    payloads = new_message_payloads(client)
+    assert len(payloads) == 1
+    # One event argument: the list of messages, each a flat object the page renders
+    (messages,) = payloads[0]
+    assert isinstance(messages, list)
+    assert [(m['username'], m['message'], m['type']) for m in messages] == [
+        ('Ann', 'hi', 'chat'), ('Bob', 'you are welcome', 'gesture')]
+    assert all(isinstance(m['timestamp'], float) and m['user_id'] in (1, 2) for m in messages)
+
+
+def test_only_room_members_receive_and_history_keeps_delivered_messages():
+    batcher, client = make_client()
+    batcher.publish('other', {'user_id': 1, 'username': 'Ann', 'message': 'elsewhere', 'type': 'chat'})
+    batcher.publish('m1', {'user_id': 1, 'username': 'Ann', 'message': 'hi', 'type': 'chat'})
+    batcher.flush()
+
+    (messages,) = new_message_payloads(client)[0]
+    assert [m['message'] for m in messages] == ['hi']
+    assert [m['message'] for m in batcher.history('m1')] == ['hi']
+
+
+def test_repeated_gesture_sentences_are_coalesced():
+    batcher, client = make_client({'coalesce_window': 10.0})
+    gesture = {'user_id': 1, 'username': 'Ann', 'message': 'you are welcome', 'type': 'gesture'}
+    assert batcher.publish('m1', gesture)
+    assert not batcher.publish('m1', gesture)
+    batcher.flush()
+
+    (messages,) = new_message_payloads(client)[0]
+    assert len(messages) == 1
+    assert batcher.stats()['coalesced'] == 1
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from model_loader import BackgroundLoader
+
+
+def test_background_load_goes_from_loading_to_ready():
+    release = threading.Event()
+    loader = BackgroundLoader(lambda: release.wait(5) and 'model')
+    assert loader.status()['state'] == 'not_started'
+
+    loader.start()
+    assert loader.status()['state'] == 'loading'
+    assert loader.get() is None and not loader.ready
+
+    release.set()
+    assert loader.get(timeout=5) == 'model'
+    status = loader.status()
+    assert status['state'] == 'ready' and status['error'] is None
+    assert status['load_seconds'] is not None
+
+
+def test_background_failure_is_reported():
+    def factory():
+        raise OSError("model file missing")
+
+    loader = BackgroundLoader(factory)
+    loader.start()
+    assert loader.get(timeout=5) is None
+    assert loader.status()['state'] == 'failed'
+    assert loader.error == "model file missing"
+
+
+def test_foreground_failure_raises():
+    loader = BackgroundLoader(lambda: 1 / 0)
+    with pytest.raises(RuntimeError, match="division by zero"):
+        loader.start(background=False)
+    assert loader.status()['state'] == 'failed'
+
+
+def test_start_only_loads_once():
+    calls = []
+    loader = BackgroundLoader(lambda: calls.append(1) or 'model')
+    loader.start(background=False)
+    loader.start(background=False)
+    assert loader.get() == 'model' and calls == [1]
@@ -0,0 +1,55 @@
+import numpy as np
+
+from motion_gate import MotionGate
+from session_store import FrameRingBuffer
+
+
+def image(value):
+    return np.full((64, 64, 3), value, dtype=np.float32)
+
+
+def fill(gate, buffer, values):
+    for value in values:
+        buffer.push(image(value))
+        gate.observe(buffer, buffer.sequence()[-1])
+
+
+def test_observe_records_motion_per_slot():
+    gate = MotionGate(motion_threshold=0.01)
+    buffer = FrameRingBuffer(sequence_length=3)
+    fill(gate, buffer, [0.0])
+    assert buffer.motion[0] == np.inf
+    fill(gate, buffer, [0.25, 0.25])
+    assert buffer.motion[1] == np.float32(0.25)
+    assert buffer.motion[2] == 0.0
+
+    # Disabled gating leaves the buffer alone
+    assert MotionGate().observe(buffer, image(1.0)) == 0.0
+
+
+def test_static_windows_are_skipped():
+    gate = MotionGate(motion_threshold=0.01)
+    buffer = FrameRingBuffer(sequence_length=3)
+    fill(gate, buffer, [0.0, 0.5, 0.5])
+    assert gate.check(buffer, now=1.0) is None
+
+    # One more identical frame still leaves the 0.5 step in the window
+    fill(gate, buffer, [0.5])
+    assert gate.check(buffer, now=2.0) is None
+    fill(gate, buffer, [0.5, 0.5])
+    assert gate.check(buffer, now=3.0) == 'static'
+
+    fill(gate, buffer, [0.0])
+    assert gate.check(buffer, now=4.0) is None
+    assert gate.stats()['inferences'] == 3 and gate.stats()['skipped_static'] == 1
+
+
+def test_min_interval_between_inferences():
+    gate = MotionGate(min_interval=0.5)
+    buffer = FrameRingBuffer(sequence_length=3)
+    assert gate.check(buffer, now=10.0) is None
+    assert gate.check(buffer, now=10.2) == 'interval'
+    assert gate.check(buffer, now=10.6) is None
+    stats = gate.stats()
+    assert stats['skipped_interval'] == 1
+    assert stats['skipped_ratio'] == 1 / 3
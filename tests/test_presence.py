@@ -0,0 +1,112 @@
+import fakeredis
+import pytest
+
+import presence
+from presence import InMemoryPresenceStore, RedisPresenceStore, create_presence_store
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(presence.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def store(request, clock):
+    if request.param == 'memory':
+        return InMemoryPresenceStore()
+    return RedisPresenceStore(fakeredis.FakeStrictRedis(), ttl=60)
+
+
+def test_join_lists_participants_and_get_finds_them(store):
+    store.join('m1', 1, {'name': 'Ann', 'id': 1})
+    store.join('m1', 2, {'name': 'Bob', 'id': 2})
+    store.join('m2', 3, {'name': 'Cat', 'id': 3})
+
+    assert sorted(p['name'] for p in store.participants('m1')) == ['Ann', 'Bob']
+    assert store.get('m1', 2) == {'name': 'Bob', 'id': 2}
+    assert store.get('m1', '2') == {'name': 'Bob', 'id': 2}
+    assert store.get('m2', 1) is None
+    assert store.stats()['meetings'] == 2
+    assert store.stats()['participants'] == 3
+
+
+def test_leave_removes_participant_and_empty_meeting(store):
+    store.join('m1', 1, {'name': 'Ann', 'id': 1})
+    store.join('m1', 2, {'name': 'Bob', 'id': 2})
+
+    store.leave('m1', 1)
+    assert [p['name'] for p in store.participants('m1')] == ['Bob']
+    store.leave('m1', 2)
+    assert store.participants('m1') == []
+    assert store.stats()['meetings'] == 0
+    assert store.stats()['participants'] == 0
+    # Leaving twice, or a meeting nobody joined, is harmless
+    store.leave('m1', 2)
+    store.leave('nowhere', 1)
+
+
+def test_rejoin_replaces_info(store):
+    store.join('m1', 1, {'name': 'Ann', 'id': 1})
+    store.join('m1', 1, {'name': 'Annie', 'id': 1})
+    assert store.participants('m1') == [{'name': 'Annie', 'id': 1}]
+
+
+def test_redis_participants_expire_without_heartbeat(clock):
+    store = RedisPresenceStore(fakeredis.FakeStrictRedis(), ttl=60)
+    store.join('m1', 1, {'name': 'Ann', 'id': 1})
+    store.join('m1', 2, {'name': 'Bob', 'id': 2})
+
+    clock.now += 40
+    store.heartbeat('m1', 2)
+    clock.now += 30
+    # Ann was last seen 70 s ago, Bob 30 s ago
+    assert [p['name'] for p in store.participants('m1')] == ['Bob']
+    assert store.get('m1', 1) is None
+    assert store.stats() == {'backend': 'redis', 'meetings': 1, 'participants': 1, 'ttl': 60}
+
+    clock.now += 61
+    assert store.participants('m1') == []
+    assert store.stats()['meetings'] == 0
+
+
+def test_redis_heartbeat_after_expiry_does_not_resurrect(clock):
+    store = RedisPresenceStore(fakeredis.FakeStrictRedis(), ttl=60)
+    store.join('m1', 1, {'name': 'Ann', 'id': 1})
+    store.leave('m1', 1)
+    store.heartbeat('m1', 1)
+    assert store.participants('m1') == []
+    assert store.stats()['participants'] == 0
+
+
+def test_redis_stats_do_not_scan_the_keyspace(clock):
+    client = fakeredis.FakeStrictRedis()
+    store = RedisPresenceStore(client, ttl=60)
+    store.join('m1', 1, {'name': 'Ann', 'id': 1})
+    client.scan_iter = client.scan = client.keys = None  # any keyspace walk would fail
+    assert store.stats()['meetings'] == 1
+
+
+def test_memory_entries_stay_until_leave(clock):
+    store = InMemoryPresenceStore()
+    store.join('m1', 1, {'name': 'Ann', 'id': 1})
+    clock.now += 3600
+    store.heartbeat('m1', 1)
+    assert store.participants('m1') == [{'name': 'Ann', 'id': 1}]
+
+
+def test_create_presence_store_validates_configuration():
+    assert isinstance(create_presence_store('memory'), InMemoryPresenceStore)
+    with pytest.raises(ValueError):
+        create_presence_store('redis')
+    with pytest.raises(ValueError):
+        create_presence_store('memcached')
@@ -0,0 +1,82 @@
+import pytest
+
+from conftest import signed_in_client
+from gesture_recognition import prediction_result
+from rate_limit import InferenceAdmission, RateLimitedError, TokenBucket
+
+
+class FakeRecognizer:
+    error = None
+
+    def predict_detailed(self, frame_data, meeting_id=None, user_id=None, frame_format=None):
+        return prediction_result("Collecting frames...", 0.0)
+
+
+def test_token_bucket_retry_after():
+    bucket = TokenBucket(rate=2.0, burst=2, now=0.0)
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    # Half a second later exactly one token has refilled
+    assert bucket.take(0.25) == pytest.approx(0.25)
+    assert bucket.take(0.5) == 0.0
+    # Refills never exceed the burst
+    bucket.take(100.0)
+    assert bucket.tokens == pytest.approx(1.0)
+
+
+def test_retry_after_header_is_whole_seconds():
+    assert RateLimitedError("slow down", 0.2).retry_after_header == '1'
+    assert RateLimitedError("slow down", 2.1).retry_after_header == '3'
+
+
+def test_reserved_slots_only_admit_priority_callers():
+    admission = InferenceAdmission(rate=100, burst=100, max_inflight=4, priority_reserve=0.25)
+    admission.set_host('m', 'host')
+    for user_id in (1, 2, 3):
+        admission.acquire(user_id, 'm')
+    with pytest.raises(RateLimitedError, match='capacity') as error:
+        admission.acquire(4, 'm')
+    assert error.value.retry_after == admission.busy_retry_after
+    assert admission.acquire('host', 'm') is True
+
+    stats = admission.stats()
+    assert stats['inflight'] == 4 and stats['over_capacity'] == 1 and stats['priority_admitted'] == 1
+
+
+def test_over_capacity_rejections_keep_the_token():
+    admission = InferenceAdmission(rate=1, burst=1, max_inflight=1, priority_reserve=0)
+    admission.acquire(1, 'm')
+    with pytest.raises(RateLimitedError, match='capacity'):
+        admission.acquire(2, 'm')
+    admission.release()
+    # User 2's only token was handed back, so it is admitted now
+    admission.acquire(2, 'm')
+    with pytest.raises(RateLimitedError, match='slow down'):
+        admission.acquire(1, 'm')
+
+
+def test_zero_rate_disables_the_per_caller_limit():
+    admission = InferenceAdmission(rate=0, burst=1, max_inflight=2, priority_reserve=0)
+    for _ in range(50):
+        with admission.admit(1, 'm'):
+            pass
+    assert admission.stats()['rate_limited'] == 0
+
+    with admission.admit(1, 'm'), admission.admit(1, 'm'):
+        with pytest.raises(RateLimitedError, match='capacity'):
+            admission.acquire(1, 'm')
+
+
+def test_over_capacity_frames_get_a_429(app_module, monkeypatch):
+    client = signed_in_client(app_module, 'Overloaded')
+    monkeypatch.setattr(app_module.gesture_loader, 'error', None)
+    monkeypatch.setattr(app_module.gesture_loader, 'get', lambda: FakeRecognizer())
+    assert client.post('/process_gesture', json={'frame': 'x', 'meeting_id': 'm-busy'}).status_code == 200
+
+    monkeypatch.setattr(app_module.inference_admission, 'max_inflight', 0)
+    response = client.post('/process_gesture', json={'frame': 'x', 'meeting_id': 'm-busy'})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json() == {'success': False, 'error': 'Gesture recognition is at capacity',
+                                   'retry_after': app_module.inference_admission.busy_retry_after}
@@ -0,0 +1,70 @@
+import numpy as np
+
+from motion_gate import MotionGate
+from session_store import FrameRingBuffer, SessionStore
+
+
+def frame(value):
+    return np.full((64, 64, 3), value, dtype=np.float32)
+
+
+def test_clear_resets_motion_gating_state():
+    gate = MotionGate(motion_threshold=0.01)
+    buffer = FrameRingBuffer(sequence_length=3)
+    for value in (0.0, 0.5, 0.5):
+        buffer.push(frame(value))
+        gate.observe(buffer, buffer.sequence()[-1])
+    assert gate.check(buffer) is None
+
+    buffer.clear()
+    assert buffer.thumbnail is None
+    assert buffer.last_inference == 0.0
+    assert not buffer.motion.any()
+
+    # A fresh window starting from the last image seen is new motion, not a static window
+    for _ in range(3):
+        buffer.push(frame(0.5))
+        gate.observe(buffer, buffer.sequence()[-1])
+    assert gate.check(buffer) is None
+
+
+def test_sequence_is_ordered_oldest_to_newest():
+    buffer = FrameRingBuffer(sequence_length=3, frame_shape=(1,))
+    for value in range(5):
+        buffer.push(np.array([value], dtype=np.float32))
+    assert buffer.is_full()
+    assert buffer.sequence()[:, 0].tolist() == [2.0, 3.0, 4.0]
+    # The window is a view of the storage, not a copy
+    assert buffer.sequence().base is buffer.frames
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('session_store.time.monotonic', lambda: clock[0])
+    store = SessionStore(sequence_length=2, frame_shape=(1,), idle_ttl=10)
+    first = store.get('m', 1)
+    store.get('m', 2)
+
+    clock[0] += 5
+    store.get('m', 2)
+    clock[0] += 6
+    store.evict_idle()
+    assert len(store) == 1 and store.evictions == 1
+    assert store.get('m', 1) is not first
+    assert store.total_bytes == 2 * first.nbytes
+
+
+def test_memory_cap_evicts_least_recently_used():
+    buffer_bytes = FrameRingBuffer(sequence_length=2, frame_shape=(1,)).nbytes
+    store = SessionStore(sequence_length=2, frame_shape=(1,), max_bytes=2 * buffer_bytes)
+    first = store.get('m', 1)
+    store.get('m', 2)
+    assert store.get('m', 1) is first  # Now the most recently used
+
+    store.get('m', 3)
+    assert store.stats() == {'sessions': 2, 'bytes': 2 * buffer_bytes, 'max_bytes': 2 * buffer_bytes,
+                             'evictions': 1}
+    assert store.get('m', 1) is first
+
+    store.drop('m', 1)
+    assert len(store) == 1 and store.total_bytes == buffer_bytes
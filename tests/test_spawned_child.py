@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What a spawned multiprocessing child does with the parent's main script
+CHILD = f'''
+import runpy, sys, threading
+sys.path.insert(0, {ROOT!r})
+module = runpy.run_path({os.path.join(ROOT, 'app.py')!r}, run_name='__mp_main__')
+import concurrency, logs
+print(module['SPAWNED_CHILD'], module['gesture_loader'].status()['state'], logs.stats()['format'],
+      sorted(thread.name for thread in threading.enumerate()))
+'''
+
+
+def test_app_startup_is_skipped_in_spawned_children(tmp_path):
+    env = dict(os.environ, PASSWORD_HASH_EXECUTOR='process', SERVER_ASYNC_MODE='gevent')
+    result = subprocess.run([sys.executable, '-c', CHILD], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split('\n')[0] == "True not_started None ['MainThread']"
+    assert not os.path.exists(tmp_path / 'signify.db')
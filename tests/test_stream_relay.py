@@ -0,0 +1,107 @@
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+from stream_relay import VideoRelay
+
+
+class FakeSocketIO:
+    """Records emits and exposes an engine.io outbound queue per socket"""
+
+    def __init__(self):
+        self.emitted = []
+        self.eio_queues = {}
+        self.server = SimpleNamespace(
+            eio=SimpleNamespace(sockets={}),
+            manager=SimpleNamespace(eio_sid_from_sid=lambda sid, namespace: 'eio-' + sid)
+        )
+
+    def connect(self, sid):
+        socket = SimpleNamespace(queue=queue.Queue())
+        self.server.eio.sockets['eio-' + sid] = socket
+        return socket.queue
+
+    def emit(self, event, data, to=None, skip_sid=None):
+        self.emitted.append((event, data, to, skip_sid))
+
+    def start_background_task(self, target):
+        # Tests drain explicitly
+        return object()
+
+    def sleep(self, seconds):
+        pass
+
+
+@pytest.fixture
+def relay_setup():
+    socketio = FakeSocketIO()
+    relay = VideoRelay(socketio, max_fps=0, max_queue=8, max_backlog=2)
+    queues = {sid: socketio.connect(sid) for sid in ('alice', 'bob', 'carol')}
+    for sid in queues:
+        relay.add('m1', sid)
+    return socketio, relay, queues
+
+
+def frames_to(socketio, sid):
+    return [data['stream'] for event, data, to, _ in socketio.emitted if to == sid]
+
+
+def test_frames_reach_everyone_but_the_sender(relay_setup):
+    socketio, relay, _ = relay_setup
+    relay.publish('m1', 1, 'frame-1', 'alice')
+    assert relay.drain() == 2
+    assert frames_to(socketio, 'bob') == ['frame-1']
+    assert frames_to(socketio, 'carol') == ['frame-1']
+    assert frames_to(socketio, 'alice') == []
+
+
+def test_backlogged_recipient_only_gets_the_latest_frame_once_it_catches_up(relay_setup):
+    socketio, relay, queues = relay_setup
+    # Bob's socket already has max_backlog packets waiting to be written
+    queues['bob'].put('packet')
+    queues['bob'].put('packet')
+
+    for index in range(5):
+        relay.publish('m1', 1, f'frame-{index}', 'alice')
+        relay.drain()
+    assert frames_to(socketio, 'bob') == []
+    assert frames_to(socketio, 'carol') == [f'frame-{index}' for index in range(5)]
+    assert relay.stats()['rooms']['m1']['backlogged'] == 1
+
+    queues['bob'].get()
+    relay.drain()
+    assert frames_to(socketio, 'bob') == ['frame-4']
+
+
+def test_drain_loop_survives_emit_errors(relay_setup):
+    socketio, relay, _ = relay_setup
+    relay.publish('m1', 1, 'frame-1', 'alice')
+    calls = []
+
+    def failing_emit(*args, **kwargs):
+        raise RuntimeError("transport closed")
+
+    def stop_after_two(seconds):
+        calls.append(seconds)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+
+    socketio.emit = failing_emit
+    socketio.sleep = stop_after_two
+    with pytest.raises(KeyboardInterrupt):
+        relay._drain_loop()
+    assert relay.stats()['drain_errors'] == 1
+
+
+def test_message_queue_forwards_to_other_workers_skipping_local_sockets():
+    socketio = FakeSocketIO()
+    relay = VideoRelay(socketio, max_fps=0, message_queue=True)
+    for sid in ('alice', 'bob'):
+        socketio.connect(sid)
+        relay.add('m1', sid)
+
+    relay.publish('m1', 1, 'frame-1', 'alice')
+    (event, data, to, skip_sid), = socketio.emitted
+    assert (event, to, data['stream']) == ('video_stream', 'm1', 'frame-1')
+    assert sorted(skip_sid) == ['alice', 'bob']
@@ -0,0 +1,39 @@
+import numpy as np
+import tensorflow as tf
+
+from gesture_recognition import GestureRecognizer
+from streaming_inference import check_equivalence, split_model
+
+
+def test_stub_model_splits_into_equivalent_halves(stub_model_files):
+    model = tf.keras.models.load_model(stub_model_files[0])
+    streaming = split_model(model)
+    assert streaming is not None
+    assert streaming.embed(np.zeros((2, 64, 64, 3), dtype=np.float32)).shape == (2, streaming.embedding_size)
+
+    equivalent, max_error = check_equivalence(model, streaming)
+    assert equivalent, max_error
+
+
+def test_models_without_a_frame_prefix_are_not_split():
+    model = tf.keras.Sequential([
+        tf.keras.layers.InputLayer(input_shape=(30, 8)),
+        tf.keras.layers.LSTM(4),
+        tf.keras.layers.Dense(4, activation='softmax')
+    ])
+    assert split_model(model) is None
+
+
+def test_streaming_recognizer_matches_the_full_model(stub_model_files):
+    model_path, label_path = stub_model_files
+    full = GestureRecognizer(model_path=model_path, label_path=label_path)
+    streaming = GestureRecognizer(model_path=model_path, label_path=label_path, streaming=True)
+    assert streaming.streaming is not None
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (64, 64, 3), dtype=np.uint8).tobytes() for _ in range(full.sequence_length + 3)]
+    for frame in frames:
+        expected = full.predict_detailed(frame, 'm', 1, 'rgb')
+        actual = streaming.predict_detailed(frame, 'm', 1, 'rgb')
+        assert actual['gesture'] == expected['gesture']
+        assert abs(actual['confidence'] - expected['confidence']) < 1e-4
@@ -0,0 +1,29 @@
+import os
+
+from transcribe import find_videos, output_paths
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+
+
+def test_output_dir_keeps_relative_names_and_never_overwrites(tmp_path):
+    for name in ('day1/session.mp4', 'day2/session.mp4', 'notes.txt'):
+        touch(str(tmp_path / 'recordings' / name))
+    touch(str(tmp_path / 'loose' / 'session.mp4'))
+    touch(str(tmp_path / 'other' / 'session.mp4'))
+
+    videos = find_videos([str(tmp_path / 'recordings'), str(tmp_path / 'recordings' / 'day1'),
+                          str(tmp_path / 'loose' / 'session.mp4'), str(tmp_path / 'other')])
+    outputs = output_paths(videos, 'captions', 'srt')
+
+    assert len(videos) == 4
+    assert sorted(outputs.values()) == [os.path.join('captions', name) for name in
+                                        ('day1/session.srt', 'day2/session.srt', 'session-2.srt', 'session.srt')]
+
+
+def test_transcripts_go_next_to_videos_without_output_dir(tmp_path):
+    touch(str(tmp_path / 'a' / 'clip.webm'))
+    videos = find_videos([str(tmp_path)])
+    assert output_paths(videos, None, 'jsonl') == {str(tmp_path / 'a' / 'clip.webm'): str(tmp_path / 'a' / 'clip.jsonl')}
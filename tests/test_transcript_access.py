@@ -0,0 +1,36 @@
+from conftest import signed_in_client
+
+
+def create_meeting(client):
+    response = client.get('/create_meeting')
+    return response.headers['Location'].split('/meeting/')[1].split('?')[0]
+
+
+def test_transcript_is_limited_to_host_and_participants(app_module):
+    host = signed_in_client(app_module, 'Host')
+    meeting_id = create_meeting(host)
+    app_module.database.add_messages([(meeting_id, 1, 'Host', 'chat', f'message {i}', float(i)) for i in range(3)])
+
+    response = host.get(f'/meeting/{meeting_id}/transcript')
+    assert response.status_code == 200
+    assert response.data.decode().count('\n') == 3
+
+    stranger = signed_in_client(app_module, 'Stranger')
+    assert stranger.get(f'/meeting/{meeting_id}/transcript').status_code == 403
+
+    guest = signed_in_client(app_module, 'Guest')
+    socket = app_module.socketio.test_client(app_module.app, flask_test_client=guest)
+    socket.emit('join', {'meeting_id': meeting_id})
+    response = guest.get(f'/meeting/{meeting_id}/transcript?limit=2')
+    assert response.status_code == 200
+    assert response.data.decode().count('\n') == 2
+    socket.disconnect()
+
+
+def test_transcript_of_unknown_meeting_is_404(app_module):
+    client = signed_in_client(app_module, 'Someone')
+    assert client.get('/meeting/nope/transcript').status_code == 404
+
+
+def test_transcript_requires_login(app_module):
+    assert app_module.app.test_client().get('/meeting/nope/transcript').status_code == 401
@@ -0,0 +1,258 @@
+"""Transcribe recorded sign-language videos into time-stamped sentence segments
+
+Usage:
+    python transcribe.py recordings/ --format srt
+    python transcribe.py session1.mp4 session2.mp4 --stride 5 --batch-size 32 --jobs 4
+    python transcribe.py recordings/ --backend tflite --sample-fps 10 --output-dir captions/
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from frame_preprocessing import resize_normalize
+from gesture_recognition import CONFIDENCE_THRESHOLD, SENTENCES
+from inference_backends import DEFAULT_MODEL_PATH, load_backend
+from session_store import FrameRingBuffer
+
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v'}
+
+IMG_SIZE = (64, 64)
+SEQUENCE_LENGTH = 30
+
+
+def find_videos(paths):
+    """Expand the given files and directories into a sorted list of (video path, name) pairs
+
+    The name is the video's path relative to the directory it was found in,
+    or its file name when it was given directly. A video reached through
+    several inputs is listed once.
+    """
+    videos = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                        video = os.path.join(root, name)
+                        videos.setdefault(video, os.path.relpath(video, path))
+        else:
+            videos.setdefault(path, os.path.basename(path))
+    return sorted(videos.items())
+
+
+def output_paths(videos, output_dir, output_format):
+    """Transcript path of every video: next to it, or under output_dir keeping its relative name
+
+    Names that would still collide under output_dir (the same relative name
+    found in two inputs) get a -2, -3, ... suffix instead of overwriting.
+    """
+    paths = {}
+    taken = set()
+    for path, name in videos:
+        base = os.path.splitext(os.path.join(output_dir, name) if output_dir else path)[0]
+        candidate = f"{base}.{output_format}"
+        number = 1
+        while candidate in taken:
+            number += 1
+            candidate = f"{base}-{number}.{output_format}"
+        taken.add(candidate)
+        paths[path] = candidate
+    return paths
+
+
+def read_frames(path, sample_fps=None):
+    """Yield (frame index, timestamp in seconds, BGR frame) from a video, one frame at a time
+
+    With sample_fps only about that many frames per second are yielded, so
+    recordings can be fed at the rate the live client captures at.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Cannot open video {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    step = fps / sample_fps if sample_fps and sample_fps < fps else 1.0
+    try:
+        index = 0
+        next_sample = 0.0
+        while True:
+            # grab() skips decoding frames that sampling would throw away
+            if not capture.grab():
+                break
+            if index >= next_sample:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                yield index, index / fps, frame
+                next_sample += step
+            index += 1
+    finally:
+        capture.release()
+
+
+def sliding_windows(frames, sequence_length=SEQUENCE_LENGTH, stride=1, batch_size=16):
+    """Group preprocessed frames into batches of overlapping windows
+
+    Yields (batch, spans), where batch is a (n, sequence_length, 64, 64, 3)
+    float32 array and spans holds the (start, end) timestamps of each window.
+    """
+    buffer = FrameRingBuffer(sequence_length, IMG_SIZE[::-1] + (3,))
+    timestamps = FrameRingBuffer(sequence_length, (), dtype=np.float64)
+    batch = np.empty((batch_size, sequence_length) + IMG_SIZE[::-1] + (3,), dtype=np.float32)
+    spans = []
+    since_last = stride
+
+    for _, timestamp, frame in frames:
+        resize_normalize(frame, IMG_SIZE, out=buffer.next_slot())
+        buffer.commit()
+        timestamps.push(timestamp)
+        if not buffer.is_full():
+            continue
+        if since_last < stride:
+            since_last += 1
+            continue
+        since_last = 1
+
+        batch[len(spans)] = buffer.sequence()
+        window_times = timestamps.sequence()
+        spans.append((float(window_times[0]), float(window_times[-1])))
+        if len(spans) == batch_size:
+            yield batch, spans
+            batch = np.empty_like(batch)
+            spans = []
+
+    if spans:
+        yield batch[:len(spans)], spans
+
+
+def decode_segments(windows, threshold=CONFIDENCE_THRESHOLD):
+    """Turn per-window predictions into sentence segments with the live recognizer's rule
+
+    A window counts when its top class reaches threshold. Like
+    recognize_gesture(), which clears the frame buffer after a recognition,
+    later windows that overlap an accepted window are ignored.
+    """
+    segments = []
+    last_end = None
+    for (start, end), probabilities in windows:
+        if last_end is not None and start <= last_end:
+            continue
+        class_index = int(np.argmax(probabilities))
+        confidence = float(probabilities[class_index])
+        if confidence < threshold or class_index >= len(SENTENCES):
+            continue
+        segments.append({
+            'start': start,
+            'end': end,
+            'sentence': SENTENCES[class_index],
+            'confidence': confidence
+        })
+        last_end = end
+    return segments
+
+
+def srt_timestamp(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+
+def write_segments(segments, path, output_format):
+    with open(path, 'w') as f:
+        if output_format == 'jsonl':
+            for segment in segments:
+                f.write(json.dumps(segment) + '\n')
+        else:
+            for number, segment in enumerate(segments, 1):
+                f.write(f"{number}\n{srt_timestamp(segment['start'])} --> {srt_timestamp(segment['end'])}\n"
+                        f"{segment['sentence']}\n\n")
+
+
+def transcribe_video(path, backend, args, predict_lock):
+    """Decode, window and classify one video; returns (segments, frames read, seconds taken)
+
+    Videos are decoded in parallel but share one backend, so its predict()
+    calls are serialized with predict_lock.
+    """
+    start = time.perf_counter()
+    frames_read = 0
+
+    def counted(frames):
+        nonlocal frames_read
+        for item in frames:
+            frames_read += 1
+            yield item
+
+    windows = []
+    frames = counted(read_frames(path, args.sample_fps))
+    for batch, spans in sliding_windows(frames, SEQUENCE_LENGTH, args.stride, args.batch_size):
+        with predict_lock:
+            probabilities = backend.predict(batch)
+        windows.extend(zip(spans, probabilities))
+
+    segments = decode_segments(windows, args.threshold)
+    return segments, frames_read, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='Video files or directories of videos')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='Path of the Keras .h5 model')
+    parser.add_argument('--backend', choices=['keras', 'tflite', 'onnx'], default='keras')
+    parser.add_argument('--backend-model', help='Converted model path for the tflite/onnx backends')
+    parser.add_argument('--quantization', choices=['float16', 'dynamic'], help='TFLite model variant')
+    parser.add_argument('--compiled', action='store_true', help='Use the tf.function Keras path')
+    parser.add_argument('--stride', type=int, default=1, help='Frames between consecutive windows')
+    parser.add_argument('--batch-size', type=int, default=16, help='Windows per forward pass')
+    parser.add_argument('--sample-fps', type=float, help='Only read about this many frames per second')
+    parser.add_argument('--threshold', type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Videos decoded in parallel')
+    parser.add_argument('--format', choices=['jsonl', 'srt'], default='jsonl')
+    parser.add_argument('--output-dir', help='Where to write transcripts (defaults to next to each video)')
+    args = parser.parse_args()
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        parser.error("No video files found")
+
+    backend = load_backend(args.backend, args.model, args.backend_model, args.quantization, compiled=args.compiled)
+    # Decoding runs in parallel; the model runs one batch at a time (it uses all cores for that anyway)
+    predict_lock = threading.Lock()
+    outputs = output_paths(videos, args.output_dir, args.format)
+
+    started = time.perf_counter()
+    total_frames = 0
+    with ThreadPoolExecutor(max_workers=min(args.jobs, len(videos))) as executor:
+        futures = {path: executor.submit(transcribe_video, path, backend, args, predict_lock)
+                   for path, _ in videos}
+        for path, future in futures.items():
+            try:
+                segments, frames_read, seconds = future.result()
+            except Exception as e:
+                print(f"Error transcribing {path}: {str(e)}")
+                continue
+            output_path = outputs[path]
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            write_segments(segments, output_path, args.format)
+            total_frames += frames_read
+            print(f"{path}: {len(segments)} segments, {frames_read} frames in {seconds:.1f}s "
+                  f"({frames_read / seconds if seconds else 0:.1f} fps) -> {output_path}")
+
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'videos': len(videos),
+        'frames': total_frames,
+        'seconds': elapsed,
+        'frames_per_second': total_frames / elapsed if elapsed else 0.0
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from database import add_messages
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptWriter:
+    """Persists meeting messages from a background thread in batched transactions
+
+    Socket handlers only put a row on a bounded queue. The writer thread
+    takes up to batch_size rows at a time, waiting at most flush_interval
+    for a batch to fill, and inserts them with one executemany per commit.
+    When the queue is full new rows are dropped and counted rather than
+    blocking the handler.
+    """
+
+    def __init__(self, batch_size=200, flush_interval=0.5, max_queue=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='transcript-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def record(self, meeting_id, user_id, username, message_type, message, ts=None):
+        """Queue one message for the transcript; returns False if it had to be dropped"""
+        if self._thread is None:
+            self.start()
+        row = (meeting_id, user_id, username, message_type, message, time.time() if ts is None else ts)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stop = None in batch
+            rows = [row for row in batch if row is not None]
+            if rows:
+                try:
+                    add_messages(rows)
+                    with self._lock:
+                        self.written += len(rows)
+                        self.batches += 1
+                except Exception as e:
+                    with self._lock:
+                        self.errors += 1
+                    logger.error("Error writing %d transcript messages: %s", len(rows), e)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """Block until every message queued so far has been written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write out what is queued and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout=10)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'written': self.written,
+                'batches': self.batches,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'avg_batch_size': self.written / self.batches if self.batches else 0.0
+            }
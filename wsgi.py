@@ -0,0 +1,3 @@
+# Gunicorn entry point: gunicorn wsgi:app, with the worker class picked by gunicorn.conf.py
+# from SERVER_ASYNC_MODE. Importing app applies the matching monkey-patching if the worker has not.
+from app import app, socketio